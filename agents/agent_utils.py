@@ -8,6 +8,8 @@ import subprocess
 import sys
 from pathlib import Path
 
+from gaia import event_log
+
 
 def build_event(event_type, source, payload, target=None, task_id=None):
     return {
@@ -22,10 +24,14 @@ def build_event(event_type, source, payload, target=None, task_id=None):
 
 
 def append_event_atomic(path, event):
-    # simple atomic append: open in append mode and write newline-terminated JSON
-    d = os.path.dirname(path)
+    d = os.path.dirname(str(path))
     if d and not os.path.exists(d):
         os.makedirs(d, exist_ok=True)
+    if event_log.is_events_file(path):
+        # one locked write per event through the segmented event log (gaia.event_log)
+        event_log.open_log(str(path)).append(event)
+        return
+    # any other NDJSON target stays one plain file: open in append mode and write newline-terminated JSON
     with open(path, 'a', encoding='utf-8') as f:
         f.write(json.dumps(event, ensure_ascii=False) + '\n')
 
@@ -64,9 +70,10 @@ def retry_with_backoff(fn, retries: int = 3, base_backoff: float = 0.5, exceptio
     raise last_exc
 
 
-def run_script(script_path: str, args: list = None, timeout: int = None) -> dict:
+def run_script(script_path: str, args: list = None, timeout: int = None, env: dict = None) -> dict:
     """Run a script via `scripts/run_script.py` to ensure correct interpreter.
 
+    `env` entries are added to the inherited environment.
     Returns a dict: {'rc': int, 'stdout': str, 'stderr': str}
     """
     args = args or []
@@ -74,7 +81,8 @@ def run_script(script_path: str, args: list = None, timeout: int = None) -> dict
     runner = root / 'scripts' / 'run_script.py'
     cmd = [sys.executable, str(runner), script_path] + args
     try:
-        p = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        p = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                           env={**os.environ, **env} if env else None)
         return {'rc': p.returncode, 'stdout': p.stdout, 'stderr': p.stderr}
     except Exception as e:
         return {'rc': 255, 'stdout': '', 'stderr': str(e)}
@@ -3,6 +3,8 @@
 
 Features:
 - CLI: `--task` `--cmd` `--concurrency` `--dry-run`
+- `--manifest m.json --enqueue` submits the steps to the orchestrator queue as
+  a dependency graph, so independent steps run in parallel across workers.
 - Respects `PROTOTYPE_USE_LOCAL_EVENTS=1` or `DRY_RUN=1` for local-only mode.
 - Emits NDJSON events to `GAIA_EVENTS_PATH` env or repo root `events.ndjson`.
 - Writes simple audit rows into `gaia.db` via `orchestrator.init_db()`.
@@ -223,6 +225,37 @@ def execute_command(cmd, timeout=300):
     return run_cmd(cmd, timeout=timeout)
 
 
+def enqueue_manifest(manifest: dict) -> dict:
+    """Enqueue manifest steps as `job` tasks wired by their dependencies.
+
+    A step may list the ids of the steps it needs in `depends_on`. When no
+    step declares any, each step depends on the previous one, matching the
+    sequential runner. A failing step fails its dependents unless it is
+    marked `allow_fail`. Returns {step_id: task_id}.
+    """
+    steps = manifest.get('steps', [])
+    if len(steps) > 1:
+        # fail before the first step is enqueued, not half way through
+        orchestrator.require_queue_features('dependencies')
+    declared = any('depends_on' in s for s in steps)
+    task_ids = {}
+    prev = None
+    for i, step in enumerate(steps):
+        step_id = step.get('id') or f'step{i}'
+        if declared:
+            needs = step.get('depends_on') or []
+            missing = [n for n in needs if n not in task_ids]
+            if missing:
+                raise ValueError(f'step {step_id} depends on unknown or later steps: {missing}')
+            parents = [task_ids[n] for n in needs]
+        else:
+            parents = [prev] if prev is not None else []
+        payload = {'cmd': step.get('cmd'), 'timeout': step.get('timeout', 300), 'check': not step.get('allow_fail', False),
+                   'manifest': manifest.get('name'), 'step_id': step_id}
+        prev = task_ids[step_id] = orchestrator.enqueue_task('job', payload, depends_on=parents)
+    return task_ids
+
+
 def main(argv=None):
     p = argparse.ArgumentParser()
     p.add_argument('--task', default='run', help='Task type')
@@ -230,6 +263,7 @@ def main(argv=None):
     p.add_argument('--manifest', help='Path to a JSON manifest describing multiple steps')
     p.add_argument('--concurrency', type=int, default=1)
     p.add_argument('--dry-run', action='store_true')
+    p.add_argument('--enqueue', action='store_true', help='With --manifest, submit steps to the orchestrator queue instead of running them here')
     args = p.parse_args(argv)
 
     dry = args.dry_run or is_dry_run()
@@ -275,6 +309,15 @@ def main(argv=None):
         print('dry-run: emitted events for', len(jobs), 'jobs')
         return 0
 
+    if manifest and args.enqueue:
+        task_ids = enqueue_manifest(manifest)
+        payload = {'manifest': manifest.get('name'), 'tasks': task_ids}
+        payload['idem'] = idempotency_key('alby_agent', payload)
+        append_event_atomic(events_path, build_event('alby.manifest.enqueued', 'alby_agent', payload))
+        write_audit('alby_agent', 'manifest.enqueue', json.dumps(task_ids))
+        print('enqueued', len(task_ids), 'steps')
+        return 0
+
     # Run jobs. If manifest provided, run steps sequentially and emit per-step events.
     if manifest:
         # single manifest run
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Simple archiver CLI for orchestrator.
+
+Runs `orchestrator.archive_tasks(older_than_seconds)` once or in a loop,
+moving finished tasks out of the hot `queue` table into `queue_archive`.
+"""
+import argparse
+import time
+import orchestrator
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument('--older-than', type=float, default=7 * 86400, help='Archive completed/failed tasks finished more than N seconds ago')
+    p.add_argument('--batch-size', type=int, default=500, help='Rows moved per write transaction')
+    p.add_argument('--max-batches', type=int, default=None, help='Stop a pass after this many batches')
+    p.add_argument('--interval', type=float, default=0, help='If >0, run archival every N seconds (loop).')
+    p.add_argument('--once', action='store_true', help='Run only once')
+    args = p.parse_args(argv)
+    orchestrator.require_queue_features('archive')
+
+    def run():
+        n = orchestrator.archive_tasks(args.older_than, batch_size=args.batch_size, max_batches=args.max_batches)
+        print('archived', n)
+
+    if args.once or args.interval <= 0:
+        run()
+        return 0
+
+    try:
+        while True:
+            run()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
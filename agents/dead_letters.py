@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Dead-letter queue CLI for orchestrator.
+
+Lists failed tasks recorded in `dead_letters` and replays or purges them in
+bulk, one transaction per command. Tasks that failed with
+`dependency_failed` come back with their replayed parent, blocked until it
+completes; select them with --ids or --error to replay them on their own.
+
+Usage:
+  python -m agents.dead_letters list [--type job] [--error timeout] [--limit 50] [--json]
+  python -m agents.dead_letters replay (--ids 1,2 | --type T | --error E | --all) [--delay 30] [--priority 5]
+  python -m agents.dead_letters purge (--ids 1,2 | --type T | --error E | --all)
+"""
+import argparse
+import json
+
+import orchestrator
+
+
+def _ids(value):
+    return [int(x) for x in value.split(',') if x.strip()] if value else None
+
+
+def _selection(args):
+    """Return the filter kwargs, or None when nothing was selected."""
+    sel = {'task_ids': _ids(args.ids), 'task_type': args.type, 'error': args.error}
+    if not args.all and not any(v for v in sel.values()):
+        return None
+    return sel
+
+
+def cmd_list(args):
+    rows = orchestrator.list_dead_letters(task_type=args.type, error=args.error, limit=args.limit)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    for r in rows:
+        print(f"{r['task_id']}\t{r['task_type']}\tattempts={r['attempts']}\t{r['failed_at']}\t{r['error']}")
+    print('dead letters:', json.dumps(orchestrator.count_dead_letters()))
+    return 0
+
+
+def cmd_replay(args):
+    sel = _selection(args)
+    if sel is None:
+        print('refusing to replay everything without --all')
+        return 2
+    ids = orchestrator.replay_dead_letters(delay_seconds=args.delay, priority=args.priority, **sel)
+    print('replayed', len(ids))
+    return 0
+
+
+def cmd_purge(args):
+    sel = _selection(args)
+    if sel is None:
+        print('refusing to purge everything without --all')
+        return 2
+    print('purged', orchestrator.purge_dead_letters(**sel))
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='dead-letters')
+    sub = p.add_subparsers(dest='cmd')
+
+    def _filters(sp, selecting):
+        sp.add_argument('--type', default=None, help='Only this task type')
+        sp.add_argument('--error', default=None, help='Only failures whose error contains this text')
+        if selecting:
+            sp.add_argument('--ids', default=None, help='Comma-separated task ids')
+            sp.add_argument('--all', action='store_true', help='Select every dead letter when no other filter is given')
+
+    a = sub.add_parser('list')
+    _filters(a, False)
+    a.add_argument('--limit', type=int, default=100)
+    a.add_argument('--json', action='store_true')
+
+    b = sub.add_parser('replay')
+    _filters(b, True)
+    b.add_argument('--delay', type=float, default=0, help='Seconds before replayed tasks become claimable')
+    b.add_argument('--priority', type=int, default=None, help='Override the priority of replayed tasks')
+
+    c = sub.add_parser('purge')
+    _filters(c, True)
+
+    args = p.parse_args(argv)
+    orchestrator.require_queue_features('dead_letters')
+    if args.cmd == 'list':
+        return cmd_list(args)
+    if args.cmd == 'replay':
+        return cmd_replay(args)
+    if args.cmd == 'purge':
+        return cmd_purge(args)
+    p.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -19,6 +19,9 @@ import uuid
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from gaia import event_log  # noqa: E402
 
 
 def timestamp():
@@ -27,8 +30,7 @@ def timestamp():
 
 def append_event(evt):
     try:
-        with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, default=str) + '\n')
+        event_log.open_log(EVENTS_FILE).append(evt)
     except Exception as e:
         print('WARN: failed to append event:', e)
 
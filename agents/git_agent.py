@@ -11,7 +11,6 @@ Features (lightweight):
 This is intentionally minimal and safe. Use `--dry-run` to preview commands.
 """
 import argparse
-import json
 import os
 import subprocess
 import sys
@@ -20,6 +19,9 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 EVENT_LOG = ROOT / 'events.ndjson'
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from gaia import event_log  # noqa: E402
 
 
 def run(cmd, dry_run=False, check=True):
@@ -31,8 +33,7 @@ def run(cmd, dry_run=False, check=True):
 
 def append_event(ev: dict):
     ev.setdefault('timestamp', datetime.utcnow().isoformat() + 'Z')
-    with open(EVENT_LOG, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(ev) + '\n')
+    event_log.open_log(str(EVENT_LOG)).append(ev)
 
 
 def branch_name(session_date, agent, desc):
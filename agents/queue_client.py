@@ -0,0 +1,162 @@
+"""HTTP client for `agents.queue_server`.
+
+`QueueClient` mirrors the orchestrator calls a worker makes (claim_tasks,
+complete_tasks, fail_tasks, heartbeat, enqueue_task(s), count_tasks), so
+`agents/worker.py --queue-url` can run on a host without access to
+`gaia.db`. Each thread keeps one persistent HTTP/1.1 connection.
+
+Most calls are not idempotent (a repeated /claim orphans the first batch
+until its lease expires, a repeated /enqueue inserts twice), so a request
+is re-sent only when a reused keep-alive connection fails before any of it
+reached the server -- never after a timeout or once it has been sent.
+"""
+import http.client
+import json
+import os
+import select
+import threading
+from urllib.parse import urlsplit
+
+
+class QueueError(RuntimeError):
+    pass
+
+
+class EventWaiter:
+    """In-process stand-in for `orchestrator.TaskWaiter` used with a remote queue.
+
+    New remote work is picked up by long-poll claims; this only wakes the
+    worker loop when one of its own jobs finishes.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def wait(self, timeout: float) -> bool:
+        woke = self._event.wait(max(0.0, timeout))
+        self._event.clear()
+        return woke
+
+    def poke(self):
+        self._event.set()
+
+    def close(self):
+        pass
+
+
+def _dropped(conn) -> bool:
+    """True when an idle keep-alive socket was closed (or written to) by the server."""
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class QueueClient:
+    # `claim_tasks(..., wait=N)` blocks server-side until work arrives
+    LONG_POLL = True
+    # a long-poll read waits this much longer than the server may hold it
+    LONG_POLL_MARGIN = 30.0
+
+    def __init__(self, base_url: str, token: str = None, timeout: float = 60.0):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f'unsupported queue url: {base_url}')
+        self._conn_cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip('/')
+        self._token = token if token is not None else os.environ.get('GAIA_QUEUE_TOKEN')
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def _request(self, method, path, body=None, timeout=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'}
+        if self._token:
+            headers['X-Queue-Token'] = self._token
+        for attempt in (0, 1):
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None and _dropped(conn):
+                # the server closed the idle connection: start a fresh one
+                conn.close()
+                conn = None
+            if conn is None:
+                conn = self._local.conn = self._conn_cls(self._netloc, timeout=self._timeout)
+            reused = conn.sock is not None
+            conn.timeout = timeout or self._timeout
+            if reused:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, self._prefix + path, body=data, headers=headers)
+            except (ConnectionResetError, BrokenPipeError, http.client.RemoteDisconnected):
+                self._drop(conn)
+                # refused on the first write of a reused connection: nothing
+                # reached the server, so send once more on a new connection
+                if attempt or not reused:
+                    raise
+                continue
+            except (http.client.HTTPException, OSError):
+                self._drop(conn)
+                raise
+            try:
+                resp = conn.getresponse()
+                payload = resp.read()
+            except (http.client.HTTPException, OSError):
+                # the request may have been acted on: never re-send it
+                self._drop(conn)
+                raise
+            if resp.status != 200:
+                raise QueueError(f'{method} {path} -> {resp.status}: {payload[:200]!r}')
+            return json.loads(payload.decode('utf-8'))
+
+    def _drop(self, conn):
+        conn.close()
+        self._local.conn = None
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def TaskWaiter(self):
+        return EventWaiter()
+
+    def claim_tasks(self, worker_id: str, n: int, lease_seconds: float = None, task_types=None, wait: float = 0) -> list:
+        body = {'worker_id': worker_id, 'n': n, 'lease_seconds': lease_seconds, 'task_types': task_types, 'wait': wait}
+        timeout = self._timeout + (wait or 0) + (self.LONG_POLL_MARGIN if wait else 0)
+        return self._request('POST', '/claim', body, timeout=timeout)['tasks']
+
+    def claim_task(self, worker_id: str, lease_seconds: float = None, task_types=None):
+        tasks = self.claim_tasks(worker_id, 1, lease_seconds=lease_seconds, task_types=task_types)
+        return tasks[0] if tasks else None
+
+    def complete_tasks(self, items):
+        items = [[task_id, result] for task_id, result in items]
+        if items:
+            self._request('POST', '/complete', {'items': items})
+
+    def fail_tasks(self, items):
+        items = [[task_id, error] for task_id, error in items]
+        if items:
+            self._request('POST', '/fail', {'items': items})
+
+    def heartbeat(self, worker_id: str, task_ids, lease_seconds: float) -> int:
+        body = {'worker_id': worker_id, 'task_ids': list(task_ids), 'lease_seconds': lease_seconds}
+        return self._request('POST', '/heartbeat', body)['renewed']
+
+    def enqueue_task(self, task_type: str, payload: dict, priority: int = 0, delay_seconds: float = 0,
+                     dedup_key: str = None, depends_on=None) -> int:
+        body = {'task_type': task_type, 'payload': payload, 'priority': priority, 'delay_seconds': delay_seconds,
+                'dedup_key': dedup_key, 'depends_on': depends_on}
+        return self._request('POST', '/enqueue', body)['id']
+
+    def enqueue_tasks(self, items, priority: int = 0, delay_seconds: float = 0) -> list:
+        body = {'items': [list(i) for i in items], 'priority': priority, 'delay_seconds': delay_seconds}
+        return self._request('POST', '/enqueue_batch', body)['ids']
+
+    def count_tasks(self) -> dict:
+        return self._request('GET', '/counts')
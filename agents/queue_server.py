@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""HTTP front-end for the orchestrator queue.
+
+Lets workers on other hosts use the queue in `gaia.db` through
+`agents.queue_client.QueueClient` (worker flag `--queue-url`). Every
+endpoint takes and returns JSON; connections are kept alive (HTTP/1.1) and
+the batch endpoints carry many tasks per round-trip.
+
+  POST /enqueue        {task_type, payload, priority?, delay_seconds?, dedup_key?, depends_on?} -> {id}
+  POST /enqueue_batch  {items: [[task_type, payload, dedup_key?], ...], priority?, delay_seconds?} -> {ids}
+  POST /claim          {worker_id, n?, lease_seconds?, task_types?, wait?} -> {tasks}
+  POST /complete       {items: [[task_id, result], ...]} -> {count}
+  POST /fail           {items: [[task_id, error], ...]} -> {count}
+  POST /heartbeat      {worker_id, task_ids, lease_seconds} -> {renewed}
+  GET  /counts         -> {status: count}
+  GET  /health         -> {ok}
+
+`/claim` long-polls: with `wait` > 0 and nothing claimable it holds the
+request until new work is enqueued (local push wakeup) or `wait` elapses.
+Set GAIA_QUEUE_TOKEN to require a matching `X-Queue-Token` header; the
+server refuses to listen on a non-loopback --host without one.
+
+Usage:
+  python -m agents.queue_server [--host 127.0.0.1] [--port 8765] [--db gaia.db]
+"""
+import argparse
+import hmac
+import ipaddress
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orchestrator
+
+# upper bound for a single long-poll so idle connections get recycled
+MAX_WAIT_SECONDS = 30.0
+
+
+class _Wakeup:
+    """Fan one TaskWaiter out to every long-polling request thread."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.seq = 0
+        self._stop = threading.Event()
+        self._waiter = orchestrator.TaskWaiter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._waiter.wait(1.0):
+                self.notify()
+
+    def notify(self):
+        with self.cond:
+            self.seq += 1
+            self.cond.notify_all()
+
+    def close(self):
+        self._stop.set()
+        self._waiter.poke()
+        self._thread.join(timeout=2)
+        self._waiter.close()
+
+
+def _claim(body, wakeup):
+    worker_id = body['worker_id']
+    n = int(body.get('n', 1))
+    lease = body.get('lease_seconds')
+    task_types = body.get('task_types')
+    deadline = time.time() + min(float(body.get('wait') or 0), MAX_WAIT_SECONDS)
+    while True:
+        with wakeup.cond:
+            seen = wakeup.seq
+        tasks = orchestrator.claim_tasks(worker_id, n, lease_seconds=lease, task_types=task_types)
+        remaining = deadline - time.time()
+        if tasks or remaining <= 0:
+            return {'tasks': tasks}
+        with wakeup.cond:
+            # re-check once a second as well, for delayed tasks becoming visible
+            if wakeup.seq == seen:
+                wakeup.cond.wait(min(remaining, 1.0))
+
+
+def _is_loopback(host) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _make_handler(wakeup, token=None):
+    class QueueHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, code, obj):
+            data = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self):
+            if not token:
+                return True
+            # constant-time, so response timing does not leak the token
+            return hmac.compare_digest(self.headers.get('X-Queue-Token', '').encode('utf-8'), token.encode('utf-8'))
+
+        def do_GET(self):
+            if not self._authorized():
+                return self._send(401, {'error': 'unauthorized'})
+            if self.path == '/health':
+                return self._send(200, {'ok': True})
+            if self.path == '/counts':
+                return self._send(200, orchestrator.count_tasks())
+            self._send(404, {'error': 'not_found'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if not self._authorized():
+                return self._send(401, {'error': 'unauthorized'})
+            try:
+                body = json.loads(raw.decode('utf-8')) if raw else {}
+            except ValueError:
+                return self._send(400, {'error': 'invalid_json'})
+            try:
+                if self.path == '/claim':
+                    return self._send(200, _claim(body, wakeup))
+                if self.path == '/complete':
+                    items = [(i[0], i[1]) for i in body.get('items', [])]
+                    orchestrator.complete_tasks(items)
+                    return self._send(200, {'count': len(items)})
+                if self.path == '/fail':
+                    items = [(i[0], i[1]) for i in body.get('items', [])]
+                    orchestrator.fail_tasks(items)
+                    return self._send(200, {'count': len(items)})
+                if self.path == '/heartbeat':
+                    renewed = orchestrator.heartbeat(body['worker_id'], body.get('task_ids', []), body['lease_seconds'])
+                    return self._send(200, {'renewed': renewed})
+                if self.path == '/enqueue':
+                    if body.get('depends_on') and 'dependencies' not in orchestrator.QUEUE_FEATURES:
+                        return self._send(501, {'error': 'unsupported', 'detail': 'the queue backend does not support depends_on'})
+                    tid = orchestrator.enqueue_task(body['task_type'], body.get('payload') or {}, priority=body.get('priority', 0),
+                                                    delay_seconds=body.get('delay_seconds', 0), dedup_key=body.get('dedup_key'),
+                                                    depends_on=body.get('depends_on'))
+                    return self._send(200, {'id': tid})
+                if self.path == '/enqueue_batch':
+                    ids = orchestrator.enqueue_tasks([tuple(i) for i in body.get('items', [])], priority=body.get('priority', 0),
+                                                     delay_seconds=body.get('delay_seconds', 0))
+                    return self._send(200, {'ids': ids})
+            except (KeyError, TypeError, ValueError) as e:
+                return self._send(400, {'error': 'bad_request', 'detail': str(e)})
+            except Exception as e:
+                orchestrator.logger.exception('queue server error on %s', self.path)
+                return self._send(500, {'error': 'server_error', 'detail': str(e)})
+            self._send(404, {'error': 'not_found'})
+
+        def log_message(self, format, *args):
+            return
+
+    return QueueHandler
+
+
+def make_server(host='127.0.0.1', port=0, token=None):
+    """Create (but do not start) a queue server; port 0 picks a free port.
+
+    Call `serve_forever()` on the result; `server_close()` also stops the
+    wakeup listener. Raises ValueError for a non-loopback `host` without a
+    `token`, since the queue would otherwise be open to the network.
+    """
+    if not token and not _is_loopback(host):
+        raise ValueError(f'refusing to serve the queue on {host!r} without a token; set GAIA_QUEUE_TOKEN')
+    wakeup = _Wakeup()
+    server = ThreadingHTTPServer((host, port), _make_handler(wakeup, token))
+    server.daemon_threads = True
+    close = server.server_close
+
+    def server_close():
+        close()
+        wakeup.close()
+
+    server.server_close = server_close
+    return server
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='queue-server')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--db', default=None, help='Path to gaia.db (default: orchestrator.DB_PATH)')
+    args = p.parse_args(argv)
+
+    if args.db:
+        orchestrator.DB_PATH = os.path.abspath(args.db)
+    token = os.environ.get('GAIA_QUEUE_TOKEN')
+    if not token and not _is_loopback(args.host):
+        p.error(f'--host {args.host} is reachable from other machines; set GAIA_QUEUE_TOKEN first')
+    orchestrator.init_db()
+    server = make_server(args.host, args.port, token=token)
+    print('queue server listening on http://%s:%s' % server.server_address[:2], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
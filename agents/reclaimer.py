@@ -12,7 +12,7 @@ import orchestrator
 def main(argv=None):
     p = argparse.ArgumentParser()
     p.add_argument('--ttl', type=int, default=300, help='TTL seconds for in-progress tasks')
-    p.add_argument('--interval', type=int, default=0, help='If >0, run reclaim every N seconds (loop).')
+    p.add_argument('--interval', type=float, default=0, help='If >0, run reclaim every N seconds (loop).')
     p.add_argument('--reclaim-max-attempts', type=int, default=3, help='Maximum reclaim attempts before marking failed')
     p.add_argument('--status-file', type=str, default=None, help='Path to write JSON status report')
     p.add_argument('--once', action='store_true', help='Run only once')
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Schedule timer: turns due `orchestrator` schedules into queue tasks.
+
+One timer serves every recurring job. It keeps a min-heap of
+(next_run_ms, name) and sleeps until the earliest entry, so it wakes only
+when something is due (plus a periodic reload to pick up edited
+schedules). The runs are enqueued as normal tasks and executed by the worker
+pool; run it standalone or inside a worker with `agents/worker.py --schedules`.
+
+Usage:
+  python -m agents.schedule_timer run [--refresh 30]
+  python -m agents.schedule_timer add NAME --type job --payload '{"cmd": "..."}' (--every 3600 | --cron '0 3 * * *')
+                                      [--overlap skip|allow] [--missed once|all|skip] [--priority 0] [--now]
+  python -m agents.schedule_timer list [--json]
+  python -m agents.schedule_timer remove NAME
+"""
+import argparse
+import heapq
+import json
+import threading
+import time
+
+import orchestrator
+
+
+class ScheduleTimer:
+    def __init__(self, refresh_seconds: float = 30.0):
+        self.refresh_seconds = refresh_seconds
+        self._heap = []
+        self._next_reload = 0.0
+
+    def reload(self):
+        """Rebuild the heap from the schedules table."""
+        self._heap = [(s['next_run_ms'], s['name']) for s in orchestrator.list_schedules() if s['enabled']]
+        heapq.heapify(self._heap)
+        self._next_reload = time.time() + self.refresh_seconds
+
+    def tick(self) -> list:
+        """Enqueue every schedule due now; returns `run_due_schedules` results."""
+        if time.time() >= self._next_reload:
+            self.reload()
+        now_ms = orchestrator._stamp()[1]
+        due = set()
+        while self._heap and self._heap[0][0] <= now_ms:
+            due.add(heapq.heappop(self._heap)[1])
+        if not due:
+            return []
+        results = orchestrator.run_due_schedules(sorted(due))
+        for r in results:
+            heapq.heappush(self._heap, (r['next_run_ms'], r['name']))
+        return results
+
+    def delay(self) -> float:
+        """Seconds until the next due entry or reload, whichever is first."""
+        wake = self._next_reload
+        if self._heap:
+            wake = min(wake, self._heap[0][0] / 1000.0)
+        return max(0.0, wake - time.time())
+
+    def run(self, stop: threading.Event = None):
+        """Tick until `stop` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                for r in self.tick():
+                    if r['task_ids']:
+                        orchestrator.logger.info('schedule %s enqueued tasks %s', r['name'], r['task_ids'])
+                    else:
+                        orchestrator.logger.info('schedule %s skipped (%s)', r['name'], r['skipped'])
+            except Exception:
+                orchestrator.logger.exception('schedule timer tick failed')
+                self._next_reload = 0.0
+                stop.wait(1.0)
+                continue
+            stop.wait(self.delay())
+
+
+def start_thread(refresh_seconds: float = 30.0):
+    """Run a ScheduleTimer in a daemon thread; returns the stop event."""
+    orchestrator.require_queue_features('schedules')
+    stop = threading.Event()
+    t = threading.Thread(target=ScheduleTimer(refresh_seconds).run, args=(stop,), name='schedule-timer', daemon=True)
+    t.start()
+    return stop
+
+
+def cmd_add(args):
+    payload = json.loads(args.payload) if args.payload else {}
+    next_ms = orchestrator.set_schedule(args.name, args.type, payload, interval_seconds=args.every, cron=args.cron,
+                                        overlap=args.overlap, missed=args.missed, priority=args.priority,
+                                        first_run_delay_seconds=0 if args.now else None)
+    print(f'{args.name}: next run at {next_ms}')
+    return 0
+
+
+def cmd_list(args):
+    rows = orchestrator.list_schedules()
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    for r in rows:
+        when = r['cron'] or f"every {r['interval_seconds']}s"
+        state = '' if r['enabled'] else '\tdisabled'
+        print(f"{r['name']}\t{r['task_type']}\t{when}\toverlap={r['overlap']}\tmissed={r['missed']}\tnext={r['next_run_ms']}{state}")
+    return 0
+
+
+def cmd_remove(args):
+    if not orchestrator.delete_schedule(args.name):
+        print('no schedule named', args.name)
+        return 1
+    return 0
+
+
+def cmd_run(args):
+    try:
+        ScheduleTimer(args.refresh).run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='schedule-timer')
+    sub = p.add_subparsers(dest='cmd')
+
+    a = sub.add_parser('add')
+    a.add_argument('name')
+    a.add_argument('--type', required=True, help='Task type to enqueue')
+    a.add_argument('--payload', default=None, help='Task payload as JSON')
+    when = a.add_mutually_exclusive_group(required=True)
+    when.add_argument('--every', type=float, default=None, help='Interval in seconds')
+    when.add_argument('--cron', default=None, help='5-field cron expression (UTC)')
+    a.add_argument('--overlap', choices=orchestrator.SCHEDULE_OVERLAP, default='skip')
+    a.add_argument('--missed', choices=orchestrator.SCHEDULE_MISSED, default='once')
+    a.add_argument('--priority', type=int, default=0)
+    a.add_argument('--now', action='store_true', help='Make the first run due immediately')
+
+    b = sub.add_parser('list')
+    b.add_argument('--json', action='store_true')
+
+    c = sub.add_parser('remove')
+    c.add_argument('name')
+
+    d = sub.add_parser('run')
+    d.add_argument('--refresh', type=float, default=30.0, help='Seconds between schedule table reloads')
+
+    args = p.parse_args(argv)
+    if args.cmd:
+        orchestrator.require_queue_features('schedules')
+    if args.cmd == 'add':
+        return cmd_add(args)
+    if args.cmd == 'list':
+        return cmd_list(args)
+    if args.cmd == 'remove':
+        return cmd_remove(args)
+    if args.cmd == 'run':
+        return cmd_run(args)
+    p.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
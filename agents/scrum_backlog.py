@@ -8,7 +8,8 @@ Behavior:
 - Reads a JSON file containing either a single story or a list of stories.
 - Normalizes fields to a standard shape: id, title, description, priority, tags, created_at.
 - Emits `story.normalized` events to `events.ndjson` for each normalized story.
-- If `--enqueue` is provided and `orchestrator` is importable, creates an orchestrator task for follow-up work.
+- If `--enqueue` is provided and `orchestrator` is importable, creates orchestrator tasks for follow-up work
+  in one bulk insert.
 
 This is intentionally minimal; extend with validation, schema checks, and debouncing as needed.
 """
@@ -44,16 +45,20 @@ def emit_normalized(story: dict):
     return ev
 
 
-def maybe_enqueue(story: dict):
+def maybe_enqueue(stories: list) -> list:
+    """Create one `create-ticket` task per story in a single bulk insert.
+
+    Returns the task ids in story order, or Nones when the orchestrator is
+    unavailable.
+    """
     try:
         import orchestrator
     except Exception:
-        return None
+        return [None] * len(stories)
     try:
-        tid = orchestrator.enqueue_task('create-ticket', {'story': story})
-        return tid
+        return orchestrator.enqueue_tasks([('create-ticket', {'story': story}) for story in stories])
     except Exception:
-        return None
+        return [None] * len(stories)
 
 
 def cmd_import_file(args):
@@ -65,15 +70,16 @@ def cmd_import_file(args):
         data = json.load(f)
     items = data if isinstance(data, list) else [data]
     results = []
+    stories = []
     for raw in items:
         story = normalize_story(raw)
         ev = emit_normalized(story)
-        rec = {'story_id': story['id'], 'event': ev['trace_id']}
-        if args.enqueue:
-            tid = maybe_enqueue(story)
-            rec['task_id'] = tid
-        results.append(rec)
+        stories.append(story)
+        results.append({'story_id': story['id'], 'event': ev['trace_id']})
         print('normalized', story['id'])
+    if args.enqueue:
+        for rec, tid in zip(results, maybe_enqueue(stories)):
+            rec['task_id'] = tid
     return 0
 
 
@@ -7,7 +7,8 @@ Usage:
 Behavior:
 - Reads a JSON file of normalized stories (list of story dicts).
 - For each story, creates a sprint task payload and emits `sprint.task.created` events.
-- Optionally enqueues work in `orchestrator.enqueue_task('sprint-task', payload)` when `--enqueue` is set.
+- Optionally enqueues work via one `orchestrator.enqueue_tasks([('sprint-task', payload), ...])` call when
+  `--enqueue` is set.
 """
 
 import argparse
@@ -42,16 +43,16 @@ def emit_task_event(task):
     return ev
 
 
-def maybe_enqueue(task):
+def maybe_enqueue(tasks):
+    """Enqueue one `sprint-task` per task in a single bulk insert; returns ids in order."""
     try:
         import orchestrator
     except Exception:
-        return None
+        return [None] * len(tasks)
     try:
-        tid = orchestrator.enqueue_task('sprint-task', {'task': task})
-        return tid
+        return orchestrator.enqueue_tasks([('sprint-task', {'task': task}) for task in tasks])
     except Exception:
-        return None
+        return [None] * len(tasks)
 
 
 def cmd_plan_sprint(args):
@@ -62,15 +63,16 @@ def cmd_plan_sprint(args):
     with open(sf, 'r', encoding='utf-8') as f:
         stories = json.load(f)
     results = []
+    tasks = []
     for s in stories:
         task = build_task_from_story(s, args.name)
         ev = emit_task_event(task)
-        rec = {'task_id': task['task_id'], 'event': ev['trace_id']}
-        if args.enqueue:
-            tid = maybe_enqueue(task)
-            rec['orchestrator_task_id'] = tid
-        results.append(rec)
+        tasks.append(task)
+        results.append({'task_id': task['task_id'], 'event': ev['trace_id']})
         print('created task', task['task_id'])
+    if args.enqueue:
+        for rec, tid in zip(results, maybe_enqueue(tasks)):
+            rec['orchestrator_task_id'] = tid
     return 0
 
 
@@ -41,18 +41,36 @@ def emit_assignment_event(assignment: dict):
     return ev
 
 
+def _dedup_key(assignment: dict) -> str:
+    # replayed or retried assignments of the same task to the same assignee
+    # map to the same orchestrator task
+    return agent_utils.idempotency_key('task_assigner', {'task_id': assignment.get('task_id'), 'assignee': assignment.get('assignee')})
+
+
 def maybe_enqueue_orchestrator(assignment: dict):
     try:
         import orchestrator
     except Exception:
         return None
     try:
-        tid = orchestrator.enqueue_task('execute-task', {'assignment': assignment})
+        tid = orchestrator.enqueue_task('execute-task', {'assignment': assignment}, dedup_key=_dedup_key(assignment))
         return tid
     except Exception:
         return None
 
 
+def maybe_enqueue_orchestrator_many(assignments: list) -> list:
+    """Bulk variant of `maybe_enqueue_orchestrator`: one insert for all assignments."""
+    try:
+        import orchestrator
+    except Exception:
+        return [None] * len(assignments)
+    try:
+        return orchestrator.enqueue_tasks([('execute-task', {'assignment': a}, _dedup_key(a)) for a in assignments])
+    except Exception:
+        return [None] * len(assignments)
+
+
 def cmd_assign_task(args):
     assignment = build_assignment(args.task_id, args.assignee, estimate=args.estimate, note=args.note)
     ev = emit_assignment_event(assignment)
@@ -73,15 +91,16 @@ def cmd_assign_from_file(args):
     with open(p, 'r', encoding='utf-8') as f:
         data = json.load(f)
     items = data if isinstance(data, list) else [data]
+    assignments = []
     for it in items:
         task_id = it.get('task_id') or it.get('id')
-        assignee = it.get('assignee')
-        estimate = it.get('estimate')
-        note = it.get('note')
-        aargs = argparse.Namespace(task_id=task_id, assignee=assignee, estimate=estimate, note=note, enqueue=args.enqueue)
-        rc = cmd_assign_task(aargs)
-        if rc != 0:
-            return rc
+        assignment = build_assignment(task_id, it.get('assignee'), estimate=it.get('estimate'), note=it.get('note'))
+        ev = emit_assignment_event(assignment)
+        print('emitted', ev['type'], ev['trace_id'])
+        assignments.append(assignment)
+    if args.enqueue:
+        for tid in maybe_enqueue_orchestrator_many(assignments):
+            print('enqueued', tid)
     return 0
 
 
@@ -26,6 +26,10 @@ from uuid import uuid4
 from typing import List, Dict
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
+if os.path.abspath(ROOT) not in sys.path:
+    sys.path.insert(0, os.path.abspath(ROOT))
+from gaia import event_log  # noqa: E402
+
 DOC_DIR = os.path.join(ROOT, 'doc')
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
 
@@ -91,8 +95,7 @@ def append_event(event: Dict, dry_run: bool = True) -> None:
         print('DRY RUN event:', line)
         return
     # append to events.ndjson
-    with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-        f.write(line + '\n')
+    event_log.open_log(EVENTS_FILE).append(event)
 
 
 def write_audit(actor: str, action: str, details: str) -> None:
@@ -2,96 +2,389 @@
 """Simple worker CLI for GAIA orchestrator.
 
 Claims tasks from `orchestrator.queue` and invokes registered handlers.
+With `--queue-url` the queue is reached through `agents.queue_server` instead
+of opening `gaia.db`, so workers can run on other hosts.
 
-Usage: python agents/worker.py --worker-id W1 [--once] [--poll-interval 2]
+With `--async` tasks run as coroutines on one event loop instead of one
+thread each, so a single process can keep hundreds of I/O-bound jobs in
+flight (`--max-jobs 500`). Coroutine handlers are awaited, `job` commands
+use asyncio subprocesses, and plain handlers fall back to a thread.
+
+Handlers registered with `executor='process'` (CPU-heavy parsing and
+reporting) run on a persistent pool of pre-imported worker processes
+(`--processes`, default one per core), so they do not hold the GIL the
+job threads and the health server need.
+
+Usage: python agents/worker.py --worker-id W1 [--once] [--poll-interval 2] [--task-types job,noop] [--queue-url http://host:8765] [--schedules] [--async] [--processes N]
 """
 import argparse
+import asyncio
+import functools
+import importlib
+import inspect
 import os
+import sys
 import time
 import subprocess
 import json
 from typing import Callable
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
 
 import orchestrator
+from gaia import events
 
 
-# Handlers registry: task_type -> Callable[[dict], dict]
+# Handlers registry: task_type -> Callable[[dict], dict] or coroutine function
 HANDLERS = {}
+# implementations preferred under --async (e.g. a coroutine twin of a blocking handler)
+ASYNC_HANDLERS = {}
+# task types whose handlers run on the process pool (see `start_process_pool`)
+PROCESS_TYPES = set()
+_PROCESS_POOL = None
+_POOL_SIZE = None
+_POOL_LOCK = threading.Lock()
+
+
+def register_handler(task_type: str, async_mode: bool = False, executor: str = 'thread'):
+    """Register `fn` for `task_type`; it may be a plain or a coroutine function.
+
+    With `async_mode=True` the function only replaces the handler when the
+    worker runs with `--async`. `executor='process'` runs a plain,
+    module-level handler in a worker process instead of a thread; its
+    payload and result must be picklable.
+    """
+    if executor not in ('thread', 'process'):
+        raise ValueError(f'unknown executor: {executor}')
 
-
-def register_handler(task_type: str):
     def _wrap(fn: Callable[[dict], dict]):
-        HANDLERS[task_type] = fn
+        (ASYNC_HANDLERS if async_mode else HANDLERS)[task_type] = fn
+        if executor == 'process':
+            PROCESS_TYPES.add(task_type)
+        elif not async_mode:
+            PROCESS_TYPES.discard(task_type)
         return fn
     return _wrap
 
 
+def _warm_process(modules):
+    # runs once per pool process: import the handler modules up front
+    for name in modules:
+        if name not in ('__main__', '__mp_main__'):
+            importlib.import_module(name)
+
+
+def _ping(delay: float = 0.05) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+
+def start_process_pool(size: int = None):
+    """Start (once) the process pool for PROCESS_TYPES and wait until every process is up."""
+    global _PROCESS_POOL, _POOL_SIZE
+    if _PROCESS_POOL is None:
+        size = _POOL_SIZE = max(1, size or os.cpu_count() or 1)
+        modules = sorted({HANDLERS[t].__module__ for t in PROCESS_TYPES if t in HANDLERS})
+        _PROCESS_POOL = ProcessPoolExecutor(max_workers=size, initializer=_warm_process, initargs=(modules,))
+        # one overlapping ping per slot forces every process to start and import now
+        list(_PROCESS_POOL.map(_ping, [0.05] * size))
+    return _PROCESS_POOL
+
+
+def stop_process_pool():
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=True, cancel_futures=True)
+        _PROCESS_POOL = None
+
+
+def _restart_process_pool(broken):
+    """Replace `broken` with a fresh pool of the same size, unless that already happened."""
+    global _PROCESS_POOL
+    with _POOL_LOCK:
+        if _PROCESS_POOL is broken:
+            orchestrator.logger.warning('worker process pool is broken (a process died); starting a new one')
+            _PROCESS_POOL = None
+            broken.shutdown(wait=False, cancel_futures=True)
+            start_process_pool(_POOL_SIZE)
+        return _PROCESS_POOL
+
+
+def _pool_submit(task):
+    """Submit `task` to the process pool, first replacing a pool a crashed process broke.
+
+    A process that dies (segfault, os._exit, OOM kill) breaks the whole
+    executor: the tasks it was running fail through `_outcome`, and the next
+    submit lands here and rebuilds the pool instead of failing every later
+    task. If even the new pool refuses, the returned future carries the
+    error so only this task fails.
+    """
+    pool = _PROCESS_POOL
+    try:
+        return pool.submit(_execute_in_process, task)
+    except BrokenProcessPool:
+        pool = _restart_process_pool(pool)
+    try:
+        return pool.submit(_execute_in_process, task)
+    except BrokenProcessPool as e:
+        fut = Future()
+        fut.set_exception(e)
+        return fut
+
+
+def _submit(ex, task):
+    """Run `task` on the process pool when its type asks for it, else on `ex`."""
+    if task['task_type'] in PROCESS_TYPES and _PROCESS_POOL is not None:
+        return _pool_submit(task)
+    return ex.submit(_execute, task)
+
+
+def _outcome(fut, task_id) -> dict:
+    """Outcome of a finished future; pool failures (e.g. a crashed process) fail the task."""
+    try:
+        return fut.result()
+    except Exception as e:
+        return {'id': task_id, 'status': 'failed', 'reason': f'{type(e).__name__}: {e}'}
+
+
 @register_handler('job')
 def handle_job(payload: dict) -> dict:
-    """Run a shell command from payload['cmd'] and return result dict."""
+    """Run a shell command from payload['cmd'] and return result dict.
+
+    With payload['check'] a non-zero exit fails the task (and so its
+    dependents) instead of completing it with the return code;
+    payload['env'] adds environment variables for the command.
+    """
     cmd = payload.get('cmd')
     if not cmd:
         return {'error': 'no-cmd'}
+    env = {k: str(v) for k, v in (payload.get('env') or {}).items()}
+    result = _run_job(cmd, payload.get('timeout', 300), env)
+    if payload.get('check') and result.get('rc') != 0:
+        raise RuntimeError(f"job exited with {result.get('rc')}: {result.get('error') or result.get('stderr', '')[-500:]}")
+    return result
+
+
+def _run_job(cmd: str, timeout: float, env: dict = None) -> dict:
     try:
         # Prefer the standardized script runner to avoid REPL/shell confusion
         from agents.agent_utils import run_script
         # If cmd refers to an existing script file, use the runner; otherwise fall back
         # to shell execution for arbitrary commands.
         if os.path.exists(cmd.split(' ')[0]):
-            res = run_script(cmd.split(' ')[0], args=cmd.split(' ')[1:], timeout=300)
+            res = run_script(cmd.split(' ')[0], args=cmd.split(' ')[1:], timeout=timeout, env=env)
             return {'rc': res.get('rc'), 'stdout': res.get('stdout', ''), 'stderr': res.get('stderr', '')}
         else:
-            proc = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=300)
+            proc = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout,
+                                  env={**os.environ, **env} if env else None)
             return {'rc': proc.returncode, 'stdout': proc.stdout, 'stderr': proc.stderr}
     except Exception as e:
         return {'error': str(e)}
 
 
+@register_handler('job', async_mode=True)
+async def handle_job_async(payload: dict) -> dict:
+    """`handle_job` on the event loop: same payload and result shape."""
+    cmd = payload.get('cmd')
+    if not cmd:
+        return {'error': 'no-cmd'}
+    env = {k: str(v) for k, v in (payload.get('env') or {}).items()}
+    result = await _run_job_async(cmd, payload.get('timeout', 300), env)
+    if payload.get('check') and result.get('rc') != 0:
+        raise RuntimeError(f"job exited with {result.get('rc')}: {result.get('error') or result.get('stderr', '')[-500:]}")
+    return result
+
+
+async def _run_job_async(cmd: str, timeout: float, env: dict = None) -> dict:
+    env = {**os.environ, **env} if env else None
+    try:
+        if os.path.exists(cmd.split(' ')[0]):
+            # same interpreter selection as agent_utils.run_script
+            runner = Path(__file__).resolve().parent.parent / 'scripts' / 'run_script.py'
+            proc = await asyncio.create_subprocess_exec(sys.executable, str(runner), *cmd.split(' '), env=env,
+                                                        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        else:
+            proc = await asyncio.create_subprocess_shell(cmd, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return {'error': f'Command {cmd!r} timed out after {timeout} seconds'}
+        return {'rc': proc.returncode, 'stdout': out.decode('utf-8', errors='replace'), 'stderr': err.decode('utf-8', errors='replace')}
+    except Exception as e:
+        return {'error': str(e)}
+
+
 @register_handler('noop')
 def handle_noop(payload: dict) -> dict:
     return {'ok': True}
 
 
-def _process_task(task, worker_id):
+def _execute(task):
+    """Run the handler for `task` without touching the queue.
+
+    Returns an outcome dict: {'id', 'status': 'completed', 'result'} or
+    {'id', 'status': 'failed', 'reason'}; handler errors never propagate.
+    """
     task_id = task['id']
     ttype = task['task_type']
     payload = task.get('payload') or {}
     handler = HANDLERS.get(ttype)
     if not handler:
-        orchestrator.fail_task(task_id, f'no handler for {ttype}')
-        return {'id': task_id, 'status': 'failed', 'reason': 'no handler'}
+        return {'id': task_id, 'status': 'failed', 'reason': f'no handler for {ttype}'}
 
     try:
-        result = handler(payload)
-        orchestrator.complete_task(task_id, result if isinstance(result, dict) else {'result': result})
-        return {'id': task_id, 'status': 'completed'}
+        result = asyncio.run(handler(payload)) if inspect.iscoroutinefunction(handler) else handler(payload)
+        return {'id': task_id, 'status': 'completed', 'result': result if isinstance(result, dict) else {'result': result}}
     except Exception as e:
-        orchestrator.fail_task(task_id, str(e))
         return {'id': task_id, 'status': 'failed', 'reason': str(e)}
 
 
-def run_once(worker_id: str, max_jobs: int = 1):
-    # claim up to max_jobs tasks then process them concurrently
-    tasks = []
-    for _ in range(max_jobs):
-        t = orchestrator.claim_task(worker_id)
-        if not t:
-            break
-        tasks.append(t)
+def _execute_in_process(task):
+    """`_execute` on the process pool; its processes end with os._exit, which skips the atexit flush."""
+    try:
+        return _execute(task)
+    finally:
+        events.flush()
+
+
+async def _execute_async(task):
+    """`_execute` on the event loop; blocking handlers run in the default executor."""
+    task_id = task['id']
+    ttype = task['task_type']
+    payload = task.get('payload') or {}
+    handler = ASYNC_HANDLERS.get(ttype) or HANDLERS.get(ttype)
+    if not handler:
+        return {'id': task_id, 'status': 'failed', 'reason': f'no handler for {ttype}'}
+    if ttype in PROCESS_TYPES and _PROCESS_POOL is not None:
+        try:
+            return await asyncio.wrap_future(_pool_submit(task))
+        except Exception as e:
+            return {'id': task_id, 'status': 'failed', 'reason': f'{type(e).__name__}: {e}'}
+
+    try:
+        if inspect.iscoroutinefunction(handler):
+            result = await handler(payload)
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(None, handler, payload)
+        return {'id': task_id, 'status': 'completed', 'result': result if isinstance(result, dict) else {'result': result}}
+    except Exception as e:
+        return {'id': task_id, 'status': 'failed', 'reason': str(e)}
+
+
+def _finalize(outcomes, queue=orchestrator):
+    """Write a batch of outcomes back with one complete and one fail call.
+
+    `queue` is the orchestrator module or an `agents.queue_client.QueueClient`.
+    """
+    completed = [(o['id'], o['result']) for o in outcomes if o['status'] == 'completed']
+    failed = [(o['id'], o['reason']) for o in outcomes if o['status'] == 'failed']
+    if completed:
+        queue.complete_tasks(completed)
+    if failed:
+        queue.fail_tasks(failed)
+
+
+def _process_task(task, worker_id, queue=orchestrator):
+    outcome = _execute(task)
+    _finalize([outcome], queue)
+    return outcome
+
+
+def run_once(worker_id: str, max_jobs: int = 1, lease_seconds: float = None, task_types=None, queue=orchestrator):
+    # claim up to max_jobs tasks in one transaction then process them concurrently
+    tasks = queue.claim_tasks(worker_id, max_jobs, lease_seconds=lease_seconds, task_types=task_types)
 
     if not tasks:
         return 2
 
     results = []
     with ThreadPoolExecutor(max_workers=max_jobs) as ex:
-        futures = {ex.submit(_process_task, t, worker_id): t for t in tasks}
-        for fut in as_completed(futures):
-            results.append(fut.result())
+        pending = {_submit(ex, t): t['id'] for t in tasks}
+        while pending:
+            # renew the lease of whatever is still running every lease/3
+            done, _ = wait(pending, timeout=lease_seconds / 3.0 if lease_seconds else None, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results.append(_outcome(fut, pending.pop(fut)))
+            if pending and lease_seconds:
+                queue.heartbeat(worker_id, pending.values(), lease_seconds)
+
+    _finalize(results, queue)
+    return 0
+
+
+async def run_async(worker_id: str, max_jobs: int = 100, lease_seconds: float = None, task_types=None, queue=orchestrator,
+                    poll_interval: float = 2.0, run_duration: float = 0, once: bool = False) -> int:
+    """Event-loop counterpart of the worker loop in `main` (and of `run_once` with `once`).
+
+    Up to `max_jobs` tasks run concurrently as coroutines. Queue calls and
+    waiter sleeps are blocking, so they go through the default executor and
+    never stall running jobs.
+    """
+    loop = asyncio.get_running_loop()
+    # plain handlers, queue calls and the waiter share this pool
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=min(max_jobs, 64) + 4))
+
+    def call(fn, *a, **kw):
+        return loop.run_in_executor(None, functools.partial(fn, *a, **kw))
 
+    waiter = queue.TaskWaiter()
+    long_poll = getattr(queue, 'LONG_POLL', False)
+    start_time = time.time()
+    next_heartbeat = time.time() + lease_seconds / 3.0 if lease_seconds else None
+    running = {}  # asyncio task -> queue task id
+    claimed_any = False
+    try:
+        while True:
+            if run_duration and (time.time() - start_time) > run_duration:
+                break
+
+            done = [t for t in running if t.done()]
+            for t in done:
+                running.pop(t)
+            if done:
+                await call(_finalize, [t.result() for t in done], queue)
+            if once and claimed_any and not running:
+                break
+
+            if lease_seconds and time.time() >= next_heartbeat:
+                if running:
+                    await call(queue.heartbeat, worker_id, list(running.values()), lease_seconds)
+                next_heartbeat = time.time() + lease_seconds / 3.0
+
+            wait_for = poll_interval
+            if run_duration:
+                wait_for = min(wait_for, max(0.0, start_time + run_duration - time.time()))
+            if lease_seconds and running:
+                wait_for = min(wait_for, max(0.0, next_heartbeat - time.time()))
+
+            capacity = max_jobs - len(running)
+            polled = False
+            if capacity > 0 and not (once and claimed_any):
+                kw = {}
+                if long_poll and not running and not once:
+                    kw['wait'] = wait_for
+                    polled = True
+                tasks = await call(queue.claim_tasks, worker_id, capacity, lease_seconds=lease_seconds, task_types=task_types, **kw)
+                if once and not tasks and not claimed_any:
+                    return 2
+                claimed_any = claimed_any or bool(tasks)
+                for task in tasks:
+                    job = loop.create_task(_execute_async(task))
+                    job.add_done_callback(lambda _t: waiter.poke())
+                    running[job] = task['id']
+
+            if not polled and not any(t.done() for t in running):
+                await call(waiter.wait, wait_for)
+    finally:
+        # do not leave claimed tasks in_progress on exit
+        if running:
+            await call(_finalize, list(await asyncio.gather(*running)), queue)
+        waiter.close()
     return 0
 
 
@@ -124,9 +417,39 @@ def main(argv=None):
     p.add_argument('--max-jobs', type=int, default=1, help='Maximum concurrent jobs to run')
     p.add_argument('--health-port', type=int, default=0, help='Start HTTP health server on this port (0 = disabled)')
     p.add_argument('--run-duration', type=float, default=0, help='If >0, run main loop for this many seconds then exit')
+    p.add_argument('--lease', type=float, default=60.0, help='Task lease in seconds, renewed every lease/3 while running (0 = fixed-TTL reclaim)')
+    p.add_argument('--task-types', default='', help='Comma-separated task types to claim (default: all)')
+    p.add_argument('--queue-url', default=None, help='Use a remote queue server (agents.queue_server) instead of gaia.db')
+    p.add_argument('--schedules', action='store_true', help='Also run the schedule timer (agents.schedule_timer) in this process')
+    p.add_argument('--async', dest='async_mode', action='store_true', help='Run tasks as coroutines on an event loop (use a large --max-jobs)')
+    p.add_argument('--processes', type=int, default=None,
+                   help="Process pool size for executor='process' handlers (default: CPU count, 0 = run them on threads)")
     args = p.parse_args(argv)
+    if args.schedules and args.queue_url:
+        p.error('--schedules needs direct access to gaia.db; run agents.schedule_timer next to the queue server')
+    if args.schedules:
+        try:
+            orchestrator.require_queue_features('schedules')
+        except RuntimeError as e:
+            p.error(str(e))
+
+    if PROCESS_TYPES and args.processes != 0:
+        start_process_pool(args.processes)
+    try:
+        return _serve(args)
+    finally:
+        stop_process_pool()
+
+
+def _serve(args):
+    if args.queue_url:
+        from agents.queue_client import QueueClient
+        queue = QueueClient(args.queue_url)
+    else:
+        queue = orchestrator
 
     worker_id = args.worker_id
+    task_types = [t.strip() for t in args.task_types.split(',') if t.strip()] or None
     max_jobs = max(1, args.max_jobs)
     start_time = time.time()
 
@@ -135,45 +458,98 @@ def main(argv=None):
     if args.health_port and args.health_port > 0:
         def status():
             uptime = time.time() - start_time
-            pending = len(orchestrator.list_tasks('pending'))
-            inprog = len(orchestrator.list_tasks('in_progress'))
-            return {'worker_id': worker_id, 'uptime': uptime, 'pending': pending, 'in_progress': inprog}
+            counts = queue.count_tasks()
+            return {'worker_id': worker_id, 'uptime': uptime, 'pending': counts.get('pending', 0), 'in_progress': counts.get('in_progress', 0)}
 
         handler = _make_health_handler(status)
         health_server = HTTPServer(('127.0.0.1', args.health_port), handler)
         t = threading.Thread(target=health_server.serve_forever, daemon=True)
         t.start()
 
-    if args.once:
-        return run_once(worker_id, max_jobs=max_jobs)
+    if args.async_mode:
+        timer_stop = None
+        if args.schedules and not args.once:
+            from agents.schedule_timer import start_thread
+            timer_stop = start_thread()
+        try:
+            return asyncio.run(run_async(worker_id, max_jobs=max_jobs, lease_seconds=args.lease or None, task_types=task_types,
+                                         queue=queue, poll_interval=args.poll_interval, run_duration=args.run_duration,
+                                         once=args.once))
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            if timer_stop:
+                timer_stop.set()
+            if health_server:
+                health_server.shutdown()
 
+    if args.once:
+        return run_once(worker_id, max_jobs=max_jobs, lease_seconds=args.lease or None, task_types=task_types, queue=queue)
+
+    # woken by enqueue_task on this host and by our own finished jobs;
+    # --poll-interval remains the fallback for other writers. A remote queue
+    # long-polls its claims instead while the worker is idle.
+    waiter = queue.TaskWaiter()
+    timer_stop = None
+    if args.schedules:
+        from agents.schedule_timer import start_thread
+        timer_stop = start_thread()
+    long_poll = getattr(queue, 'LONG_POLL', False)
+    lease = args.lease or None
+    next_heartbeat = time.time() + lease / 3.0 if lease else None
     try:
         with ThreadPoolExecutor(max_workers=max_jobs) as ex:
-            futures = set()
-            while True:
-                # optional run-duration exit
-                if args.run_duration and (time.time() - start_time) > args.run_duration:
-                    break
-
-                # clean up finished futures
-                done = {f for f in futures if f.done()}
-                futures -= done
-
-                # if we have capacity, claim tasks
-                capacity = max_jobs - len(futures)
-                for _ in range(capacity):
-                    t = orchestrator.claim_task(worker_id)
-                    if not t:
+            futures = {}  # future -> task id
+            try:
+                while True:
+                    # optional run-duration exit
+                    if args.run_duration and (time.time() - start_time) > args.run_duration:
                         break
-                    futures.add(ex.submit(_process_task, t, worker_id))
 
-                if not futures:
-                    time.sleep(args.poll_interval)
-                else:
-                    time.sleep(0.1)
+                    # finalize finished futures in one batch
+                    done = [f for f in futures if f.done()]
+                    if done:
+                        _finalize([_outcome(f, futures.pop(f)) for f in done], queue)
+
+                    # keep leases of long-running tasks alive
+                    if lease and time.time() >= next_heartbeat:
+                        if futures:
+                            queue.heartbeat(worker_id, futures.values(), lease)
+                        next_heartbeat = time.time() + lease / 3.0
+
+                    wait_for = args.poll_interval
+                    if args.run_duration:
+                        wait_for = min(wait_for, max(0.0, start_time + args.run_duration - time.time()))
+                    if lease and futures:
+                        wait_for = min(wait_for, max(0.0, next_heartbeat - time.time()))
+
+                    # if we have capacity, refill it with a single batch claim;
+                    # an idle worker on a remote queue waits inside the claim
+                    capacity = max_jobs - len(futures)
+                    polled = False
+                    if capacity > 0:
+                        kw = {}
+                        if long_poll and not futures:
+                            kw['wait'] = wait_for
+                            polled = True
+                        for t in queue.claim_tasks(worker_id, capacity, lease_seconds=lease, task_types=task_types, **kw):
+                            fut = _submit(ex, t)
+                            fut.add_done_callback(lambda _f: waiter.poke())
+                            futures[fut] = t['id']
+
+                    if not polled and not any(f.done() for f in futures):
+                        waiter.wait(wait_for)
+            finally:
+                # do not leave claimed tasks in_progress on exit
+                if futures:
+                    wait(futures)
+                    _finalize([_outcome(f, tid) for f, tid in futures.items()], queue)
     except KeyboardInterrupt:
         pass
     finally:
+        waiter.close()
+        if timer_stop:
+            timer_stop.set()
         if health_server:
             health_server.shutdown()
 
@@ -4,6 +4,7 @@ import subprocess
 import sys
 from typing import Optional
 from . import db
+from . import event_log
 import datetime
 import tempfile
 import time
@@ -80,9 +81,7 @@ def _pid_is_running(pid: int) -> bool:
 def _append_event(evt):
     # Append an NDJSON event to the repo-level events.ndjson
     try:
-        events_file = os.path.join(ROOT, 'events.ndjson')
-        with open(events_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, default=str) + '\n')
+        event_log.open_log(os.path.join(ROOT, 'events.ndjson')).append(evt)
     except Exception:
         pass
 
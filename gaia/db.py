@@ -6,6 +6,7 @@ import os
 import sqlite3
 import threading
 import datetime
+import time
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DB_PATH = os.path.join(ROOT, 'gaia.db')
@@ -18,6 +19,10 @@ def _conn():
     return c
 
 
+# ISO-8601 text -> epoch milliseconds, matching orchestrator's epoch columns
+_EPOCH_MS_SQL = 'CAST(ROUND((julianday({col}) - 2440587.5) * 86400000) AS INTEGER)'
+
+
 def _init():
     with _lock:
         conn = _conn()
@@ -32,6 +37,16 @@ def _init():
             details TEXT
         )
         ''')
+        # integer epoch-ms twin of `timestamp` plus an index for per-action
+        # time-range queries; the trigger fills it for rows written elsewhere
+        cur.execute('PRAGMA table_info(traces)')
+        if 'timestamp_ms' not in {r[1] for r in cur.fetchall()}:
+            cur.execute('ALTER TABLE traces ADD COLUMN timestamp_ms INTEGER')
+            cur.execute('UPDATE traces SET timestamp_ms = ' + _EPOCH_MS_SQL.format(col='timestamp'))
+        cur.execute('CREATE TRIGGER IF NOT EXISTS trg_traces_timestamp_ms_ins AFTER INSERT ON traces '
+                    'WHEN NEW.timestamp_ms IS NULL BEGIN UPDATE traces SET timestamp_ms = '
+                    + _EPOCH_MS_SQL.format(col='NEW.timestamp') + ' WHERE rowid = NEW.rowid; END')
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_traces_action_ts ON traces (action, timestamp_ms)')
         conn.commit()
         conn.close()
 
@@ -40,12 +55,13 @@ _init()
 
 
 def write_trace(action, agent_id=None, status=None, details=None):
-    ts = datetime.datetime.utcnow().isoformat() + 'Z'
+    now = time.time()
+    ts = datetime.datetime.utcfromtimestamp(now).isoformat() + 'Z'
     with _lock:
         conn = _conn()
         cur = conn.cursor()
-        cur.execute('INSERT INTO traces (timestamp, action, agent_id, status, details) VALUES (?, ?, ?, ?, ?)',
-                    (ts, action, agent_id, status, json.dumps(details, default=str)))
+        cur.execute('INSERT INTO traces (timestamp, timestamp_ms, action, agent_id, status, details) VALUES (?, ?, ?, ?, ?, ?)',
+                    (ts, int(now * 1000), action, agent_id, status, json.dumps(details, default=str)))
         conn.commit()
         conn.close()
         return cur.lastrowid
@@ -0,0 +1,359 @@
+"""Segmented, indexed NDJSON event log.
+
+`events.ndjson` stays the live file every existing tailer reads; once it
+passes SEGMENT_MAX_BYTES or SEGMENT_MAX_AGE_S it is sealed into a numbered
+segment and a fresh live file starts. For a log at `events.ndjson`:
+
+  events.ndjson                      live segment
+  events.ndjson.idx                  its sparse index
+  events.ndjson.d/00000001.ndjson    sealed segments, oldest first
+  events.ndjson.d/00000001.idx       ... and their indexes
+  events.ndjson.lock                 cross-process append/roll lock
+
+Index lines are NDJSON `{"o": byte offset, "t": append time (epoch ms),
+"e": event type}`. A writer adds one for the first event it appends in each
+INDEX_BLOCK of the file, whenever a second has passed since its previous
+entry, and for the first event of each type within a block. Readers use
+them to seek to a time or to the blocks holding a type, and `read_range` /
+`tail` only open the segments they need. Event times are append times at
+index resolution (about a second).
+
+Writers append whole lines with one `write` under an exclusive file lock,
+so concurrent processes never interleave or split lines.
+"""
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+from .tail import reverse_lines
+
+SEGMENT_MAX_BYTES = int(os.environ.get('GAIA_EVENTS_SEGMENT_BYTES', str(16 * 1024 * 1024)))
+SEGMENT_MAX_AGE_S = float(os.environ.get('GAIA_EVENTS_SEGMENT_AGE_S', '86400'))
+INDEX_BLOCK = 64 * 1024
+INDEX_TIME_STEP_MS = 1000
+_READ_BLOCK = 64 * 1024
+EVENTS_NAME = 'events.ndjson'
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def event_type(evt) -> str:
+    if not isinstance(evt, dict):
+        return ''
+    return str(evt.get('type') or evt.get('event') or '')
+
+
+def is_events_file(path) -> bool:
+    """True for the shared `events.ndjson` log; other NDJSON files stay single plain files."""
+    return os.path.basename(str(path)) == EVENTS_NAME
+
+
+def encode(evt) -> bytes:
+    return (json.dumps(evt, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+def _decode(line: bytes):
+    text = line.decode('utf-8', errors='replace').strip()
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return {'raw': text}
+
+
+def _read_index(idx_path: str) -> list:
+    """[(offset, t_ms, type)] sorted by offset; missing/torn lines are skipped."""
+    entries = []
+    try:
+        with open(idx_path, 'rb') as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                    entries.append((int(e['o']), int(e['t']), e.get('e') or ''))
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        return []
+    entries.sort()
+    return entries
+
+
+def _first_index_ms(idx_path: str):
+    try:
+        with open(idx_path, 'rb') as f:
+            return int(json.loads(f.readline())['t'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class _FileLock:
+    """Exclusive advisory lock on a sidecar file (flock, or msvcrt on Windows)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    def __enter__(self):
+        if self._fd is None or self._pid != os.getpid():
+            # a descriptor inherited across fork would share the parent's flock
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+
+class EventLog:
+    def __init__(self, path: str, segment_bytes: int = None, segment_age_s: float = None):
+        self.path = os.path.abspath(path)
+        self.index_path = self.path + '.idx'
+        self.segment_dir = self.path + '.d'
+        self.segment_bytes = segment_bytes or SEGMENT_MAX_BYTES
+        self.segment_age_s = SEGMENT_MAX_AGE_S if segment_age_s is None else segment_age_s
+        self._mutex = threading.Lock()
+        self._flock = _FileLock(self.path + '.lock')
+        self._fd = None
+        self._fd_key = None  # (pid, inode) of the open live file
+        self._block = None  # (inode, block number, types seen, last index ms)
+        self._first_ms = None  # (inode, first index ms) of the live file
+
+    # -- writing ----------------------------------------------------------
+
+    def append(self, evt: dict):
+        self.append_many([evt])
+
+    def append_many(self, events):
+        """Append `events` with a single write (lines stay contiguous)."""
+        self.append_encoded([(encode(e), event_type(e)) for e in events])
+
+    def append_encoded(self, items):
+        """Append pre-encoded `(line_bytes, event_type)` pairs in one write."""
+        if not items:
+            return
+        data = b''.join(line for line, _ in items)
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._mutex, self._flock:
+            fd, ino = self._live_fd()
+            offset = os.lseek(fd, 0, os.SEEK_END)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            now_ms = _now_ms()
+            self._index(ino, offset, items, now_ms)
+            if offset + len(data) >= self.segment_bytes or self._too_old(ino, now_ms):
+                self._roll()
+
+    def _live_fd(self):
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fd is not None and self._fd_key == (os.getpid(), ino) and os.fstat(self._fd).st_nlink:
+            # same live file, not deleted and recreated under a recycled inode
+            return self._fd, ino
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        st = os.fstat(self._fd)
+        ino = st.st_ino
+        if not st.st_size and os.path.exists(self.index_path):
+            # the live file was removed or truncated behind our back; its index is stale
+            os.remove(self.index_path)
+        self._fd_key = (os.getpid(), ino)
+        return self._fd, ino
+
+    def _index(self, ino, offset, items, now_ms):
+        entries = []
+        for line, etype in items:
+            block = offset // INDEX_BLOCK
+            if self._block is None or self._block[:2] != (ino, block):
+                self._block = (ino, block, set(), None)
+            _, _, seen, last_ms = self._block
+            if last_ms is None or now_ms - last_ms >= INDEX_TIME_STEP_MS or etype not in seen:
+                entries.append(json.dumps({'o': offset, 't': now_ms, 'e': etype}, ensure_ascii=False))
+                seen.add(etype)
+                self._block = (ino, block, seen, now_ms)
+            offset += len(line)
+        if entries:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(entries) + '\n')
+
+    def _too_old(self, ino, now_ms) -> bool:
+        if not self.segment_age_s:
+            return False
+        if self._first_ms is None or self._first_ms[0] != ino:
+            self._first_ms = (ino, _first_index_ms(self.index_path))
+        first = self._first_ms[1]
+        return first is not None and now_ms - first >= self.segment_age_s * 1000
+
+    def _roll(self):
+        """Seal the live file as the next numbered segment (caller holds the lock)."""
+        os.makedirs(self.segment_dir, exist_ok=True)
+        base = os.path.join(self.segment_dir, '%08d' % (self._last_seq() + 1))
+        try:
+            if os.path.exists(self.index_path):
+                os.replace(self.index_path, base + '.idx')
+            os.replace(self.path, base + '.ndjson')
+        except OSError:
+            # e.g. Windows refuses to rename a file another process holds open;
+            # keep appending and retry on a later write
+            return
+        os.close(self._fd)
+        self._fd = self._fd_key = self._block = self._first_ms = None
+
+    def _last_seq(self) -> int:
+        try:
+            names = os.listdir(self.segment_dir)
+        except FileNotFoundError:
+            return 0
+        seqs = [int(n[:-7]) for n in names if n.endswith('.ndjson') and n[:-7].isdigit()]
+        return max(seqs, default=0)
+
+    def close(self):
+        with self._mutex:
+            if self._fd is not None and self._fd_key and self._fd_key[0] == os.getpid():
+                os.close(self._fd)
+            self._fd = self._fd_key = None
+
+    # -- reading ----------------------------------------------------------
+
+    def segments(self) -> list:
+        """[(data_path, index_path)] oldest first, the live file last."""
+        out = []
+        try:
+            names = sorted(n for n in os.listdir(self.segment_dir) if n.endswith('.ndjson') and n[:-7].isdigit())
+        except FileNotFoundError:
+            names = []
+        for n in names:
+            base = os.path.join(self.segment_dir, n[:-7])
+            out.append((base + '.ndjson', base + '.idx'))
+        out.append((self.path, self.index_path))
+        return out
+
+    def tail(self, n: int, types=None) -> list:
+        """The last `n` events (optionally only `types`), oldest first.
+
+        Reads backwards from the end of the newest segment and stops as soon
+        as `n` events were found.
+        """
+        types = set(types) if types else None
+        out = []
+        if n <= 0:
+            return out
+        for data_path, _ in reversed(self.segments()):
+            for line in reverse_lines(data_path, _READ_BLOCK, partial=False):
+                evt = _decode(line)
+                if evt is None or (types and event_type(evt) not in types):
+                    continue
+                out.append(evt)
+                if len(out) >= n:
+                    return out[::-1]
+        return out[::-1]
+
+    def read_range(self, start_ms: int = None, end_ms: int = None, types=None):
+        """Yield events appended between `start_ms` and `end_ms` (epoch ms, inclusive), oldest first.
+
+        Segments entirely outside the range are never opened; inside a
+        segment the index gives the starting offset, and with `types` only
+        the blocks known to hold those types are read.
+        """
+        types = set(types) if types else None
+        segs = self.segments()
+        starts = [_first_index_ms(idx) for _, idx in segs]
+        for i, (data_path, idx_path) in enumerate(segs):
+            nxt = next((s for s in starts[i + 1:] if s is not None), None)
+            if start_ms is not None and nxt is not None and nxt < start_ms:
+                continue
+            if end_ms is not None and starts[i] is not None and starts[i] > end_ms:
+                break
+            for t_ms, evt in self._scan(data_path, _read_index(idx_path), start_ms, types):
+                if end_ms is not None and t_ms > end_ms:
+                    return
+                if start_ms is None or t_ms >= start_ms:
+                    yield evt
+
+    def _scan(self, data_path, entries, start_ms, types):
+        """Yield (append ms, event) from one segment, skipping what the index rules out."""
+        offset = 0
+        if start_ms is not None:
+            # events before a checkpoint older than start_ms are older too
+            offset = max((o for o, t, _ in entries if t < start_ms), default=0)
+        if types:
+            blocks = sorted({o // INDEX_BLOCK for o, _, e in entries if e in types and o >= offset - INDEX_BLOCK})
+            ranges = []
+            for b in blocks:
+                first = min(o for o, _, e in entries if o // INDEX_BLOCK == b and e in types)
+                ranges.append((max(first, offset), (b + 1) * INDEX_BLOCK))
+        else:
+            ranges = [(offset, None)]
+        try:
+            f = open(data_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            k, t_ms = 0, None
+            for lo, hi in ranges:
+                f.seek(lo)
+                pos = lo
+                while hi is None or pos < hi:
+                    line = f.readline()
+                    if not line:
+                        break
+                    if not line.endswith(b'\n'):
+                        break  # a writer is mid-append
+                    while k < len(entries) and entries[k][0] <= pos:
+                        t_ms = entries[k][1]
+                        k += 1
+                    pos += len(line)
+                    evt = _decode(line)
+                    if evt is None or (types and event_type(evt) not in types):
+                        continue
+                    yield (t_ms if t_ms is not None else 0), evt
+
+
+_LOGS = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def open_log(path: str) -> EventLog:
+    """The shared EventLog for `path` (one per process, so appends share the lock and descriptor)."""
+    key = os.path.abspath(path)
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None:
+            log = _LOGS[key] = EventLog(key)
+        return log
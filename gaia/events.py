@@ -1,11 +1,44 @@
-"""Event helper to append NDJSON events to `events.ndjson`."""
+"""Event helper to append NDJSON events to `events.ndjson`.
+
+Writes go through `gaia.event_log`, which rolls the file into indexed
+segments; read recent events with `event_log.open_log(EVENTS_FILE).tail(n)`.
+`append_event` only queues: a background thread group-commits the queue a
+few milliseconds later, and `flush()` (also run at exit and before fork)
+writes it now.
+
+Durability window: a queued event is only in memory until its batch is
+written, at most GAIA_EVENTS_FLUSH_MS (5 ms by default) after it was
+queued. Anything still queued is lost if the process ends without running
+atexit handlers: SIGKILL, a crash, `os._exit`, or a forked child (e.g. a
+multiprocessing worker) that exits through `os._exit`. Code that forks
+workers should `flush()` before the child exits; `agents.worker` does this
+after every process-pool task. Events whose type starts with one of the
+GAIA_EVENTS_SYNC prefixes (default `approval.,audit.`; `1` means every
+event, empty means none) are written before `append_event` returns, and
+`append_event(evt, sync=True)` does the same for one event.
+"""
+import atexit
 import json
 import os
 import datetime
-from pathlib import Path
+import itertools
+import threading
+import time
+
+from . import event_log
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
+SHORT_LOG = os.path.join(ROOT, '.tmp', 'last_messages.log')
+
+# group commit: queued events are written once this many are waiting or
+# FLUSH_DELAY_S after the first of a batch, whichever comes first
+FLUSH_DELAY_S = float(os.environ.get('GAIA_EVENTS_FLUSH_MS', '5')) / 1000.0
+FLUSH_MAX_EVENTS = int(os.environ.get('GAIA_EVENTS_FLUSH_MAX', '512'))
+# event types written synchronously (see the module docstring)
+_SYNC = os.environ.get('GAIA_EVENTS_SYNC', 'approval.,audit.').strip()
+SYNC_ALL = _SYNC.lower() in ('1', 'true', 'yes', 'all')
+SYNC_PREFIXES = () if SYNC_ALL else tuple(p.strip() for p in _SYNC.split(',') if p.strip() and p.strip() != '0')
 
 
 def now():
@@ -13,38 +46,134 @@ def now():
     return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 
-def append_event(evt: dict):
+def _short_line(evt: dict, encoded: bytes) -> bytes:
+    """One-line `[ts] type: payload` summary for last_messages.log."""
+    payload = evt.get('payload') or evt
+    if payload is evt:
+        # the event itself is the preview; reuse its encoding
+        preview = encoded.decode('utf-8').rstrip('\n')
+    else:
+        try:
+            preview = json.dumps(payload, ensure_ascii=False, default=str)
+        except Exception:
+            preview = str(payload)
+    # single-line, truncated
+    preview = preview.replace('\n', ' ')[:200]
+    return f"[{evt.get('timestamp')}] {evt.get('type', 'event')}: {preview}\n".encode('utf-8')
+
+
+class _BatchWriter:
+    """Queues encoded events and writes them in batches from a daemon thread.
+
+    Each batch is one `write` to the event log (under its file lock) and one
+    O_APPEND `write` to the short log, so lines from concurrent processes
+    never interleave. With no `path` / `short_log` each event goes to the
+    module's EVENTS_FILE / SHORT_LOG as they are when it is queued, so
+    reassigning them (tests do) still redirects later events.
+    """
+
+    def __init__(self, path: str = None, short_log: str = None, delay_s: float = FLUSH_DELAY_S,
+                 max_events: int = FLUSH_MAX_EVENTS):
+        self.path = path
+        self.short_log = short_log
+        self.delay_s = delay_s
+        self.max_events = max_events
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # keeps batches in queue order
+        self._pending = []
+        self._thread = None
+
+    def put(self, evt: dict):
+        line = event_log.encode(evt)
+        item = (str(self.path or EVENTS_FILE), str(self.short_log or SHORT_LOG), line, event_log.event_type(evt),
+                _short_line(evt, line))
+        with self._cond:
+            self._pending.append(item)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='gaia-events-writer', daemon=True)
+                self._thread.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.max_events:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.delay_s
+                while len(self._pending) < self.max_events:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cond.wait(left)
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of events written."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            # one write per run of events bound for the same file, in queue order
+            for path, items in itertools.groupby(batch, key=lambda item: item[0]):
+                try:
+                    event_log.open_log(path).append_encoded([(line, etype) for _, _, line, etype, _ in items])
+                except Exception:
+                    # best-effort; do not raise
+                    pass
+            for short_log, items in itertools.groupby(batch, key=lambda item: item[1]):
+                try:
+                    os.makedirs(os.path.dirname(short_log), exist_ok=True)
+                    fd = os.open(short_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+                    try:
+                        os.write(fd, b''.join(item[4] for item in items))
+                    finally:
+                        os.close(fd)
+                except Exception:
+                    pass
+            return len(batch)
+
+    def _after_fork(self):
+        # the parent still owns (and flushes) whatever was queued before fork
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._thread = None
+
+
+_writer = _BatchWriter()
+atexit.register(_writer.flush)
+if hasattr(os, 'register_at_fork'):
+    # nothing queued crosses the fork, so a child exiting via os._exit loses only its own events
+    os.register_at_fork(before=_writer.flush, after_in_child=_writer._after_fork)
+
+
+def _is_sync(evt: dict) -> bool:
+    if SYNC_ALL:
+        return True
+    return bool(SYNC_PREFIXES) and event_log.event_type(evt).startswith(SYNC_PREFIXES)
+
+
+def append_event(evt: dict, sync: bool = None):
+    """Queue `evt` for the next batch; with `sync` (or a GAIA_EVENTS_SYNC type) write it before returning."""
     if 'timestamp' not in evt:
         evt['timestamp'] = now()
     try:
-        with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, default=str) + '\n')
+        _writer.put(evt)
+        if sync or (sync is None and _is_sync(evt)):
+            _writer.flush()
     except Exception:
         # best-effort; do not raise
         pass
 
-    # Also write a concise one-line summary to .tmp/last_messages.log
-    try:
-        tmpdir = Path(os.path.join(ROOT, '.tmp'))
-        tmpdir.mkdir(parents=True, exist_ok=True)
-        short_log = tmpdir / 'last_messages.log'
-        t = evt.get('timestamp')
-        etype = evt.get('type', 'event')
-        payload = evt.get('payload') or evt
-        try:
-            payload_preview = json.dumps(payload, ensure_ascii=False, default=str)
-        except Exception:
-            payload_preview = str(payload)
-        # single-line, truncated
-        payload_preview = payload_preview.replace('\n', ' ')[:200]
-        line = f"[{t}] {etype}: {payload_preview}\n"
-        with open(short_log, 'a', encoding='utf-8') as s:
-            s.write(line)
-    except Exception:
-        pass
+
+def flush() -> int:
+    """Write queued events to disk (shutdown, tests, before reading back)."""
+    return _writer.flush()
 
 
-def make_event(event_type: str, payload: dict):
+def make_event(event_type: str, payload: dict, sync: bool = None):
     evt = {'type': event_type, 'payload': payload, 'timestamp': now()}
-    append_event(evt)
+    append_event(evt, sync=sync)
     return evt
@@ -0,0 +1,270 @@
+"""Block until watched files change.
+
+On Linux this uses inotify through ctypes (no extra dependency): a watch is
+placed on each file's *directory*, so creates, atomic `os.replace` writes,
+renames, deletes and log rolls are all seen, and `wait()` sleeps in the
+kernel until one arrives -- no wakeups while nothing changes. For single
+files the directory watch only takes name events and writes come from a
+watch on the file itself, so appends to siblings (an event log's `.idx`
+and `.lock`, other logs) never wake the waiter; `watch_dir` patterns take
+every event in their directory and filter by name. Elsewhere,
+or with GAIA_FILEWATCH=poll, it stats the watched paths with an adaptive
+interval: POLL_MIN_S right after a change, doubling while idle up to
+POLL_MAX_S.
+
+  w = Watcher()
+  w.watch('.tmp/approval.json')          # one file (need not exist yet)
+  w.watch_dir('.tmp', '*.out')           # files matching a pattern
+  changed = w.wait(timeout=30)           # set of paths, empty on timeout
+
+A directory that does not exist yet is retried on every wait (which then
+wakes at least every POLL_MAX_S until it appears).
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import time
+
+POLL_MIN_S = float(os.environ.get('GAIA_FILEWATCH_POLL_MIN_SECONDS', '0.05'))
+POLL_MAX_S = float(os.environ.get('GAIA_FILEWATCH_POLL_MAX_SECONDS', '2'))
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_NAME_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_FILE_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+_DIR_MASK = _NAME_MASK | _FILE_MASK
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _load_libc():
+    if not hasattr(os, 'uname') or os.uname().sysname != 'Linux':
+        return None
+    if os.environ.get('GAIA_FILEWATCH', '').lower() == 'poll':
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+class Watcher:
+    def __init__(self, paths=()):
+        self._patterns = {}  # directory -> {name or glob pattern: is a literal name}
+        self._wds = {}  # inotify wd -> directory
+        self._dir_wd = {}  # directory -> wd
+        self._file_wds = {}  # inotify wd -> watched file (literal names only)
+        self._path_wd = {}  # watched file -> wd
+        self._missing = set()  # directories to add once they exist
+        self._fd = -1
+        self._snap = {}  # polling: directory -> {name: stat key}
+        self._interval = POLL_MIN_S
+        if _libc is not None:
+            fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+                self._poller = select.poll()
+                self._poller.register(fd, select.POLLIN)
+        for p in paths:
+            self.watch(p)
+
+    @property
+    def native(self) -> bool:
+        """True when changes come from inotify rather than polling."""
+        return self._fd >= 0
+
+    def watch(self, path: str):
+        """Report `path` whenever it is created, written, replaced or removed."""
+        path = os.path.abspath(path)
+        d, name = os.path.split(path)
+        self._add(d, name, literal=True)
+
+    def watch_dir(self, directory: str, pattern: str = '*'):
+        """Report each file in `directory` matching `pattern` that changes."""
+        self._add(os.path.abspath(directory), pattern)
+
+    def _add(self, d, pattern, literal=False):
+        self._patterns.setdefault(d, {})[pattern] = literal
+        if d in self._dir_wd:
+            if self._fd < 0:
+                self._snap[d] = self._scan(d)
+            else:
+                self._add_dir(d)  # a pattern widens the mask; a name gets its file watch
+            return
+        if d in self._missing:
+            return
+        if not self._add_dir(d):
+            self._missing.add(d)
+
+    def _add_dir(self, d) -> bool:
+        if not os.path.isdir(d):
+            return False
+        if self._fd >= 0:
+            patterns = self._patterns.get(d, {})
+            mask = _NAME_MASK if all(patterns.values()) else _DIR_MASK
+            wd = _libc.inotify_add_watch(self._fd, os.fsencode(d), mask)
+            if wd < 0:
+                return False
+            self._wds[wd] = d
+            self._dir_wd[d] = wd
+            for name, literal in patterns.items():
+                if literal:
+                    self._watch_file(os.path.join(d, name))
+        else:
+            self._dir_wd[d] = None
+            self._snap[d] = self._scan(d)
+        return True
+
+    def _watch_file(self, path):
+        # (re)point the content watch at whatever inode `path` names now
+        wd = _libc.inotify_add_watch(self._fd, os.fsencode(path), _FILE_MASK)
+        if wd < 0:
+            return  # not there (yet); its creation arrives as a name event
+        old = self._path_wd.get(path)
+        if old is not None and old != wd:
+            self._file_wds.pop(old, None)
+            _libc.inotify_rm_watch(self._fd, old)
+        self._file_wds[wd] = path
+        self._path_wd[path] = wd
+
+    def _matches(self, d, name) -> bool:
+        for pattern, literal in self._patterns.get(d, {}).items():
+            if (name == pattern) if literal else fnmatch.fnmatch(name, pattern):
+                return True
+        return False
+
+    def _scan(self, d) -> dict:
+        snap = {}
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if self._matches(d, e.name):
+                        try:
+                            st = e.stat()
+                        except OSError:
+                            continue
+                        snap[e.name] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            pass
+        return snap
+
+    def _retry_missing(self) -> set:
+        changed = set()
+        for d in list(self._missing):
+            if self._add_dir(d):
+                self._missing.discard(d)
+                # everything already in a newly appeared directory counts as changed
+                changed.update(os.path.join(d, n) for n in self._scan(d))
+        return changed
+
+    def wait(self, timeout: float = None) -> set:
+        """Block until something watched changes or `timeout` passes; returns the changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._retry_missing()
+            if changed:
+                return changed
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._missing:
+                left = POLL_MAX_S if left is None else min(left, POLL_MAX_S)
+            changed = self._wait_native(left) if self._fd >= 0 else self._wait_poll(left)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def _wait_native(self, timeout) -> set:
+        if not self._poller.poll(None if timeout is None else timeout * 1000):
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].split(b'\0', 1)[0]
+                pos += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost: report everything that currently matches
+                    for d in list(self._dir_wd):
+                        changed.update(os.path.join(d, n) for n in self._scan(d))
+                        self._add_dir(d)
+                    continue
+                d = self._wds.get(wd)
+                if d is None:
+                    path = self._file_wds.get(wd)
+                    if path is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        # the file's inode is gone; a new one comes with a name event
+                        self._file_wds.pop(wd, None)
+                        if self._path_wd.get(path) == wd:
+                            del self._path_wd[path]
+                    elif mask & _FILE_MASK:
+                        changed.add(path)
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # the directory itself went away; pick it up again if it comes back
+                    if mask & IN_IGNORED:
+                        self._wds.pop(wd, None)
+                        self._dir_wd.pop(d, None)
+                        self._missing.add(d)
+                    continue
+                n = os.fsdecode(name)
+                if n and self._matches(d, n):
+                    changed.add(os.path.join(d, n))
+                    if mask & (IN_CREATE | IN_MOVED_TO) and self._patterns[d].get(n):
+                        self._watch_file(os.path.join(d, n))
+        return changed
+
+    def _wait_poll(self, timeout) -> set:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for d in list(self._dir_wd):
+                snap = self._scan(d)
+                old = self._snap.get(d, {})
+                changed.update(os.path.join(d, n) for n in set(snap) | set(old) if snap.get(n) != old.get(n))
+                self._snap[d] = snap
+            if changed:
+                self._interval = POLL_MIN_S
+                return changed
+            left = None if deadline is None else deadline - time.monotonic()
+            if left is not None and left <= 0:
+                return changed
+            step = self._interval if left is None else min(self._interval, left)
+            time.sleep(step)
+            self._interval = min(self._interval * 2, POLL_MAX_S)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
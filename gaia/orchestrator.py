@@ -9,7 +9,7 @@ Behavior:
 - If `auto_approve` is False, records `approval_required` and exits with code 2.
 - If `auto_approve` is True, proceeds to apply, records `apply_complete` or `apply_failed`.
 """
-from . import installer, db, events, alerts
+from . import installer, db, events, alerts, filewatch
 import os
 import datetime
 import time
@@ -47,24 +47,26 @@ def run_sequence(venv_path='.venv', requirements='requirements.txt', allow_syste
         except Exception:
             pass
 
-        # wait for approval file written by approval_listener_runner
+        # wait for approval file written by approval_listener_runner; the
+        # watcher wakes as soon as it is created or written
         wait_until = time.time() + 30 * 60
-        while time.time() < wait_until:
-            try:
-                if os.path.exists(approval_file):
-                    with open(approval_file, 'r', encoding='utf-8') as f:
-                        apr = f.read().strip()
-                    if apr:
-                        db.write_trace(action='orchestrator.approval_observed', status='ok', details={'file': approval_file})
-                        events.append_event({'type': 'orchestrator.approval_observed', 'payload': {'file': approval_file}, 'timestamp': _ts()})
-                        break
-            except Exception:
-                pass
-            time.sleep(5)
-        else:
-            db.write_trace(action='orchestrator.approval_timeout', status='timeout')
-            events.append_event({'type': 'orchestrator.approval_timeout', 'payload': {}, 'timestamp': _ts()})
-            return 2
+        with filewatch.Watcher([approval_file]) as watcher:
+            while time.time() < wait_until:
+                try:
+                    if os.path.exists(approval_file):
+                        with open(approval_file, 'r', encoding='utf-8') as f:
+                            apr = f.read().strip()
+                        if apr:
+                            db.write_trace(action='orchestrator.approval_observed', status='ok', details={'file': approval_file})
+                            events.append_event({'type': 'orchestrator.approval_observed', 'payload': {'file': approval_file}, 'timestamp': _ts()})
+                            break
+                except Exception:
+                    pass
+                watcher.wait(max(0.0, wait_until - time.time()))
+            else:
+                db.write_trace(action='orchestrator.approval_timeout', status='timeout')
+                events.append_event({'type': 'orchestrator.approval_timeout', 'payload': {}, 'timestamp': _ts()})
+                return 2
 
     # 3) Apply
     db.write_trace(action='orchestrator.apply.start', status='running')
@@ -0,0 +1,151 @@
+"""In-process publish/subscribe bus for server-sent events.
+
+One producer per source (a file watcher, the agent poller) turns each
+change into an SSE frame once and publishes it to a topic; every subscriber
+of that topic gets the same frame through its own bounded queue, so adding
+clients adds no parsing or polling. A subscriber whose queue is full is
+dropped rather than allowed to back up the bus; its stream ends and the
+browser's EventSource reconnects.
+
+Producers are registered per topic and started on the first subscribe.
+Each is called as `producer(stop)` and must return soon after the
+`threading.Event` `stop` is set, which happens when the topic's last
+subscriber leaves; the next subscribe starts it again. One that returns or
+raises on its own is logged and started again after PRODUCER_RESTART_S.
+Frames published with a `key` are retained (latest per
+key) and replayed to new subscribers, which gives late joiners the current
+state; the replay keeps the most recently updated keys when there are more
+than fit in a subscriber's queue.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+
+QUEUE_SIZE = int(os.environ.get('GAIA_SSE_QUEUE_SIZE', '256'))
+HEARTBEAT_S = float(os.environ.get('GAIA_SSE_HEARTBEAT_SECONDS', '15'))
+PRODUCER_RESTART_S = float(os.environ.get('GAIA_SSE_PRODUCER_RESTART_SECONDS', '1'))
+
+logger = logging.getLogger(__name__)
+
+
+def frame(event: str = None, data=None) -> str:
+    """One SSE message; `data` is sent as-is if it is a str, JSON otherwise."""
+    if not isinstance(data, str):
+        data = json.dumps(data, ensure_ascii=False)
+    head = f'event: {event}\n' if event else ''
+    return f'{head}data: {data}\n\n'
+
+
+class Subscription:
+    def __init__(self, bus, topic: str, maxsize: int):
+        self.bus = bus
+        self.topic = topic
+        self.queue = queue.Queue(maxsize)
+        self.dropped = False
+
+    def get(self, timeout: float = None):
+        """The next frame, or None on timeout or once dropped."""
+        if self.dropped:
+            return None
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class Bus:
+    def __init__(self, queue_size: int = QUEUE_SIZE, restart_delay: float = PRODUCER_RESTART_S):
+        self.queue_size = queue_size
+        self.restart_delay = restart_delay
+        self._lock = threading.Lock()
+        self._subs = {}  # topic -> set of Subscription
+        self._retained = {}  # topic -> {key: frame}, least recently updated first
+        self._producers = {}  # topic -> callable run in a daemon thread
+        self._stops = {}  # topic -> stop event of its running producer thread
+
+    def register(self, topic: str, producer):
+        """Run `producer(stop)` in a daemon thread while `topic` has subscribers."""
+        with self._lock:
+            self._producers[topic] = producer
+
+    def subscribe(self, topic: str, maxsize: int = None) -> Subscription:
+        sub = Subscription(self, topic, maxsize or self.queue_size)
+        with self._lock:
+            retained = list(self._retained.get(topic, {}).values())
+            # never more than the queue holds: the newest state wins
+            for f in retained[max(0, len(retained) - sub.queue.maxsize):]:
+                sub.queue.put_nowait(f)
+            self._subs.setdefault(topic, set()).add(sub)
+            producer = self._producers.get(topic)
+            stop = None
+            if producer is not None and topic not in self._stops:
+                stop = self._stops[topic] = threading.Event()
+        if stop is not None:
+            threading.Thread(target=self._run_producer, args=(topic, producer, stop), name=f'sse-{topic}', daemon=True).start()
+        return sub
+
+    def _run_producer(self, topic: str, producer, stop):
+        """Keep `producer` running until `stop` is set with nobody subscribed."""
+        while True:
+            if not stop.is_set():
+                try:
+                    producer(stop)
+                    if not stop.is_set():
+                        logger.warning('sse producer for %r returned; restarting', topic)
+                except Exception:
+                    logger.exception('sse producer for %r failed; restarting', topic)
+                stop.wait(self.restart_delay)
+            with self._lock:
+                if not self._subs.get(topic):
+                    # nobody is listening: the next subscribe starts a new thread
+                    del self._stops[topic]
+                    return
+                # subscribed again while it was stopping: keep going
+                stop.clear()
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.topic, set())
+            subs.discard(sub)
+            if not subs and sub.topic in self._stops:
+                self._stops[sub.topic].set()
+
+    def subscribers(self, topic: str) -> int:
+        with self._lock:
+            return len(self._subs.get(topic, ()))
+
+    def publish(self, topic: str, f: str, key=None) -> int:
+        """Queue frame `f` for every subscriber of `topic`; returns how many got it."""
+        with self._lock:
+            if key is not None:
+                retained = self._retained.setdefault(topic, {})
+                retained.pop(key, None)  # move the key to the newest end
+                retained[key] = f
+            subs = list(self._subs.get(topic, ()))
+        sent = 0
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(f)
+                sent += 1
+            except queue.Full:
+                # too slow to keep up: cut it loose instead of buffering for it
+                sub.dropped = True
+                self.unsubscribe(sub)
+        return sent
+
+    def stream(self, topic: str, heartbeat: float = None):
+        """SSE generator for a Flask Response: drains one subscription."""
+        sub = self.subscribe(topic)
+        heartbeat = HEARTBEAT_S if heartbeat is None else heartbeat
+        try:
+            yield ':\n\n'
+            while not sub.dropped:
+                f = sub.get(heartbeat)
+                yield f if f is not None else ':\n\n'
+        finally:
+            sub.close()
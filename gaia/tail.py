@@ -0,0 +1,144 @@
+"""Read the end of a file without reading the whole file.
+
+`reverse_lines` seeks to the end and walks backwards in fixed-size blocks,
+splitting on raw `\n` bytes, so the cost follows the number of lines asked
+for rather than the file size and multi-byte UTF-8 is never cut in half.
+`follow` is the other direction: it streams lines as they are appended.
+"""
+import json
+import os
+
+from . import filewatch
+
+BLOCK_SIZE = 64 * 1024
+
+
+def reverse_lines(path: str, block_size: int = BLOCK_SIZE, skip_blank: bool = True, partial: bool = True):
+    """Yield the lines of `path` as bytes (no line ending), last first.
+
+    With `partial=False` a last line that has no trailing newline yet (a
+    write still in flight) is left out.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        pos = size = f.seek(0, os.SEEK_END)
+        drop = False
+        if size:
+            f.seek(pos - 1)
+            if f.read(1) == b'\n':
+                pos -= 1  # the final terminator does not start another line
+            else:
+                drop = not partial
+        rest = b''
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + rest).split(b'\n')
+            rest = lines[0]
+            for line in reversed(lines[1:]):
+                if drop:
+                    drop = False
+                    continue
+                line = line[:-1] if line.endswith(b'\r') else line
+                if line.strip() or not skip_blank:
+                    yield line
+        if size and not drop:
+            rest = rest[:-1] if rest.endswith(b'\r') else rest
+            if rest.strip() or not skip_blank:
+                yield rest
+
+
+def tail_lines(path: str, n: int, encoding: str = 'utf-8', errors: str = 'ignore', skip_blank: bool = False) -> list:
+    """The last `n` lines of `path` as text, oldest first; [] if it is missing."""
+    out = []
+    if n <= 0:
+        return out
+    for line in reverse_lines(path, skip_blank=skip_blank):
+        out.append(line.decode(encoding, errors))
+        if len(out) >= n:
+            break
+    return out[::-1]
+
+
+def tail_text(path: str, n: int, **kw) -> str:
+    """`tail_lines` joined with newlines."""
+    return '\n'.join(tail_lines(path, n, **kw))
+
+
+def tail_json(path: str, n: int) -> list:
+    """The last `n` NDJSON records of `path`, oldest first; unparsable lines are skipped."""
+    out = []
+    if n <= 0:
+        return out
+    for line in reverse_lines(path, partial=False):
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(out) >= n:
+            break
+    return out[::-1]
+
+
+def follow(path: str, stop=None, interval: float = 0.5, from_start: bool = False):
+    """Yield lines appended to `path` as bytes, like `tail -F`.
+
+    Starts at the current end (or the beginning with `from_start`), waits for
+    the file to appear, and survives rolls and truncation: when `path` starts
+    naming a different inode the old file is drained and the new one read
+    from its first byte. An unterminated last line is held back until its
+    newline arrives. Sleeps on a `filewatch.Watcher` between changes; with a
+    `stop` event it also wakes every `interval` seconds to check it.
+    """
+    fh = None
+    ino = None
+    buf = b''
+    # watch before the first read so no append can slip between read and wait
+    watcher = filewatch.Watcher([path])
+    timeout = None if stop is None else interval
+    try:
+        while stop is None or not stop.is_set():
+            if fh is None:
+                try:
+                    fh = open(path, 'rb')
+                except FileNotFoundError:
+                    from_start = True  # whatever appears next is all new
+                    watcher.wait(timeout)
+                    continue
+                ino = os.fstat(fh.fileno()).st_ino
+                if not from_start:
+                    fh.seek(0, os.SEEK_END)
+                buf = b''
+            chunk = fh.read()
+            if chunk:
+                buf += chunk
+                *lines, buf = buf.split(b'\n')
+                for line in lines:
+                    yield line[:-1] if line.endswith(b'\r') else line
+                continue
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != ino:
+                # rolled or removed: finish the old file, then pick up the new one
+                rest = buf + fh.read()
+                for line in rest.split(b'\n'):
+                    if line:
+                        yield line[:-1] if line.endswith(b'\r') else line
+                fh.close()
+                fh, from_start = None, True
+                continue
+            if os.fstat(fh.fileno()).st_size < fh.tell():
+                fh.seek(0)  # truncated in place
+                buf = b''
+                continue
+            watcher.wait(timeout)
+    finally:
+        watcher.close()
+        if fh is not None:
+            fh.close()
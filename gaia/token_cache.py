@@ -96,8 +96,8 @@ class TokenCache:
             # append to events.ndjson in repo root if possible
             root = os.getcwd()
             ev = {'type': 'token.fetch', 'source': 'token-cache', 'installation_id': self.installation_id, 'expires_at': self._expires_at.isoformat(), 'timestamp': datetime.now(timezone.utc).isoformat() + 'Z'}
-            with open(os.path.join(root, 'events.ndjson'), 'a', encoding='utf-8') as f:
-                f.write(json.dumps(ev, ensure_ascii=False) + '\n')
+            from gaia import event_log
+            event_log.open_log(os.path.join(root, 'events.ndjson')).append(ev)
         except Exception:
             pass
 
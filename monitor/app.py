@@ -10,10 +10,10 @@ import time
 import threading
 import math
 import sqlite3
-import queue
 import requests
 import glob
 from scripts import sequence_manager as sm
+from gaia import event_log, filewatch, pubsub, tail
 
 # configurable agents file (repo-root by default)
 AGENTS_CONFIG_PATH = os.environ.get('GAIA_AGENTS_CONFIG', os.path.join(os.getcwd(), 'agents.json'))
@@ -72,7 +72,6 @@ _INSTRUCT_RATE_LOCK = threading.Lock()
 GAIA_DB_PATH = os.environ.get('GAIA_DB_PATH', os.path.join(os.getcwd(), 'gaia.db'))
 _RATE_DB_CONN = None
 _STATE_DB_CONN = None
-_STATE_QUEUE = queue.Queue()
 _STATE_POLL_INTERVAL = int(os.environ.get('GAIA_AGENT_POLL_SECONDS', '10'))
 
 def _init_rate_db():
@@ -188,23 +187,11 @@ def instruct_rate_retry_after(key: str) -> int:
 
 
 def read_last_events(n=50):
-    if not os.path.exists(EVENTS_PATH):
-        return []
+    # reads backwards from the newest segment only as far as n events
     try:
-        with open(EVENTS_PATH, 'r', encoding='utf-8') as f:
-            lines = f.readlines()[-n:]
+        return event_log.open_log(EVENTS_PATH).tail(n)
     except Exception:
         return []
-    events = []
-    for l in lines:
-        l = l.strip()
-        if not l:
-            continue
-        try:
-            events.append(json.loads(l))
-        except Exception:
-            events.append({'raw': l})
-    return events
 
 
 def _save_agent_state(id: str, state: dict):
@@ -236,9 +223,7 @@ def _load_agent_state(id: str):
 
 def _tail_file(path, n=50):
     try:
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            data = f.read().splitlines()
-        return '\n'.join(data[-n:])
+        return tail.tail_text(path, n)
     except Exception:
         return ''
 
@@ -311,16 +296,96 @@ def probe_all_agents():
             results[st['id']] = st
             # persist
             _save_agent_state(st['id'], st)
-            # enqueue event for SSE
-            try:
-                _STATE_QUEUE.put_nowait(st)
-            except Exception:
-                pass
+            # fan out to /api/agents/state/stream subscribers
+            BUS.publish('agents_state', pubsub.frame('agent-state', st), key=st['id'])
         except Exception:
             continue
     return results
 
 
+# -- SSE sources ----------------------------------------------------------
+# One producer thread per source parses each change once and publishes the
+# frame on BUS; the /stream endpoints only drain their subscription. The
+# producers sleep on gaia.filewatch (inotify where available) and wake every
+# _PRODUCER_STOP_CHECK_S to see whether BUS has stopped them.
+BUS = pubsub.Bus()
+_PRODUCER_STOP_CHECK_S = 0.5
+_TMP_DIR = os.path.join(os.getcwd(), '.tmp')
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def _json_file_producer(topic, files):
+    """Producer publishing `files` [(path, event, default, shape)] on change, retained per event."""
+    def run(stop):
+        watcher = filewatch.Watcher([path for path, _, _, _ in files])
+        seen = {}
+        try:
+            while not stop.is_set():
+                for path, event, default, shape in files:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    if not st.st_size:
+                        continue  # just created; the write that fills it wakes us again
+                    key = (st.st_mtime_ns, st.st_size, st.st_ino)
+                    if seen.get(path) == key:
+                        continue
+                    seen[path] = key
+                    payload = _read_json(path, default)
+                    BUS.publish(topic, pubsub.frame(event, shape(payload) if shape else payload), key=event)
+                # sleeps until one of the files is written, replaced or created
+                watcher.wait(_PRODUCER_STOP_CHECK_S)
+        finally:
+            watcher.close()
+    return run
+
+
+def _sse_event_name(parsed):
+    ev_type = parsed.get('type') or parsed.get('event') or 'event'
+    # normalize to simple token
+    ev_name = str(ev_type).strip().lower().replace(' ', '-').replace('.', '-')
+    return 'instruct' if ev_name == 'instruction' else ev_name
+
+
+def _events_producer(stop):
+    # follows the live segment across rolls (the path then names a new inode)
+    for raw in tail.follow(EVENTS_PATH, stop=stop, interval=_PRODUCER_STOP_CHECK_S):
+        line = raw.decode('utf-8', errors='replace').strip()
+        if not line:
+            continue
+        try:
+            parsed = json.loads(line)
+            f = pubsub.frame(_sse_event_name(parsed), parsed)
+        except Exception:
+            # fallback: emit raw as generic event
+            f = pubsub.frame(None, line)
+        BUS.publish('events', f)
+
+
+BUS.register('events', _events_producer)
+BUS.register('approval', _json_file_producer('approval', [(APPR_PATH, 'approval', {'ok': False}, None)]))
+BUS.register('telegram', _json_file_producer('telegram', [
+    (os.path.join(_TMP_DIR, 'telegram_health.json'), 'telegram_health', {'ok': False}, None),
+    (os.path.join(_TMP_DIR, 'telegram_queue.json'), 'telegram_queue', [],
+     lambda q: {'len': len(q) if isinstance(q, list) else None}),
+]))
+BUS.register('pending_commands', _json_file_producer('pending_commands', [
+    (os.path.join(_TMP_DIR, 'pending_commands.json'), 'pending_commands', [], lambda p: {'pending': p}),
+]))
+BUS.register('sequences', _json_file_producer('sequences', [
+    (os.path.join(_TMP_DIR, 'sequence_todos.json'), 'todos', {}, None),
+    (os.path.join(_TMP_DIR, 'active_task.json'), 'active', {}, None),
+]))
+
+
 def _state_poller_loop():
     while True:
         try:
@@ -356,31 +421,7 @@ def api_approval_state():
 @app.route('/api/approval/stream')
 def api_approval_stream():
     """SSE stream that emits an `approval` event when `.tmp/approval.json` is created/updated."""
-    def gen():
-        last_mtime = 0
-        while True:
-            try:
-                if os.path.exists(APPR_PATH):
-                    m = os.path.getmtime(APPR_PATH)
-                    if m and m != last_mtime:
-                        last_mtime = m
-                        try:
-                            with open(APPR_PATH, 'r', encoding='utf-8') as f:
-                                payload = json.load(f)
-                        except Exception:
-                            payload = {'ok': False}
-                        safe = json.dumps(payload, ensure_ascii=False)
-                        yield f"event: approval\n"
-                        yield f"data: {safe}\n\n"
-                # heartbeat
-                yield ':\n\n'
-                time.sleep(1)
-            except GeneratorExit:
-                return
-            except Exception:
-                time.sleep(1)
-
-    return Response(gen(), mimetype='text/event-stream')
+    return Response(BUS.stream('approval'), mimetype='text/event-stream')
 
 
 @app.route('/api/telegram/health')
@@ -412,10 +453,8 @@ def api_telegram_failures():
     out = {'ok': True, 'count': 0, 'recent': []}
     try:
         if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                lines = f.read().splitlines()
             recent = []
-            for l in lines[-1000:]:
+            for l in tail.tail_lines(path, 1000):
                 low = l.lower()
                 if 'telegram' in low and ('fail' in low or 'error' in low or 'not found' in low or 'invalid-token' in low):
                     recent.append(l)
@@ -442,49 +481,7 @@ def api_telegram_approvers():
 @app.route('/api/telegram/stream')
 def api_telegram_stream():
     """SSE stream that emits telegram health and queue changes."""
-    def gen():
-        last_h_mtime = 0
-        last_q_mtime = 0
-        while True:
-            try:
-                # health file
-                hpath = os.path.join(os.getcwd(), '.tmp', 'telegram_health.json')
-                if os.path.exists(hpath):
-                    m = os.path.getmtime(hpath)
-                    if m and m != last_h_mtime:
-                        last_h_mtime = m
-                        try:
-                            with open(hpath, 'r', encoding='utf-8') as f:
-                                payload = json.load(f)
-                        except Exception:
-                            payload = {'ok': False}
-                        safe = json.dumps(payload, ensure_ascii=False)
-                        yield f"event: telegram_health\n"
-                        yield f"data: {safe}\n\n"
-
-                # queue file
-                qpath = os.path.join(os.getcwd(), '.tmp', 'telegram_queue.json')
-                if os.path.exists(qpath):
-                    qm = os.path.getmtime(qpath)
-                    if qm and qm != last_q_mtime:
-                        last_q_mtime = qm
-                        try:
-                            with open(qpath, 'r', encoding='utf-8') as f:
-                                q = json.load(f)
-                        except Exception:
-                            q = []
-                        yield f"event: telegram_queue\n"
-                        yield f"data: {json.dumps({'len': len(q) if isinstance(q, list) else None})}\n\n"
-
-                # heartbeat
-                yield ':\n\n'
-                time.sleep(1)
-            except GeneratorExit:
-                return
-            except Exception:
-                time.sleep(1)
-
-    return Response(gen(), mimetype='text/event-stream')
+    return Response(BUS.stream('telegram'), mimetype='text/event-stream')
 
 
 @app.route('/api/pending_commands')
@@ -504,32 +501,7 @@ def api_pending_commands():
 @app.route('/api/pending_commands/stream')
 def api_pending_commands_stream():
     """SSE stream that emits `pending_commands` when `.tmp/pending_commands.json` changes."""
-    def gen():
-        last_mtime = 0
-        p = os.path.join(os.getcwd(), '.tmp', 'pending_commands.json')
-        while True:
-            try:
-                if os.path.exists(p):
-                    m = os.path.getmtime(p)
-                    if m and m != last_mtime:
-                        last_mtime = m
-                        try:
-                            with open(p, 'r', encoding='utf-8') as f:
-                                payload = json.load(f)
-                        except Exception:
-                            payload = []
-                        safe = json.dumps({'pending': payload}, ensure_ascii=False)
-                        yield f"event: pending_commands\n"
-                        yield f"data: {safe}\n\n"
-                # heartbeat
-                yield ':\n\n'
-                time.sleep(1)
-            except GeneratorExit:
-                return
-            except Exception:
-                time.sleep(1)
-
-    return Response(gen(), mimetype='text/event-stream')
+    return Response(BUS.stream('pending_commands'), mimetype='text/event-stream')
 
 
 @app.route('/api/pending_commands/approve', methods=['POST'])
@@ -793,45 +765,74 @@ def api_controller_complete():
         return jsonify({'ok': False, 'error': 'complete_failed', 'detail': str(e)}), 500
 
 
+def _dead_letters_unsupported(orchestrator):
+    return jsonify({'ok': False, 'error': 'unsupported',
+                    'detail': f'the {orchestrator.QUEUE_BACKEND} queue backend keeps no dead letters'}), 501
+
+
+@app.route('/api/queue/dead_letters')
+def api_queue_dead_letters():
+    """List orchestrator dead letters; filters: ?type=, ?error= (substring), ?limit=."""
+    try:
+        import orchestrator
+        if 'dead_letters' not in orchestrator.QUEUE_FEATURES:
+            return _dead_letters_unsupported(orchestrator)
+        limit = int(request.args.get('limit', 100))
+        rows = orchestrator.list_dead_letters(task_type=request.args.get('type'), error=request.args.get('error'), limit=limit)
+        return jsonify({'ok': True, 'counts': orchestrator.count_dead_letters(), 'dead_letters': rows})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': 'read_failed', 'detail': str(e)}), 500
+
+
+@app.route('/api/queue/dead_letters/replay', methods=['POST'])
+def api_queue_dead_letters_replay():
+    """Replay dead letters in bulk.
+
+    JSON body: {"ids": [..]} and/or {"type": "...", "error": "..."}, or
+    {"all": true}; optional "delay_seconds" and "priority". Requires the
+    instruct API key when one is configured.
+    """
+    if INSTRUCT_API_KEY:
+        got_key = request.headers.get('X-API-Key') or request.args.get('api_key')
+        if not got_key or got_key != INSTRUCT_API_KEY:
+            return jsonify({'ok': False, 'error': 'unauthorized'}), 401
+    body = request.get_json(silent=True) or {}
+    sel = {'task_ids': body.get('ids'), 'task_type': body.get('type'), 'error': body.get('error')}
+    if not body.get('all') and not any(v for v in sel.values()):
+        return jsonify({'ok': False, 'error': 'missing_selection'}), 400
+    try:
+        import orchestrator
+        if 'dead_letters' not in orchestrator.QUEUE_FEATURES:
+            return _dead_letters_unsupported(orchestrator)
+        ids = orchestrator.replay_dead_letters(delay_seconds=float(body.get('delay_seconds') or 0),
+                                               priority=body.get('priority'), **sel)
+        return jsonify({'ok': True, 'replayed': len(ids), 'ids': ids})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': 'replay_failed', 'detail': str(e)}), 500
+
+
+@app.route('/api/queue/tasks/<int:task_id>/result')
+def api_queue_task_result(task_id):
+    """Head or tail of a task result without loading it whole: ?part=head|tail&bytes=4096."""
+    try:
+        import orchestrator
+        task = orchestrator.get_task(task_id)
+        if not task:
+            return jsonify({'ok': False, 'error': 'not_found'}), 404
+        n = min(int(request.args.get('bytes', 4096)), 1024 * 1024)
+        part = request.args.get('part', 'tail')
+        text = orchestrator.result_head(task_id, n) if part == 'head' else orchestrator.result_tail(task_id, n)
+        blob = (task.get('result') or {}).get('$blob') if isinstance(task.get('result'), dict) else None
+        return jsonify({'ok': True, 'task_id': task_id, 'status': task['status'], 'part': part, 'text': text,
+                        'size': blob['size'] if blob else len(text.encode('utf-8')), 'out_of_row': bool(blob)})
+    except Exception as e:
+        return jsonify({'ok': False, 'error': 'read_failed', 'detail': str(e)}), 500
+
+
 @app.route('/api/sequences/stream')
 def api_sequences_stream():
-    def gen():
-        last_t_mtime = 0
-        last_a_mtime = 0
-        todos_path = os.path.join(os.getcwd(), '.tmp', 'sequence_todos.json')
-        active_path = os.path.join(os.getcwd(), '.tmp', 'active_task.json')
-        while True:
-            try:
-                if os.path.exists(todos_path):
-                    m = os.path.getmtime(todos_path)
-                    if m and m != last_t_mtime:
-                        last_t_mtime = m
-                        try:
-                            with open(todos_path, 'r', encoding='utf-8') as f:
-                                payload = json.load(f)
-                        except Exception:
-                            payload = {}
-                        yield f"event: todos\n"
-                        yield f"data: {json.dumps(payload)}\n\n"
-                if os.path.exists(active_path):
-                    m = os.path.getmtime(active_path)
-                    if m and m != last_a_mtime:
-                        last_a_mtime = m
-                        try:
-                            with open(active_path, 'r', encoding='utf-8') as f:
-                                payload = json.load(f)
-                        except Exception:
-                            payload = {}
-                        yield f"event: active\n"
-                        yield f"data: {json.dumps(payload)}\n\n"
-                yield ':\n\n'
-                time.sleep(1)
-            except GeneratorExit:
-                return
-            except Exception:
-                time.sleep(1)
-
-    return Response(gen(), mimetype='text/event-stream')
+    """SSE stream that emits `todos` and `active` when the sequence files change."""
+    return Response(BUS.stream('sequences'), mimetype='text/event-stream')
 
 
 @app.route('/sequences')
@@ -844,52 +845,7 @@ def api_events_stream():
     """Server-Sent Events endpoint that streams appended lines from `events.ndjson`.
     Each line is emitted as a single SSE `data:` message containing the JSON line.
     """
-    def gen():
-        # wait until file exists
-        last_path = EVENTS_PATH
-        while not os.path.exists(last_path):
-            # send a heartbeat while waiting
-            yield ': heartbeat\n\n'
-            time.sleep(0.5)
-        try:
-            with open(last_path, 'r', encoding='utf-8') as fh:
-                # seek to end so we only stream new events
-                fh.seek(0, os.SEEK_END)
-                while True:
-                    line = fh.readline()
-                    if not line:
-                        # heartbeat to keep connection alive
-                        yield ':\n\n'
-                        time.sleep(0.5)
-                        continue
-                        line = line.strip()
-                        if not line:
-                            continue
-                        # try to parse JSON to extract event type and emit named SSE events
-                        try:
-                            parsed = json.loads(line)
-                            ev_type = parsed.get('type') or parsed.get('event') or 'event'
-                            # normalize to simple token
-                            ev_name = str(ev_type).strip().lower().replace(' ', '-').replace('.', '-')
-                            if ev_name == 'instruction':
-                                ev_name = 'instruct'
-                            # emit named event then data
-                            yield f"event: {ev_name}\n"
-                            # ensure data is a single-line JSON string
-                            safe = json.dumps(parsed, ensure_ascii=False)
-                            yield f"data: {safe}\n\n"
-                        except Exception:
-                            # fallback: emit raw as generic event
-                            yield f"data: {line}\n\n"
-        except GeneratorExit:
-            return
-        except Exception:
-            # on unexpected error, yield periodic heartbeats
-            while True:
-                yield ':\n\n'
-                time.sleep(1)
-
-    return Response(gen(), mimetype='text/event-stream')
+    return Response(BUS.stream('events'), mimetype='text/event-stream')
 
 
 def find_powershell():
@@ -1289,9 +1245,7 @@ def api_agents_instruct():
 
     # append to events.ndjson
     try:
-        os.makedirs(os.path.dirname(EVENTS_PATH), exist_ok=True)
-        with open(EVENTS_PATH, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        event_log.open_log(EVENTS_PATH).append(event)
     except Exception as e:
         return jsonify({'ok': False, 'error': 'failed to append event', 'details': str(e)}), 500
 
@@ -1380,18 +1334,10 @@ def api_agents_log():
     if download and len(candidates) == 1:
         return send_file(candidates[0], as_attachment=True)
 
-    def tail_text(path, n=200):
-        try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                data = f.read().splitlines()
-            return '\n'.join(data[-n:])
-        except Exception:
-            return ''
-
     result = {'ok': True, 'id': aid, 'files': []}
     for p in candidates:
         kind = 'out' if p.endswith('.out.log') else ('err' if p.endswith('.err.log') else 'log')
-        result['files'].append({'path': os.path.relpath(p, os.getcwd()), 'kind': kind, 'tail': tail_text(p, lines)})
+        result['files'].append({'path': os.path.relpath(p, os.getcwd()), 'kind': kind, 'tail': _tail_file(p, lines)})
 
     return jsonify(result)
 
@@ -1426,18 +1372,10 @@ def api_agents_log_preview():
     if not candidates:
         return jsonify({'ok': False, 'error': 'no logs found for id', 'id': aid}), 404
 
-    def tail_text(path, n=200):
-        try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                data = f.read().splitlines()
-            return '\n'.join(data[-n:])
-        except Exception:
-            return ''
-
     previews = []
     for p in candidates:
         kind = 'out' if p.endswith('.out.log') else ('err' if p.endswith('.err.log') else 'log')
-        previews.append({'path': os.path.relpath(p, os.getcwd()), 'kind': kind, 'tail': tail_text(p, lines)})
+        previews.append({'path': os.path.relpath(p, os.getcwd()), 'kind': kind, 'tail': _tail_file(p, lines)})
     return jsonify({'ok': True, 'id': aid, 'preview': previews})
 
 
@@ -1473,17 +1411,11 @@ def api_agents_probe():
         fake_cfg = {'id': aid}
         res = probe_agent_by_cfg(fake_cfg, pmap)
         _save_agent_state(res['id'], res)
-        try:
-            _STATE_QUEUE.put_nowait(res)
-        except Exception:
-            pass
+        BUS.publish('agents_state', pubsub.frame('agent-state', res), key=res['id'])
         return jsonify({'ok': True, 'probe': res})
     res = probe_agent_by_cfg(cfg, pmap)
     _save_agent_state(res['id'], res)
-    try:
-        _STATE_QUEUE.put_nowait(res)
-    except Exception:
-        pass
+    BUS.publish('agents_state', pubsub.frame('agent-state', res), key=res['id'])
     return jsonify({'ok': True, 'probe': res})
 
 
@@ -1546,18 +1478,8 @@ def api_agents_state():
 
 @app.route('/api/agents/state/stream')
 def api_agents_state_stream():
-    def gen():
-        # yield queued state objects as SSE named event 'agent-state'
-        while True:
-            try:
-                st = _STATE_QUEUE.get(timeout=1.0)
-                s = json.dumps(st, ensure_ascii=False)
-                yield f"event: agent-state\n"
-                yield f"data: {s}\n\n"
-            except Exception:
-                # heartbeat
-                yield ':\n\n'
-    return Response(gen(), mimetype='text/event-stream')
+    # named event 'agent-state' per probed agent; new clients get the latest of each
+    return Response(BUS.stream('agents_state'), mimetype='text/event-stream')
 
 
 @app.route('/api/agents/start', methods=['POST'])
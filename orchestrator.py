@@ -5,16 +5,48 @@ task queue suitable for local coordination in prototypes.
 
 API provided:
 - init_db(): create schema
-- enqueue_task(task_type, payload): add a new pending task
+- enqueue_task(task_type, payload, priority=0, delay_seconds=0, dedup_key=None, depends_on=None): add a new pending task
+- enqueue_tasks([(task_type, payload[, dedup_key]), ...]): bulk insert in one transaction, returns ids
 - claim_task(worker_id): atomically claim a pending task, returning its row
+- claim_tasks(worker_id, n, lease_seconds=None, task_types=None): claim up to n pending tasks in one transaction
+- set_task_type_limit(task_type, max_in_flight=None, rate_per_s=None): cap a task type cluster-wide
+- list_task_type_limits(): current caps and rate limits
+- heartbeat(worker_id, task_ids, lease_seconds): renew leases of in-flight tasks
 - complete_task(task_id, result): mark task completed and store result
+- complete_tasks([(task_id, result), ...]): bulk completion in one transaction
 - fail_task(task_id, error): mark task failed
-- list_tasks(status=None): list tasks optionally filtered by status
+- fail_tasks([(task_id, error), ...]): bulk failure in one transaction
+- list_tasks(status=None, include_archived=False): list tasks optionally filtered by status
+- count_tasks(): task counts per status
+- archive_tasks(older_than_seconds): move old finished tasks to `queue_archive`
+- get_task(task_id): one task with payload/result, from the hot or archive table
+- read_result(task_id) / result_head(task_id) / result_tail(task_id): full or partial results,
+  including large ones stored out of row under RESULTS_DIR
+- list_dead_letters(task_type=None, error=None): failed tasks awaiting triage
+- replay_dead_letters(...): re-drive failed tasks in one transaction
+- set_schedule(name, task_type, payload, interval_seconds=None, cron=None, overlap='skip', missed='once'):
+  recurring task; run_due_schedules() enqueues due runs (see agents/schedule_timer.py)
+- TaskWaiter(): block until new work is enqueued (local push wakeup)
+
+All queue/audit calls share a per-process pool of WAL-mode connections and
+run the schema setup once per database path (see `_pooled`).
+
+Set GAIA_QUEUE_BACKEND=postgres (with GAIA_QUEUE_DSN) to run the queue on
+PostgreSQL instead (`orchestrator_pg`); audit and approvals stay in SQLite.
 """
 import sqlite3
 import os
 import json
-from datetime import datetime
+import errno
+import hashlib
+import queue
+import socket
+import tempfile
+import zlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import logging
 
 LOG_PATH = os.path.join(os.path.dirname(__file__), 'orchestrator.log')
@@ -28,14 +60,340 @@ if not logger.handlers:
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'gaia.db')
 
+# Pool tuning. busy_timeout makes writers wait on the lock instead of failing
+# with "database is locked"; the statement cache keeps the hot INSERT/UPDATE
+# statements prepared on each pooled connection.
+BUSY_TIMEOUT_MS = int(os.environ.get('GAIA_DB_BUSY_TIMEOUT_MS', '30000'))
+POOL_SIZE = int(os.environ.get('GAIA_DB_POOL_SIZE', '8'))
+STATEMENT_CACHE_SIZE = 256
+# A task of priority p is ranked as if it became visible p * PRIORITY_AGING_MS
+# earlier, so urgent lanes go first but a waiting low-priority task eventually
+# outranks newer urgent ones instead of starving.
+PRIORITY_AGING_MS = int(float(os.environ.get('GAIA_QUEUE_PRIORITY_AGING_S', '60')) * 1000)
+# An enqueue with a `dedup_key` returns the existing task for that key instead
+# of inserting, until the key is this old; then the key may be enqueued again.
+DEDUP_WINDOW_MS = int(float(os.environ.get('GAIA_QUEUE_DEDUP_WINDOW_S', '86400')) * 1000)
+# Results whose JSON exceeds RESULT_INLINE_MAX_BYTES are written to
+# content-addressed, zlib-compressed files under RESULTS_DIR; the row keeps
+# {"$blob": {"sha256", "size", "ref"}} instead (see `read_result`).
+RESULTS_DIR = os.environ.get('GAIA_RESULTS_DIR', os.path.join(os.path.dirname(__file__), '.tmp', 'results'))
+RESULT_INLINE_MAX_BYTES = int(os.environ.get('GAIA_RESULT_INLINE_MAX_BYTES', str(64 * 1024)))
+# UPDATE ... RETURNING lets a batch claim select and mark rows in one statement
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
 
 def _connect():
     return sqlite3.connect(DB_PATH, timeout=30)
 
 
+def _stamp():
+    """Return the current UTC time as (ISO text, integer epoch milliseconds)."""
+    now = time.time()
+    return datetime.utcfromtimestamp(now).isoformat() + 'Z', int(now * 1000)
+
+
+# SQL expression converting an ISO-8601 text timestamp to epoch milliseconds;
+# julianday() accepts both '...T...Z' and sqlite's datetime('now') format.
+_EPOCH_MS_SQL = "CAST(ROUND((julianday({col}) - 2440587.5) * 86400000) AS INTEGER)"
+
+# (table, text column, epoch-ms column) pairs kept side by side
+_EPOCH_COLUMNS = (
+    ('queue', 'created_at', 'created_at_ms'),
+    ('queue', 'started_at', 'started_at_ms'),
+    ('queue', 'finished_at', 'finished_at_ms'),
+    ('audit', 'timestamp', 'timestamp_ms'),
+    ('approvals', 'timestamp', 'timestamp_ms'),
+)
+
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_created ON queue (status, created_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_claim ON queue (status, rank_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_finished ON queue (status, finished_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_lease ON queue (status, lease_expires_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_type ON queue (status, task_type)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_queue_dedup ON queue (dedup_key) WHERE dedup_key IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS idx_dead_letters_type ON dead_letters (replayed_at_ms, task_type, failed_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_dead_letter_deps_child ON dead_letter_deps (child_id)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_archive_created ON queue_archive (created_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_started ON queue (status, started_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_audit_action_ts ON audit (action, timestamp_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_approvals_request ON approvals (request_id)',
+    'CREATE INDEX IF NOT EXISTS idx_schedules_due ON schedules (enabled, next_run_ms)',
+)
+
+
+def _ensure_epoch_column(cur, table: str, text_col: str, ms_col: str):
+    """Add `ms_col` next to `text_col`, backfill it once and keep it in sync.
+
+    Orchestrator writes set both columns. The triggers cover other writers
+    (agents inserting audit rows directly, tests backdating `started_at`) by
+    deriving the epoch value whenever only the text column changed.
+    """
+    cur.execute(f"PRAGMA table_info({table})")
+    cols = {r[1] for r in cur.fetchall()}
+    if ms_col not in cols:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {ms_col} INTEGER")
+        cur.execute(f"UPDATE {table} SET {ms_col} = {_EPOCH_MS_SQL.format(col=text_col)} WHERE {text_col} IS NOT NULL")
+    new_ms = _EPOCH_MS_SQL.format(col=f'NEW.{text_col}')
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{ms_col}_ins AFTER INSERT ON {table}
+        WHEN NEW.{ms_col} IS NULL AND NEW.{text_col} IS NOT NULL
+        BEGIN UPDATE {table} SET {ms_col} = {new_ms} WHERE rowid = NEW.rowid; END""")
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{ms_col}_upd AFTER UPDATE OF {text_col} ON {table}
+        WHEN NEW.{text_col} IS NOT OLD.{text_col} AND NEW.{ms_col} IS OLD.{ms_col}
+        BEGIN UPDATE {table} SET {ms_col} = {new_ms} WHERE rowid = NEW.rowid; END""")
+
+
+class _ConnectionPool:
+    """Thread-safe pool of SQLite connections to a single database file.
+
+    At most `size` connections are checked out at once; idle connections are
+    reused LIFO so the most recently used (warm cache) connection goes first.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        # WAL is durable across crashes with synchronous=NORMAL; only the last
+        # transactions before a power loss may roll back.
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._open()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except Exception:
+            # broken connection; drop it and let the next acquire open a new one
+            try:
+                conn.close()
+            except Exception:
+                pass
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+# database paths whose schema/migrations already ran in this process
+_schema_ready = set()
+
+
+def _pool() -> _ConnectionPool:
+    """Return the pool for the current `DB_PATH` (tests repoint it per case)."""
+    global _pools_pid
+    path = DB_PATH
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # SQLite connections must not cross a fork: start fresh in the child
+            _pools.clear()
+            _schema_ready.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = _ConnectionPool(path)
+        return pool
+
+
+def close_pool():
+    """Close idle pooled connections and forget schema state (tests/shutdown)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+        _schema_ready.clear()
+
+
+@contextmanager
+def _pooled():
+    """Yield a pooled connection to `DB_PATH`, running `init_db` on first use.
+
+    Any transaction left open by the caller is rolled back on release.
+    """
+    if DB_PATH not in _schema_ready:
+        init_db()
+    pool = _pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+# --- local push wakeup -------------------------------------------------------
+# Each waiting worker binds a Unix datagram socket in a per-database directory
+# under the system temp dir. Enqueuers send one byte to every socket there, so
+# idle workers wake within milliseconds instead of sleeping out a poll
+# interval. Where AF_UNIX is unavailable the waiter degrades to plain sleeps.
+_HAS_UNIX_DGRAM = hasattr(socket, 'AF_UNIX') and os.name == 'posix'
+_sender = None
+_sender_pid = None
+
+
+def _wake_dir(db_path: str = None) -> str:
+    # hashed so the socket path stays under the ~108 byte sun_path limit
+    digest = hashlib.sha1(os.path.abspath(db_path or DB_PATH).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'gaia-wake-{digest}')
+
+
+def _notify_waiters():
+    """Wake every TaskWaiter on this database; best-effort, never raises."""
+    global _sender, _sender_pid
+    if not _HAS_UNIX_DGRAM:
+        return
+    d = _wake_dir()
+    try:
+        names = os.listdir(d)
+    except OSError:
+        return
+    try:
+        if _sender is None or _sender_pid != os.getpid():
+            _sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _sender.setblocking(False)
+            _sender_pid = os.getpid()
+        for name in names:
+            path = os.path.join(d, name)
+            try:
+                _sender.sendto(b'!', path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # waiter died without cleaning up
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                # EAGAIN/ENOBUFS: the waiter already has wakeups queued
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS):
+                    logger.debug('wakeup to %s failed: %s', path, e)
+    except Exception:
+        logger.exception('notify waiters failed')
+
+
+class TaskWaiter:
+    """Block until new tasks are enqueued, with a timeout fallback to polling.
+
+    Usage:
+        waiter = TaskWaiter()
+        while running:
+            if not claim_tasks(...):
+                waiter.wait(poll_interval)
+        waiter.close()
+
+    `poke()` wakes this waiter from another thread (e.g. a finished job).
+    """
+
+    def __init__(self, db_path: str = None):
+        self._sock = None
+        self.path = None
+        if not _HAS_UNIX_DGRAM:
+            return
+        d = _wake_dir(db_path)
+        try:
+            os.makedirs(d, mode=0o700, exist_ok=True)
+            self.path = os.path.join(d, f'{os.getpid()}-{id(self):x}.sock')
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(self.path)
+            self._sock = sock
+        except OSError:
+            logger.exception('could not bind wakeup socket; falling back to polling')
+            self.path = None
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds; True when woken by a notification."""
+        if self._sock is None:
+            time.sleep(timeout)
+            return False
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.recv(64)
+        except (socket.timeout, OSError):
+            return False
+        # coalesce a burst of notifications into this single wakeup
+        self._sock.setblocking(False)
+        try:
+            while True:
+                self._sock.recv(64)
+        except OSError:
+            pass
+        return True
+
+    def poke(self):
+        if self._sock is None:
+            return
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+                s.setblocking(False)
+                s.sendto(b'!', self.path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+# Aggregate time spent waiting for the SQLite write lock in this process.
+# BEGIN IMMEDIATE is where a writer blocks (inside busy_timeout) while another
+# process holds the lock, so timing it isolates contention from query cost.
+LOCK_WAIT_STATS = {'count': 0, 'total_s': 0.0, 'max_s': 0.0}
+_lock_stats_lock = threading.Lock()
+
+
+def _begin_immediate(cur):
+    start = time.perf_counter()
+    cur.execute('BEGIN IMMEDIATE')
+    waited = time.perf_counter() - start
+    with _lock_stats_lock:
+        LOCK_WAIT_STATS['count'] += 1
+        LOCK_WAIT_STATS['total_s'] += waited
+        if waited > LOCK_WAIT_STATS['max_s']:
+            LOCK_WAIT_STATS['max_s'] = waited
+
+
 def init_db():
+    path = DB_PATH
     conn = _connect()
     cur = conn.cursor()
+    # WAL is persistent in the database file: readers no longer block the
+    # single writer and commits avoid rewriting the rollback journal.
+    try:
+        cur.execute('PRAGMA journal_mode=WAL')
+    except Exception:
+        logger.exception('could not enable WAL for %s', path)
     cur.execute('''CREATE TABLE IF NOT EXISTS audit (id INTEGER PRIMARY KEY, timestamp TEXT, actor TEXT, action TEXT, details TEXT)''')
     cur.execute('''CREATE TABLE IF NOT EXISTS approvals (
         id INTEGER PRIMARY KEY,
@@ -65,6 +423,73 @@ def init_db():
         finished_at TEXT,
         result TEXT
     )''')
+    # cluster-wide caps per task type, enforced inside the claim transaction;
+    # `tokens`/`refilled_ms` hold the token-bucket state for `rate_per_s`
+    cur.execute('''CREATE TABLE IF NOT EXISTS task_type_limits (
+        task_type TEXT PRIMARY KEY,
+        max_in_flight INTEGER,
+        rate_per_s REAL,
+        tokens REAL,
+        refilled_ms INTEGER
+    )''')
+    # DAG edges for tasks enqueued with `depends_on`; an edge is removed once
+    # its parent finishes, so the table only holds unresolved dependencies
+    cur.execute('''CREATE TABLE IF NOT EXISTS task_deps (
+        parent_id INTEGER NOT NULL,
+        child_id INTEGER NOT NULL,
+        PRIMARY KEY (parent_id, child_id)
+    ) WITHOUT ROWID''')
+    # edges removed when a dependency failure cascaded to the child; kept so
+    # replaying the parent can block the child on it again
+    cur.execute('''CREATE TABLE IF NOT EXISTS dead_letter_deps (
+        parent_id INTEGER NOT NULL,
+        child_id INTEGER NOT NULL,
+        PRIMARY KEY (parent_id, child_id)
+    ) WITHOUT ROWID''')
+    # dead-letter index over failed tasks: why they failed and every failure so
+    # far; `replayed_at_ms` is set once a replay sends the task back to pending
+    cur.execute('''CREATE TABLE IF NOT EXISTS dead_letters (
+        task_id INTEGER PRIMARY KEY,
+        task_type TEXT,
+        error TEXT,
+        attempts INTEGER,
+        history TEXT,
+        failed_at TEXT,
+        failed_at_ms INTEGER,
+        replayed_at_ms INTEGER
+    )''')
+    # recurring tasks materialised into the queue by `run_due_schedules`;
+    # exactly one of `interval_s` / `cron` is set
+    cur.execute('''CREATE TABLE IF NOT EXISTS schedules (
+        name TEXT PRIMARY KEY,
+        task_type TEXT NOT NULL,
+        payload TEXT,
+        interval_s REAL,
+        cron TEXT,
+        overlap TEXT DEFAULT 'skip',
+        missed TEXT DEFAULT 'once',
+        priority INTEGER DEFAULT 0,
+        enabled INTEGER DEFAULT 1,
+        next_run_ms INTEGER,
+        last_run_ms INTEGER,
+        last_task_id INTEGER
+    )''')
+    # cold storage for finished tasks; payload/result are zlib-compressed JSON
+    cur.execute('''CREATE TABLE IF NOT EXISTS queue_archive (
+        id INTEGER PRIMARY KEY,
+        created_at TEXT,
+        created_at_ms INTEGER,
+        task_type TEXT,
+        status TEXT,
+        owner TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        finished_at_ms INTEGER,
+        reclaim_attempts INTEGER,
+        archived_at_ms INTEGER,
+        payload_z BLOB,
+        result_z BLOB
+    )''')
     conn.commit()
 
     # ensure migration: add reclaim_attempts and last_reclaimed_at if missing
@@ -102,20 +527,57 @@ def init_db():
                     pass
     except Exception:
         pass
+    conn.commit()
+
+    # ensure migration: integer epoch columns and the indexes hot paths use
+    for table, text_col, ms_col in _EPOCH_COLUMNS:
+        try:
+            _ensure_epoch_column(cur, table, text_col, ms_col)
+        except Exception:
+            logger.exception('epoch column migration failed for %s.%s', table, ms_col)
+
+    # ensure migration: priority lanes and delayed visibility. `rank_ms` is the
+    # claim order key (visible time minus priority aging); not_before_ms hides
+    # a task until that time.
+    cur.execute("PRAGMA table_info(queue)")
+    cols = {r[1] for r in cur.fetchall()}
+    if 'priority' not in cols:
+        cur.execute('ALTER TABLE queue ADD COLUMN priority INTEGER DEFAULT 0')
+    if 'not_before_ms' not in cols:
+        cur.execute('ALTER TABLE queue ADD COLUMN not_before_ms INTEGER')
+    if 'rank_ms' not in cols:
+        cur.execute('ALTER TABLE queue ADD COLUMN rank_ms INTEGER')
+        cur.execute('UPDATE queue SET rank_ms = created_at_ms')
+    # lease expiry for claimers that heartbeat (see `heartbeat`)
+    if 'lease_expires_ms' not in cols:
+        cur.execute('ALTER TABLE queue ADD COLUMN lease_expires_ms INTEGER')
+    # idempotent enqueue (see `enqueue_task`)
+    if 'dedup_key' not in cols:
+        cur.execute('ALTER TABLE queue ADD COLUMN dedup_key TEXT')
+    # number of unfinished parents of a 'blocked' task (see `depends_on`)
+    if 'pending_deps' not in cols:
+        cur.execute('ALTER TABLE queue ADD COLUMN pending_deps INTEGER')
+    cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_queue_rank_ms_ins AFTER INSERT ON queue
+        WHEN NEW.rank_ms IS NULL
+        BEGIN UPDATE queue SET rank_ms = COALESCE(NEW.created_at_ms, {_EPOCH_MS_SQL.format(col='NEW.created_at')}) WHERE rowid = NEW.rowid; END""")
+    for stmt in _INDEXES:
+        try:
+            cur.execute(stmt)
+        except Exception:
+            logger.exception('index migration failed: %s', stmt)
 
     conn.commit()
     conn.close()
+    _schema_ready.add(path)
 
 
 def write_audit(actor: str, action: str, details: str):
     """Write an audit row to the audit table; best-effort."""
     try:
-        init_db()
-        conn = _connect()
-        cur = conn.cursor()
-        cur.execute('INSERT INTO audit (timestamp, actor, action, details) VALUES (?, ?, ?, ?)', (datetime.utcnow().isoformat() + 'Z', actor, action, details))
-        conn.commit()
-        conn.close()
+        ts, ts_ms = _stamp()
+        with _pooled() as conn:
+            conn.execute('INSERT INTO audit (timestamp, timestamp_ms, actor, action, details) VALUES (?, ?, ?, ?, ?)', (ts, ts_ms, actor, action, details))
+            conn.commit()
     except Exception as e:
         try:
             logger.exception('write_audit failed: %s', e)
@@ -129,18 +591,15 @@ def write_approval(event: dict):
     Best-effort: does not raise on failure.
     """
     try:
-        init_db()
-        conn = _connect()
-        cur = conn.cursor()
         ts = event.get('timestamp') or (datetime.utcnow().isoformat() + 'Z')
         et = event.get('type')
         task_id = event.get('task_id')
         request_id = event.get('request_id') or (event.get('payload') or {}).get('request_id')
         trace_id = event.get('trace_id') or (event.get('payload') or {}).get('trace_id')
         payload = json.dumps(event.get('payload') or {}, ensure_ascii=False)
-        cur.execute('INSERT INTO approvals (timestamp, event_type, task_id, request_id, trace_id, payload) VALUES (?, ?, ?, ?, ?, ?)', (ts, et, task_id, request_id, trace_id, payload))
-        conn.commit()
-        conn.close()
+        with _pooled() as conn:
+            conn.execute('INSERT INTO approvals (timestamp, event_type, task_id, request_id, trace_id, payload) VALUES (?, ?, ?, ?, ?, ?)', (ts, et, task_id, request_id, trace_id, payload))
+            conn.commit()
     except Exception as e:
         try:
             logger.exception('write_approval failed: %s', e)
@@ -148,134 +607,1069 @@ def write_approval(event: dict):
             pass
 
 
-def enqueue_task(task_type: str, payload: dict) -> int:
-    init_db()
-    conn = _connect()
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat() + 'Z'
-    cur.execute('INSERT INTO queue (created_at, task_type, payload, status) VALUES (?, ?, ?, ?)', (now, task_type, json.dumps(payload, ensure_ascii=False), 'pending'))
-    task_id = cur.lastrowid
-    conn.commit()
-    conn.close()
+_INSERT_TASK_SQL = ('INSERT OR IGNORE INTO queue (created_at, created_at_ms, task_type, payload, status, priority, '
+                    'not_before_ms, rank_ms, dedup_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+
+
+def _insert_deduped(cur, row, dedup_key, cutoff_ms):
+    """Insert `row` under `dedup_key`, or return the id already holding the key.
+
+    Returns (task_id, inserted). A holder created at or before `cutoff_ms` is
+    outside the window and gives the key up first, so the unique index only
+    blocks keys that are still fresh.
+    """
+    cur.execute('UPDATE queue SET dedup_key = NULL WHERE dedup_key = ? AND created_at_ms <= ?', (dedup_key, cutoff_ms))
+    cur.execute(_INSERT_TASK_SQL, row)
+    if cur.rowcount:
+        return cur.lastrowid, True
+    return cur.execute('SELECT id FROM queue WHERE dedup_key = ?', (dedup_key,)).fetchone()[0], False
+
+
+def _link_parents(cur, task_id, parents, now, now_ms):
+    """Make freshly inserted `task_id` wait for `parents` (inside its transaction).
+
+    Completed parents are already satisfied; the task is 'blocked' until the
+    rest complete and fails at once if a parent has failed. Raises ValueError
+    for unknown parent ids.
+    """
+    marks = ','.join('?' * len(parents))
+    found = dict(cur.execute(f'SELECT id, status FROM queue WHERE id IN ({marks})', parents).fetchall())
+    missing = [p for p in parents if p not in found]
+    if missing:
+        found.update(cur.execute(f"SELECT id, status FROM queue_archive WHERE id IN ({','.join('?' * len(missing))})", missing).fetchall())
+    unknown = [p for p in parents if p not in found]
+    if unknown:
+        raise ValueError(f'unknown parent task ids: {unknown}')
+    if any(found[p] == 'failed' for p in parents):
+        cur.execute("UPDATE queue SET status = 'failed', finished_at = ?, finished_at_ms = ?, result = ? WHERE id = ?",
+                    (now, now_ms, json.dumps({'error': 'dependency_failed'}), task_id))
+        cur.executemany('INSERT OR IGNORE INTO dead_letter_deps (parent_id, child_id) VALUES (?, ?)',
+                        [(p, task_id) for p in parents if found[p] != 'completed'])
+        _record_dead_letters(cur, [(task_id, 'dependency_failed')], now, now_ms)
+        return 'failed'
+    waiting = [p for p in parents if found[p] != 'completed']
+    if not waiting:
+        return 'pending'
+    cur.executemany('INSERT INTO task_deps (parent_id, child_id) VALUES (?, ?)', [(p, task_id) for p in waiting])
+    cur.execute("UPDATE queue SET status = 'blocked', pending_deps = ? WHERE id = ?", (len(waiting), task_id))
+    return 'blocked'
+
+
+def _has_dependents(cur) -> bool:
+    return cur.execute('SELECT EXISTS (SELECT 1 FROM task_deps)').fetchone()[0] == 1
+
+
+def _release_children(cur, parent_ids) -> int:
+    """Count completed `parent_ids` off their children; unblock those now free.
+
+    Runs in the completing transaction so a child becomes claimable exactly
+    when its last parent commits. Returns the number of released tasks.
+    """
+    params = [(p,) for p in parent_ids]
+    cur.executemany('UPDATE queue SET pending_deps = pending_deps - 1 '
+                    'WHERE id IN (SELECT child_id FROM task_deps WHERE parent_id = ?)', params)
+    cur.executemany('DELETE FROM task_deps WHERE parent_id = ?', params)
+    cur.execute("UPDATE queue SET status = 'pending' WHERE status = 'blocked' AND pending_deps <= 0")
+    return cur.rowcount
+
+
+def _record_dead_letters(cur, items, now, now_ms):
+    """Add failed tasks to `dead_letters`, appending to any earlier history.
+
+    `items` is a list of `(task_id, error_str)`; runs inside the failing
+    transaction so every failed task is findable for replay.
+    """
+    errors = dict(items)
+    ids = list(errors)
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        rows = cur.execute(
+            'SELECT q.id, q.task_type, q.owner, COALESCE(q.reclaim_attempts, 0), d.attempts, d.history '
+            f"FROM queue q LEFT JOIN dead_letters d ON d.task_id = q.id WHERE q.id IN ({','.join('?' * len(chunk))})",
+            chunk).fetchall()
+        params = []
+        for task_id, task_type, owner, reclaims, attempts, history in rows:
+            history = json.loads(history) if history else []
+            history.append({'at': now, 'error': errors[task_id], 'owner': owner, 'reclaims': reclaims})
+            params.append((task_id, task_type, errors[task_id], (attempts or 0) + 1, json.dumps(history, ensure_ascii=False), now, now_ms))
+        cur.executemany('INSERT OR REPLACE INTO dead_letters (task_id, task_type, error, attempts, history, failed_at, failed_at_ms, replayed_at_ms) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, NULL)', params)
+
+
+def _fail_dependents(cur, parent_ids, now, now_ms) -> list:
+    """Fail every blocked descendant of failed `parent_ids`; returns their ids."""
+    parent_ids = list(parent_ids)
+    marks = ','.join('?' * len(parent_ids))
+    failed = [r[0] for r in cur.execute(
+        f"WITH RECURSIVE d(id) AS (SELECT child_id FROM task_deps WHERE parent_id IN ({marks}) "
+        "UNION SELECT t.child_id FROM task_deps t JOIN d ON t.parent_id = d.id) "
+        "SELECT id FROM queue WHERE status = 'blocked' AND id IN (SELECT id FROM d)", parent_ids).fetchall()]
+    result = json.dumps({'error': 'dependency_failed'})
+    cur.executemany("UPDATE queue SET status = 'failed', finished_at = ?, finished_at_ms = ?, result = ? WHERE id = ?",
+                    [(now, now_ms, result, task_id) for task_id in failed])
+    # park every edge into the failed tasks, including ones from parents that
+    # are still running, so a replay of the parent can restore them
+    cur.executemany('INSERT OR IGNORE INTO dead_letter_deps (parent_id, child_id) SELECT parent_id, child_id FROM task_deps WHERE child_id = ?',
+                    [(task_id,) for task_id in failed])
+    cur.executemany('DELETE FROM task_deps WHERE child_id = ?', [(task_id,) for task_id in failed])
+    cur.executemany('DELETE FROM task_deps WHERE parent_id = ?', [(p,) for p in parent_ids])
+    _record_dead_letters(cur, [(task_id, 'dependency_failed') for task_id in failed], now, now_ms)
+    return failed
+
+
+def enqueue_task(task_type: str, payload: dict, priority: int = 0, delay_seconds: float = 0,
+                 dedup_key: str = None, dedup_window_seconds: float = None, depends_on=None) -> int:
+    """Add a pending task and return its id.
+
+    Higher `priority` is claimed first (see PRIORITY_AGING_MS). A positive
+    `delay_seconds` keeps the task invisible to claimers until it elapses,
+    e.g. to schedule a retry.
+
+    With a `dedup_key` (e.g. `agent_utils.idempotency_key(...)`) the enqueue
+    is idempotent: while a task enqueued under the same key is younger than
+    `dedup_window_seconds` (default DEDUP_WINDOW_MS) its id is returned and
+    nothing is inserted.
+
+    `depends_on` lists parent task ids: the task stays 'blocked' (never
+    claimed) until every parent has completed, and is released in the
+    transaction that completes the last one. If a parent fails, the task
+    and its own dependents fail with `dependency_failed`.
+    """
+    parents = sorted({int(p) for p in depends_on}) if depends_on else []
+    now, now_ms = _stamp()
+    visible_ms = now_ms + int(delay_seconds * 1000) if delay_seconds and delay_seconds > 0 else None
+    rank_ms = (visible_ms or now_ms) - int(priority) * PRIORITY_AGING_MS
+    window_ms = DEDUP_WINDOW_MS if dedup_window_seconds is None else int(dedup_window_seconds * 1000)
+    row = (now, now_ms, task_type, json.dumps(payload, ensure_ascii=False), 'pending', int(priority), visible_ms, rank_ms, dedup_key)
+    with _pooled() as conn:
+        cur = conn.cursor()
+        if dedup_key or parents:
+            _begin_immediate(cur)
+        if dedup_key:
+            task_id, inserted = _insert_deduped(cur, row, dedup_key, now_ms - window_ms)
+        else:
+            cur.execute(_INSERT_TASK_SQL, row)
+            task_id, inserted = cur.lastrowid, True
+        status = _link_parents(cur, task_id, parents, now, now_ms) if inserted and parents else 'pending'
+        conn.commit()
+    if inserted and status == 'pending':
+        _notify_waiters()
     return task_id
 
 
-def claim_task(worker_id: str):
-    """Atomically claim the oldest pending task and mark it in-progress.
+def enqueue_tasks(items, priority: int = 0, delay_seconds: float = 0) -> list:
+    """Insert many pending tasks in one transaction and return their ids.
 
-    Returns the task row as a dict or None when no pending tasks.
+    `items` is an iterable of `(task_type, payload)` pairs, or
+    `(task_type, payload, dedup_key)` triples for idempotent items;
+    `priority` and `delay_seconds` apply to the whole batch (see
+    `enqueue_task`). Ids are returned in input order; a deduplicated item
+    gets the id of the task already holding its key.
     """
-    init_db()
-    conn = _connect()
-    cur = conn.cursor()
-    try:
+    now, now_ms = _stamp()
+    visible_ms = now_ms + int(delay_seconds * 1000) if delay_seconds and delay_seconds > 0 else None
+    rank_ms = (visible_ms or now_ms) - int(priority) * PRIORITY_AGING_MS
+    rows, keys = [], []
+    for item in items:
+        task_type, payload = item[0], item[1]
+        key = item[2] if len(item) > 2 else None
+        rows.append((now, now_ms, task_type, json.dumps(payload, ensure_ascii=False), 'pending', int(priority), visible_ms, rank_ms, key))
+        keys.append(key)
+    if not rows:
+        return []
+    with _pooled() as conn:
+        cur = conn.cursor()
+        _begin_immediate(cur)
+        if not any(keys):
+            # under the write lock nobody else inserts, and an INTEGER PRIMARY KEY
+            # assigns max(id) + 1, so the new ids are the range after the maximum
+            first = cur.execute('SELECT COALESCE(MAX(id), 0) FROM queue').fetchone()[0] + 1
+            cur.executemany(_INSERT_TASK_SQL, rows)
+            ids, inserted = list(range(first, first + len(rows))), True
+        else:
+            ids, inserted = [], False
+            for row, key in zip(rows, keys):
+                if key:
+                    task_id, new = _insert_deduped(cur, row, key, now_ms - DEDUP_WINDOW_MS)
+                else:
+                    cur.execute(_INSERT_TASK_SQL, row)
+                    task_id, new = cur.lastrowid, True
+                ids.append(task_id)
+                inserted = inserted or new
+        conn.commit()
+    if inserted:
+        _notify_waiters()
+    return ids
+
+
+def claim_task(worker_id: str, lease_seconds: float = None, task_types=None):
+    """Atomically claim the best-ranked visible pending task and mark it in-progress.
+
+    `task_types` restricts the claim to those types. Returns the task row as a
+    dict or None when no pending tasks.
+    """
+    tasks = claim_tasks(worker_id, 1, lease_seconds=lease_seconds, task_types=task_types)
+    return tasks[0] if tasks else None
+
+
+def _refill(tokens, refilled_ms, rate_per_s, now_ms):
+    """Token-bucket level at `now_ms`; the bucket holds at most max(1, rate) tokens."""
+    cap = max(1.0, rate_per_s)
+    if tokens is None or refilled_ms is None:
+        return cap
+    return min(cap, tokens + (now_ms - refilled_ms) / 1000.0 * rate_per_s)
+
+
+def _claim_budgets(cur, now_ms):
+    """Per-type claim budgets from `task_type_limits` ({} when nothing is capped).
+
+    Must run inside the claim transaction so in-flight counts and bucket
+    levels cannot change underneath the claimer.
+    """
+    limits = cur.execute('SELECT task_type, max_in_flight, rate_per_s, tokens, refilled_ms FROM task_type_limits').fetchall()
+    if not limits:
+        return {}
+    capped = [r[0] for r in limits if r[1] is not None]
+    in_flight = {}
+    if capped:
+        marks = ','.join('?' * len(capped))
+        in_flight = dict(cur.execute(
+            f"SELECT task_type, COUNT(*) FROM queue WHERE status = 'in_progress' AND task_type IN ({marks}) GROUP BY task_type",
+            capped).fetchall())
+    budgets = {}
+    for task_type, max_in_flight, rate_per_s, tokens, refilled_ms in limits:
+        budget = None
+        if max_in_flight is not None:
+            budget = max(0, max_in_flight - in_flight.get(task_type, 0))
+        if rate_per_s is not None:
+            allowed = int(_refill(tokens, refilled_ms, rate_per_s, now_ms))
+            budget = allowed if budget is None else min(budget, allowed)
+        if budget is not None:
+            budgets[task_type] = budget
+    return budgets
+
+
+def set_task_type_limit(task_type: str, max_in_flight: int = None, rate_per_s: float = None):
+    """Cap `task_type` at `max_in_flight` running tasks and `rate_per_s` claims/sec.
+
+    Limits are cluster-wide: every claimer checks them in its claim
+    transaction. Passing both as None removes the limit.
+    """
+    with _pooled() as conn:
+        if max_in_flight is None and rate_per_s is None:
+            conn.execute('DELETE FROM task_type_limits WHERE task_type = ?', (task_type,))
+        else:
+            conn.execute('INSERT OR REPLACE INTO task_type_limits (task_type, max_in_flight, rate_per_s, tokens, refilled_ms) '
+                         'VALUES (?, ?, ?, NULL, NULL)', (task_type, max_in_flight, rate_per_s))
+        conn.commit()
+
+
+def list_task_type_limits() -> dict:
+    """Return {task_type: {'max_in_flight', 'rate_per_s'}} for every limited type."""
+    with _pooled() as conn:
+        rows = conn.execute('SELECT task_type, max_in_flight, rate_per_s FROM task_type_limits ORDER BY task_type').fetchall()
+    return {r[0]: {'max_in_flight': r[1], 'rate_per_s': r[2]} for r in rows}
+
+
+def claim_tasks(worker_id: str, n: int, lease_seconds: float = None, task_types=None) -> list:
+    """Atomically claim up to `n` visible pending tasks, best rank first.
+
+    Rank is priority-aged visibility time (see `enqueue_task`). All rows are
+    claimed under a single write lock, so a worker refilling many slots pays
+    for one transaction instead of one per task. Returns a list of task dicts
+    in claim order (empty when nothing is ready).
+
+    With `lease_seconds` the tasks carry a lease that the claimer must renew
+    with `heartbeat`; the reclaimer then takes them back only once the lease
+    expires instead of after a fixed TTL.
+
+    `task_types` limits the claim to those types (for specialised workers).
+    Types listed in `task_type_limits` are only claimed while under their
+    in-flight cap and token-bucket rate; the check and the claim share one
+    write lock, so the caps hold across all workers.
+    """
+    if n <= 0:
+        return []
+    now, now_ms = _stamp()
+    lease_ms = now_ms + int(lease_seconds * 1000) if lease_seconds else None
+    task_types = list(task_types) if task_types else None
+    with _pooled() as conn:
+        cur = conn.cursor()
         # lock the DB to avoid races in concurrent claimers
-        cur.execute('BEGIN IMMEDIATE')
-        cur.execute("SELECT id, created_at, task_type, payload FROM queue WHERE status = 'pending' ORDER BY created_at LIMIT 1")
-        row = cur.fetchone()
-        if not row:
-            conn.commit()
-            return None
-        task_id = row[0]
-        now = datetime.utcnow().isoformat() + 'Z'
-        cur.execute('UPDATE queue SET status = ?, owner = ?, started_at = ? WHERE id = ?', ('in_progress', worker_id, now, task_id))
+        _begin_immediate(cur)
+        budgets = _claim_budgets(cur, now_ms)
+        # the pick walks idx_queue_claim in rank order, skipping only
+        # delayed rows that are not visible yet, so its cost does not grow
+        # with the number of completed rows
+        where = "status = 'pending' AND (not_before_ms IS NULL OR not_before_ms <= ?)"
+        params = [now_ms]
+        if task_types:
+            where += f" AND task_type IN ({','.join('?' * len(task_types))})"
+            params += task_types
+        exhausted = [t for t, b in budgets.items() if b <= 0]
+        if any(b > 0 for b in budgets.values()):
+            # some candidates are capped: take ranked rows while their type
+            # still has budget; when a type runs out, re-run the LIMIT-ed
+            # pick with it excluded so its backlog is never walked row by row
+            left = dict(budgets)
+            ids = []
+            while len(ids) < n:
+                w, wp = where, list(params)
+                if exhausted:
+                    w += f" AND task_type NOT IN ({','.join('?' * len(exhausted))})"
+                    wp += exhausted
+                if ids:
+                    w += f" AND id NOT IN ({','.join('?' * len(ids))})"
+                    wp += ids
+                ran_out = False
+                for task_id, task_type in cur.execute(
+                        f'SELECT id, task_type FROM queue WHERE {w} ORDER BY rank_ms LIMIT ?', wp + [n - len(ids)]).fetchall():
+                    ids.append(task_id)
+                    if task_type in left:
+                        left[task_type] -= 1
+                        if left[task_type] <= 0:
+                            exhausted.append(task_type)
+                            ran_out = True
+                            break
+                if not ran_out:
+                    break
+            pick, pick_params = ','.join('?' * len(ids)) or 'NULL', ids
+        else:
+            if exhausted:
+                where += f" AND task_type NOT IN ({','.join('?' * len(exhausted))})"
+                params += exhausted
+            left = None
+            pick, pick_params = f'SELECT id FROM queue WHERE {where} ORDER BY rank_ms LIMIT ?', params + [n]
+        if _HAS_RETURNING:
+            cur.execute(
+                "UPDATE queue SET status = 'in_progress', owner = ?, started_at = ?, started_at_ms = ?, lease_expires_ms = ? "
+                f"WHERE id IN ({pick}) "
+                "RETURNING id, created_at, task_type, payload, rank_ms",
+                [worker_id, now, now_ms, lease_ms] + pick_params)
+            rows = cur.fetchall()
+        else:
+            cur.execute(f"SELECT id, created_at, task_type, payload, rank_ms FROM queue WHERE id IN ({pick})", pick_params)
+            rows = cur.fetchall()
+            cur.executemany('UPDATE queue SET status = ?, owner = ?, started_at = ?, started_at_ms = ?, lease_expires_ms = ? WHERE id = ?', [('in_progress', worker_id, now, now_ms, lease_ms, r[0]) for r in rows])
+        if left is not None:
+            # spend one token per claimed task of a rate-limited type
+            taken = {}
+            for r in rows:
+                taken[r[2]] = taken.get(r[2], 0) + 1
+            for task_type, rate_per_s, tokens, refilled_ms in cur.execute(
+                    'SELECT task_type, rate_per_s, tokens, refilled_ms FROM task_type_limits WHERE rate_per_s IS NOT NULL').fetchall():
+                if task_type in taken:
+                    level = _refill(tokens, refilled_ms, rate_per_s, now_ms) - taken[task_type]
+                    cur.execute('UPDATE task_type_limits SET tokens = ?, refilled_ms = ? WHERE task_type = ?', (level, now_ms, task_type))
         conn.commit()
-        # return task
-        return {'id': task_id, 'created_at': row[1], 'task_type': row[2], 'payload': json.loads(row[3])}
-    finally:
-        conn.close()
+    # RETURNING does not guarantee order
+    rows.sort(key=lambda r: (r[4] or 0, r[0]))
+    return [{'id': r[0], 'created_at': r[1], 'task_type': r[2], 'payload': json.loads(r[3])} for r in rows]
+
+
+def heartbeat(worker_id: str, task_ids, lease_seconds: float) -> int:
+    """Extend the lease of `worker_id`'s in-flight tasks by `lease_seconds`.
+
+    One UPDATE renews every listed task. Tasks no longer owned by the worker
+    (reclaimed, finished) are skipped; returns the number of leases renewed.
+    """
+    ids = [int(i) for i in task_ids]
+    if not ids:
+        return 0
+    lease_ms = _stamp()[1] + int(lease_seconds * 1000)
+    marks = ','.join('?' * len(ids))
+    with _pooled() as conn:
+        cur = conn.execute(
+            f"UPDATE queue SET lease_expires_ms = ? WHERE status = 'in_progress' AND owner = ? AND id IN ({marks})",
+            [lease_ms, worker_id] + ids)
+        conn.commit()
+        return cur.rowcount
 
 
 def complete_task(task_id: int, result: dict):
-    init_db()
-    conn = _connect()
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat() + 'Z'
-    cur.execute('UPDATE queue SET status = ?, finished_at = ?, result = ? WHERE id = ?', ('completed', now, json.dumps(result, ensure_ascii=False), task_id))
-    conn.commit()
-    conn.close()
+    complete_tasks([(task_id, result)])
+
+
+def _store_result_blob(data: bytes) -> dict:
+    """Write `data` compressed under RESULTS_DIR, named by its sha256.
+
+    Identical results share one file; an existing file is never rewritten.
+    The write goes through a temp file and rename so readers never see a
+    partial blob.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    ref = f'{digest[:2]}/{digest}.json.z'
+    path = os.path.join(RESULTS_DIR, digest[:2], f'{digest}.json.z')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(data))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    return {'sha256': digest, 'size': len(data), 'ref': ref}
+
+
+def _encode_result(result) -> str:
+    """JSON for the `result` column, moving oversized results out of row."""
+    text = json.dumps(result, ensure_ascii=False)
+    # at most 4 UTF-8 bytes per character: skip the encode for small results
+    if len(text) * 4 <= RESULT_INLINE_MAX_BYTES:
+        return text
+    data = text.encode('utf-8')
+    if len(data) <= RESULT_INLINE_MAX_BYTES:
+        return text
+    return json.dumps({'$blob': _store_result_blob(data)})
+
+
+def complete_tasks(items):
+    """Mark several tasks completed in one transaction.
+
+    `items` is an iterable of `(task_id, result_dict)` pairs. Dependents
+    whose last parent is among them become claimable in the same transaction.
+    Results larger than RESULT_INLINE_MAX_BYTES are stored out of row (see
+    `read_result`); the files are written before the write lock is taken.
+    """
+    now, now_ms = _stamp()
+    params = [('completed', now, now_ms, _encode_result(result), task_id) for task_id, result in items]
+    if not params:
+        return
+    released = 0
+    with _pooled() as conn:
+        cur = conn.cursor()
+        _begin_immediate(cur)
+        cur.executemany('UPDATE queue SET status = ?, finished_at = ?, finished_at_ms = ?, result = ? WHERE id = ?', params)
+        if _has_dependents(cur):
+            released = _release_children(cur, [p[-1] for p in params])
+        conn.commit()
+    if released:
+        _notify_waiters()
 
 
 def fail_task(task_id: int, error: str):
-    init_db()
-    conn = _connect()
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat() + 'Z'
-    cur.execute('UPDATE queue SET status = ?, finished_at = ?, result = ? WHERE id = ?', ('failed', now, json.dumps({'error': error}, ensure_ascii=False), task_id))
-    conn.commit()
-    conn.close()
+    fail_tasks([(task_id, error)])
 
 
-def list_tasks(status: str = None):
-    init_db()
-    conn = _connect()
-    cur = conn.cursor()
-    if status:
-        cur.execute('SELECT id, created_at, task_type, status, owner FROM queue WHERE status = ? ORDER BY created_at', (status,))
-    else:
-        cur.execute('SELECT id, created_at, task_type, status, owner FROM queue ORDER BY created_at')
-    rows = cur.fetchall()
-    conn.close()
+def fail_tasks(items):
+    """Mark several tasks failed in one transaction.
+
+    `items` is an iterable of `(task_id, error_str)` pairs. Blocked
+    dependents of the failed tasks fail with them. Every failed task is
+    recorded in `dead_letters` (see `replay_dead_letters`).
+    """
+    now, now_ms = _stamp()
+    items = [(task_id, str(error)) for task_id, error in items]
+    params = [('failed', now, now_ms, json.dumps({'error': error}, ensure_ascii=False), task_id) for task_id, error in items]
+    if not params:
+        return
+    with _pooled() as conn:
+        cur = conn.cursor()
+        _begin_immediate(cur)
+        cur.executemany('UPDATE queue SET status = ?, finished_at = ?, finished_at_ms = ?, result = ? WHERE id = ?', params)
+        _record_dead_letters(cur, items, now, now_ms)
+        if _has_dependents(cur):
+            _fail_dependents(cur, [p[-1] for p in params], now, now_ms)
+        conn.commit()
+
+
+def list_tasks(status: str = None, include_archived: bool = False):
+    """List tasks (id, created_at, task_type, status, owner) oldest first.
+
+    Only the hot `queue` table is read unless `include_archived` is set.
+    """
+    cols = 'id, created_at, task_type, status, owner, created_at_ms'
+    where, params = ('WHERE status = ?', (status,)) if status else ('', ())
+    sql = f'SELECT {cols} FROM queue {where}'
+    if include_archived:
+        sql = f'{sql} UNION ALL SELECT {cols} FROM queue_archive {where}'
+        params = params * 2
+    with _pooled() as conn:
+        rows = conn.execute(f'{sql} ORDER BY created_at_ms, id', params).fetchall()
     return [{'id': r[0], 'created_at': r[1], 'task_type': r[2], 'status': r[3], 'owner': r[4]} for r in rows]
 
 
-def reclaim_stale_tasks(ttl_seconds: int = 300, max_attempts: int = 3) -> int:
-    """Reclaim tasks stuck in 'in_progress' longer than `ttl_seconds`.
+def count_tasks() -> dict:
+    """Return {status: count} for the hot queue without materialising rows."""
+    with _pooled() as conn:
+        rows = conn.execute('SELECT status, COUNT(*) FROM queue GROUP BY status').fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8')) if blob is not None else None
+
 
-    Moves stale tasks back to 'pending' and clears `owner` and `started_at` so
-    they can be claimed again. Returns the number of reclaimed tasks.
+def get_task(task_id: int):
+    """Return one task with decoded payload and result, or None.
+
+    Looks in the hot table first and falls back to `queue_archive`; the
+    returned dict carries `archived: True` for cold rows.
     """
-    init_db()
-    conn = _connect()
-    cur = conn.cursor()
-    cur.execute("SELECT id, started_at FROM queue WHERE status = 'in_progress'")
-    rows = cur.fetchall()
-    now = datetime.utcnow()
-    reclaimed = []
-    for row in rows:
-        task_id, started_at = row
-        reclaim = False
-        if not started_at:
-            reclaim = True
-        else:
-            try:
-                s = started_at.rstrip('Z')
-                st = datetime.fromisoformat(s)
-                if (now - st).total_seconds() > ttl_seconds:
-                    reclaim = True
-            except Exception:
-                reclaim = True
+    with _pooled() as conn:
+        r = conn.execute('SELECT id, created_at, task_type, status, owner, started_at, finished_at, payload, result FROM queue WHERE id = ?', (task_id,)).fetchone()
+        if r:
+            return {'id': r[0], 'created_at': r[1], 'task_type': r[2], 'status': r[3], 'owner': r[4], 'started_at': r[5],
+                    'finished_at': r[6], 'payload': json.loads(r[7]) if r[7] else None, 'result': json.loads(r[8]) if r[8] else None,
+                    'archived': False}
+        r = conn.execute('SELECT id, created_at, task_type, status, owner, started_at, finished_at, payload_z, result_z FROM queue_archive WHERE id = ?', (task_id,)).fetchone()
+    if not r:
+        return None
+    return {'id': r[0], 'created_at': r[1], 'task_type': r[2], 'status': r[3], 'owner': r[4], 'started_at': r[5],
+            'finished_at': r[6], 'payload': _unpack(r[7]), 'result': _unpack(r[8]), 'archived': True}
+
+
+def _blob_ref(result):
+    if isinstance(result, dict) and len(result) == 1 and isinstance(result.get('$blob'), dict):
+        return result['$blob']
+    return None
+
+
+def iter_result(task_id: int, chunk_size: int = 64 * 1024):
+    """Yield the result JSON of `task_id` as UTF-8 byte chunks.
+
+    Out-of-row results are decompressed incrementally, so memory stays
+    bounded by `chunk_size` whatever the result size. Yields nothing when the
+    task or its result does not exist.
+    """
+    task = get_task(task_id)
+    result = task.get('result') if task else None
+    if result is None:
+        return
+    ref = _blob_ref(result)
+    if ref is None:
+        yield json.dumps(result, ensure_ascii=False).encode('utf-8')
+        return
+    d = zlib.decompressobj()
+    with open(os.path.join(RESULTS_DIR, *ref['ref'].split('/')), 'rb') as f:
+        while True:
+            raw = f.read(chunk_size)
+            if not raw:
+                break
+            # cap each inflate at chunk_size; the rest of the input waits in
+            # unconsumed_tail, so a highly compressible blob cannot balloon
+            while raw:
+                out = d.decompress(raw, chunk_size)
+                if out:
+                    yield out
+                raw = d.unconsumed_tail
+    while not d.eof:
+        out = d.decompress(b'', chunk_size)
+        if not out:
+            break
+        yield out
+    tail = d.flush()
+    if tail:
+        yield tail
+
+
+def read_result(task_id: int):
+    """Return the decoded result of `task_id`, loading out-of-row blobs.
+
+    Raises ValueError if a blob does not match its recorded digest.
+    """
+    task = get_task(task_id)
+    result = task.get('result') if task else None
+    ref = _blob_ref(result)
+    if ref is None:
+        return result
+    data = b''.join(iter_result(task_id))
+    if hashlib.sha256(data).hexdigest() != ref['sha256']:
+        raise ValueError(f'result blob for task {task_id} is corrupt')
+    return json.loads(data.decode('utf-8'))
+
+
+def result_head(task_id: int, max_bytes: int = 4096) -> str:
+    """First `max_bytes` of the result JSON, reading only as far as needed."""
+    buf = bytearray()
+    for chunk in iter_result(task_id):
+        buf += chunk
+        if len(buf) >= max_bytes:
+            break
+    return bytes(buf[:max_bytes]).decode('utf-8', errors='replace')
+
+
+def result_tail(task_id: int, max_bytes: int = 4096) -> str:
+    """Last `max_bytes` of the result JSON, holding at most one chunk extra."""
+    buf = bytearray()
+    for chunk in iter_result(task_id):
+        buf += chunk
+        if len(buf) > max_bytes:
+            del buf[:len(buf) - max_bytes]
+    return bytes(buf).decode('utf-8', errors='replace')
+
+
+def archive_tasks(older_than_seconds: float = 7 * 86400, batch_size: int = 500, max_batches: int = None) -> int:
+    """Move completed/failed tasks finished more than `older_than_seconds` ago
+    into `queue_archive`, compressing payload and result.
+
+    Works in batches of `batch_size`, each its own short write transaction, so
+    claimers are never blocked for long. Stops after `max_batches` batches
+    when given. Returns the number of archived tasks.
+    """
+    cutoff_ms = _stamp()[1] - int(older_than_seconds * 1000)
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with _pooled() as conn:
+            cur = conn.cursor()
+            _begin_immediate(cur)
+            # never archive the newest row: without AUTOINCREMENT SQLite hands
+            # out MAX(id) + 1, so removing it would let new tasks reuse an id
+            # that already exists in the archive
+            cur.execute(
+                "SELECT id, created_at, created_at_ms, task_type, status, owner, started_at, finished_at, finished_at_ms, "
+                "reclaim_attempts, payload, result FROM queue "
+                "WHERE status IN ('completed', 'failed') AND finished_at_ms <= ? AND id < (SELECT MAX(id) FROM queue) "
+                "LIMIT ?", (cutoff_ms, batch_size))
+            rows = cur.fetchall()
+            if not rows:
+                conn.commit()
+                break
+            archived_ms = _stamp()[1]
+            cur.executemany(
+                'INSERT OR REPLACE INTO queue_archive (id, created_at, created_at_ms, task_type, status, owner, started_at, finished_at, '
+                'finished_at_ms, reclaim_attempts, archived_at_ms, payload_z, result_z) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [r[:10] + (archived_ms,
+                           zlib.compress(r[10].encode('utf-8')) if r[10] is not None else None,
+                           zlib.compress(r[11].encode('utf-8')) if r[11] is not None else None) for r in rows])
+            cur.executemany('DELETE FROM queue WHERE id = ?', [(r[0],) for r in rows])
+            conn.commit()
+        total += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+    if total:
+        logger.info('archived %s finished tasks', total)
+    return total
 
-        if not reclaim:
+
+def _dead_letter_filter(task_ids=None, task_type=None, error=None):
+    """WHERE clause and params selecting un-replayed dead letters."""
+    where = 'replayed_at_ms IS NULL'
+    params = []
+    if task_ids is not None:
+        task_ids = [int(i) for i in task_ids]
+        where += f" AND task_id IN ({','.join('?' * len(task_ids)) or 'NULL'})"
+        params += task_ids
+    if task_type:
+        where += ' AND task_type = ?'
+        params.append(task_type)
+    if error:
+        where += " AND error LIKE ? ESCAPE '\\'"
+        params.append('%' + error.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+    return where, params
+
+
+def list_dead_letters(task_type: str = None, error: str = None, limit: int = 100) -> list:
+    """Return failed tasks awaiting replay, newest failure first.
+
+    Filter by exact `task_type` and/or a substring of the last `error`. Each
+    dict carries `attempts` and the full failure `history`.
+    """
+    where, params = _dead_letter_filter(task_type=task_type, error=error)
+    with _pooled() as conn:
+        rows = conn.execute(
+            f'SELECT task_id, task_type, error, attempts, history, failed_at FROM dead_letters WHERE {where} '
+            'ORDER BY failed_at_ms DESC, task_id DESC LIMIT ?', params + [int(limit)]).fetchall()
+    return [{'task_id': r[0], 'task_type': r[1], 'error': r[2], 'attempts': r[3], 'history': json.loads(r[4]) if r[4] else [],
+             'failed_at': r[5]} for r in rows]
+
+
+def count_dead_letters() -> dict:
+    """Return {task_type: count} of dead letters awaiting replay."""
+    with _pooled() as conn:
+        rows = conn.execute('SELECT task_type, COUNT(*) FROM dead_letters WHERE replayed_at_ms IS NULL GROUP BY task_type').fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def _task_statuses(cur, ids) -> dict:
+    """{id: status} for `ids`, looking in `queue_archive` for ids not in the hot table."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    found = dict(cur.execute(f"SELECT id, status FROM queue WHERE id IN ({','.join('?' * len(ids))})", ids).fetchall())
+    missing = [i for i in ids if i not in found]
+    if missing:
+        found.update(cur.execute(f"SELECT id, status FROM queue_archive WHERE id IN ({','.join('?' * len(missing))})", missing).fetchall())
+    return found
+
+
+def _unarchive_failed(cur, pick, params):
+    """Move the failed archived tasks selected by `pick` back into the hot table."""
+    archived = cur.execute(
+        f"SELECT id, created_at, created_at_ms, task_type, payload_z FROM queue_archive WHERE status = 'failed' AND id IN ({pick})",
+        params).fetchall()
+    if archived:
+        cur.executemany("INSERT INTO queue (id, created_at, created_at_ms, task_type, payload, status, priority) VALUES (?, ?, ?, ?, ?, 'failed', 0)",
+                        [r[:4] + (zlib.decompress(r[4]).decode('utf-8') if r[4] is not None else None,) for r in archived])
+        cur.executemany('DELETE FROM queue_archive WHERE id = ?', [(r[0],) for r in archived])
+
+
+def _restore_dependents(cur, parent_ids, forced, now_ms) -> list:
+    """Bring back `dependency_failed` tasks below the just-replayed `parent_ids`.
+
+    Walks `dead_letter_deps` down from the parents. A child none of whose
+    parents is still failed goes back to 'blocked' on its unfinished parents
+    ('pending' when none is left), and its own children are visited next.
+    `forced` ids were asked for by id or error: they come back even while a
+    parent is still failed, and stop waiting for that parent. Returns the
+    restored ids.
+    """
+    restored, force = [], set(forced)
+    frontier, todo = list(parent_ids), list(forced)
+    while frontier or todo:
+        for p in frontier:
+            todo += [r[0] for r in cur.execute('SELECT child_id FROM dead_letter_deps WHERE parent_id = ?', (p,)).fetchall()]
+        frontier = []
+        for child in dict.fromkeys(todo):
+            _unarchive_failed(cur, '?', [child])
+            if cur.execute("SELECT 1 FROM queue WHERE id = ? AND status = 'failed'", (child,)).fetchone() is None:
+                continue
+            parents = [r[0] for r in cur.execute('SELECT parent_id FROM dead_letter_deps WHERE child_id = ?', (child,)).fetchall()]
+            statuses = _task_statuses(cur, parents)
+            if child not in force and any(statuses.get(p) == 'failed' for p in parents):
+                # still cut off; a later replay of that parent revisits it
+                continue
+            waiting = [p for p in parents if statuses.get(p) not in (None, 'completed', 'failed')]
+            cur.execute(
+                "UPDATE queue SET status = ?, pending_deps = ?, owner = NULL, started_at = NULL, started_at_ms = NULL, finished_at = NULL, "
+                "finished_at_ms = NULL, result = NULL, lease_expires_ms = NULL, reclaim_attempts = 0, not_before_ms = NULL, "
+                "rank_ms = ? - COALESCE(priority, 0) * ? WHERE id = ?",
+                ('blocked' if waiting else 'pending', len(waiting) or None, now_ms, PRIORITY_AGING_MS, child))
+            cur.executemany('INSERT OR IGNORE INTO task_deps (parent_id, child_id) VALUES (?, ?)', [(p, child) for p in waiting])
+            cur.execute('DELETE FROM dead_letter_deps WHERE child_id = ?', (child,))
+            cur.execute('UPDATE dead_letters SET replayed_at_ms = ? WHERE task_id = ?', (now_ms, child))
+            restored.append(child)
+            frontier.append(child)
+        todo = []
+    return restored
+
+
+def replay_dead_letters(task_ids=None, task_type: str = None, error: str = None,
+                        delay_seconds: float = 0, priority: int = None) -> list:
+    """Send matching dead letters back to 'pending' in one transaction.
+
+    Select by `task_ids`, `task_type` and/or `error` substring (all dead
+    letters when none is given). Replayed tasks start a fresh reclaim budget;
+    `delay_seconds` postpones their visibility and `priority` overrides the
+    priority they were enqueued with. Tasks already moved to `queue_archive`
+    are restored to the hot table first.
+
+    Dependents that failed with `dependency_failed` are only selected when
+    named by `task_ids` or matched by `error`. Otherwise they come back with
+    their parent: once no parent of theirs is still failed they are
+    'blocked' on the unfinished ones again, so they never run before them
+    (see `_restore_dependents`). Returns the replayed ids, restored
+    dependents included.
+    """
+    where, params = _dead_letter_filter(task_ids, task_type, error)
+    explicit = task_ids is not None or bool(error)
+    now, now_ms = _stamp()
+    visible_ms = now_ms + int(delay_seconds * 1000) if delay_seconds and delay_seconds > 0 else None
+    pick = f"SELECT task_id FROM dead_letters WHERE {where} AND error IS NOT 'dependency_failed'"
+    with _pooled() as conn:
+        cur = conn.cursor()
+        _begin_immediate(cur)
+        _unarchive_failed(cur, pick, params)
+        ids = [r[0] for r in cur.execute(f"SELECT id FROM queue WHERE status = 'failed' AND id IN ({pick})", params).fetchall()]
+        if ids:
+            # three set-based statements regardless of how many tasks match
+            cur.execute(
+                "UPDATE queue SET status = 'pending', owner = NULL, started_at = NULL, started_at_ms = NULL, finished_at = NULL, "
+                "finished_at_ms = NULL, result = NULL, lease_expires_ms = NULL, reclaim_attempts = 0, "
+                "priority = COALESCE(?, priority), not_before_ms = ?, rank_ms = ? - COALESCE(?, priority, 0) * ? "
+                f"WHERE status = 'failed' AND id IN ({pick})",
+                [priority, visible_ms, visible_ms or now_ms, priority, PRIORITY_AGING_MS] + params)
+            cur.execute(f"UPDATE dead_letters SET replayed_at_ms = ? WHERE task_id IN ({pick}) AND task_id IN "
+                        "(SELECT id FROM queue WHERE status = 'pending')", [now_ms] + params)
+        forced = []
+        if explicit:
+            forced = [r[0] for r in cur.execute(f"SELECT task_id FROM dead_letters WHERE {where} AND error = 'dependency_failed'", params).fetchall()]
+        if (ids or forced) and cur.execute('SELECT EXISTS (SELECT 1 FROM dead_letter_deps)').fetchone()[0]:
+            ids += _restore_dependents(cur, ids, forced, now_ms)
+        if ids:
+            cur.execute('INSERT INTO audit (timestamp, timestamp_ms, actor, action, details) VALUES (?, ?, ?, ?, ?)',
+                        (now, now_ms, 'orchestrator', 'dead_letter_replay',
+                         json.dumps({'count': len(ids), 'task_type': task_type, 'error': error, 'delay_seconds': delay_seconds, 'priority': priority})))
+        conn.commit()
+    if ids:
+        _notify_waiters()
+    return ids
+
+
+def purge_dead_letters(task_ids=None, task_type: str = None, error: str = None) -> int:
+    """Drop matching dead letters without replaying them; the failed tasks stay."""
+    where, params = _dead_letter_filter(task_ids, task_type, error)
+    with _pooled() as conn:
+        conn.execute(f'DELETE FROM dead_letter_deps WHERE child_id IN (SELECT task_id FROM dead_letters WHERE {where})', params)
+        cur = conn.execute(f'DELETE FROM dead_letters WHERE {where}', params)
+        conn.commit()
+        return cur.rowcount
+
+
+SCHEDULE_OVERLAP = ('skip', 'allow')
+SCHEDULE_MISSED = ('once', 'all', 'skip')
+# upper bound on runs enqueued for one schedule by a single catch-up (missed='all')
+SCHEDULE_MAX_CATCHUP = 100
+_CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def _cron_fields(expr: str) -> list:
+    """Parse a 5-field cron expression (minute hour dom month dow, UTC) into sets."""
+    parts = expr.split()
+    if len(parts) != 5:
+        raise ValueError(f'cron needs 5 fields: {expr!r}')
+    fields = []
+    for part, (lo, hi) in zip(parts, _CRON_RANGES):
+        values = set()
+        for item in part.split(','):
+            rng, _, step = item.partition('/')
+            if rng == '*':
+                start, end = lo, hi
+            elif '-' in rng:
+                start, end = (int(x) for x in rng.split('-', 1))
+            else:
+                start = end = int(rng)
+                if step:
+                    end = hi
+            if hi == 6:
+                # Sunday may be written as 7
+                start, end = min(start, 7), min(end, 7)
+            if start < lo or end > (7 if hi == 6 else hi) or start > end:
+                raise ValueError(f'cron field out of range: {item!r}')
+            values.update(v % 7 if hi == 6 else v for v in range(start, end + 1, int(step) if step else 1))
+        fields.append(values)
+    # like cron: when both day fields are restricted a day matching either runs
+    fields.append(parts[2] != '*' and parts[4] != '*')
+    return fields
+
+
+def _cron_next(fields: list, after_ms: int) -> int:
+    """First minute strictly after `after_ms` matching parsed cron `fields` (epoch ms)."""
+    minutes, hours, doms, months, dows, either_day = fields
+    t = datetime.utcfromtimestamp(after_ms // 60000 * 60 + 60)
+    limit = t + timedelta(days=366 * 5)
+    while t < limit:
+        if t.month not in months:
+            t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            continue
+        dom_ok, dow_ok = t.day in doms, (t.weekday() + 1) % 7 in dows
+        if not ((dom_ok or dow_ok) if either_day else (dom_ok and dow_ok)):
+            t = t.replace(hour=0, minute=0) + timedelta(days=1)
             continue
+        if t.hour not in hours:
+            t = t.replace(minute=0) + timedelta(hours=1)
+            continue
+        if t.minute not in minutes:
+            t += timedelta(minutes=1)
+            continue
+        return int((t - datetime(1970, 1, 1)).total_seconds()) * 1000
+    raise ValueError('cron expression never fires')
 
-        # check current attempts
-        cur.execute('SELECT reclaim_attempts FROM queue WHERE id = ?', (task_id,))
-        r = cur.fetchone()
-        attempts = r[0] if r and r[0] is not None else 0
-
-        # max_attempts parameter controls how many times a task may be reclaimed
-        # before being marked as failed to avoid flapping.
-        # It's provided by the caller (default 3).
-        if attempts >= max_attempts:
-            # give up and mark failed to avoid flapping
-            cur.execute('UPDATE queue SET status = ?, finished_at = ?, result = ? WHERE id = ?', ('failed', datetime.utcnow().isoformat() + 'Z', json.dumps({'error': 'reclaim_max_attempts'}), task_id))
-            try:
-                cur.execute('INSERT INTO audit (timestamp, actor, action, details) VALUES (?, ?, ?, ?)', (datetime.utcnow().isoformat() + 'Z', 'orchestrator', 'reclaim_failed', json.dumps({'task_id': task_id, 'reason': 'reclaim_max_attempts'})))
-            except Exception:
-                logger.exception('failed to write reclaim_failed audit for %s', task_id)
+
+def _due_runs(interval_s, cron, due_ms: int, now_ms: int):
+    """Run times from `due_ms` up to `now_ms` and the next one after it.
+
+    Returns (count, fires, next_ms): `fires` holds at most the latest
+    SCHEDULE_MAX_CATCHUP of the `count` run times (a cron schedule more than
+    a day behind only counts that last day). Intervals stay on the grid that
+    starts at `due_ms`.
+    """
+    if not cron:
+        step = max(1, int(interval_s * 1000))
+        count = (now_ms - due_ms) // step + 1
+        first = max(0, count - SCHEDULE_MAX_CATCHUP)
+        return count, [due_ms + i * step for i in range(first, count)], due_ms + count * step
+    fields = _cron_fields(cron)
+    fires, count, t = [due_ms], 1, _cron_next(fields, due_ms)
+    while t <= now_ms:
+        if count == SCHEDULE_MAX_CATCHUP and t < now_ms - 86400000:
+            # far behind: only the last day of runs can still be kept
+            t = _cron_next(fields, now_ms - 86400000)
+        fires.append(t)
+        count += 1
+        t = _cron_next(fields, t)
+    return count, fires[-SCHEDULE_MAX_CATCHUP:], t
+
+
+def _first_run_ms(interval_seconds, cron, overlap, missed, first_run_delay_seconds, now_ms) -> int:
+    """Validate schedule options and return the first run time (epoch ms)."""
+    if (interval_seconds is None) == (cron is None):
+        raise ValueError('give exactly one of interval_seconds or cron')
+    if interval_seconds is not None and interval_seconds <= 0:
+        raise ValueError('interval_seconds must be positive')
+    if overlap not in SCHEDULE_OVERLAP:
+        raise ValueError(f'overlap must be one of {SCHEDULE_OVERLAP}')
+    if missed not in SCHEDULE_MISSED:
+        raise ValueError(f'missed must be one of {SCHEDULE_MISSED}')
+    if first_run_delay_seconds is not None:
+        return now_ms + int(first_run_delay_seconds * 1000)
+    if cron:
+        return _cron_next(_cron_fields(cron), now_ms)
+    return now_ms + int(interval_seconds * 1000)
+
+
+def set_schedule(name: str, task_type: str, payload: dict = None, interval_seconds: float = None, cron: str = None,
+                 overlap: str = 'skip', missed: str = 'once', priority: int = 0, enabled: bool = True,
+                 first_run_delay_seconds: float = None) -> int:
+    """Create or replace the recurring task `name` and return its next run (epoch ms).
+
+    Give either `interval_seconds` or a 5-field UTC `cron` expression. Each
+    due run is enqueued as a normal `task_type` task carrying `payload`, so
+    any worker can run it.
+
+    `overlap`: 'skip' drops a run while the previous run's task is still
+    pending or in progress; 'allow' always enqueues.
+    `missed` (runs that fell due while no timer was running): 'once' enqueues
+    a single catch-up run, 'all' one per missed run (up to
+    SCHEDULE_MAX_CATCHUP), 'skip' none, waiting for the next run time.
+
+    Without `first_run_delay_seconds` an interval schedule first runs one
+    interval from now.
+    """
+    next_ms = _first_run_ms(interval_seconds, cron, overlap, missed, first_run_delay_seconds, _stamp()[1])
+    with _pooled() as conn:
+        conn.execute('INSERT OR REPLACE INTO schedules (name, task_type, payload, interval_s, cron, overlap, missed, priority, enabled, '
+                     'next_run_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     (name, task_type, json.dumps(payload or {}, ensure_ascii=False), interval_seconds, cron, overlap, missed,
+                      int(priority), 1 if enabled else 0, next_ms))
+        conn.commit()
+    return next_ms
+
+
+def delete_schedule(name: str) -> bool:
+    with _pooled() as conn:
+        deleted = conn.execute('DELETE FROM schedules WHERE name = ?', (name,)).rowcount
+        conn.commit()
+    return bool(deleted)
+
+
+def list_schedules() -> list:
+    """All schedules, soonest first."""
+    with _pooled() as conn:
+        rows = conn.execute('SELECT name, task_type, payload, interval_s, cron, overlap, missed, priority, enabled, next_run_ms, '
+                            'last_run_ms, last_task_id FROM schedules ORDER BY next_run_ms, name').fetchall()
+    return [{'name': r[0], 'task_type': r[1], 'payload': json.loads(r[2]) if r[2] else {}, 'interval_seconds': r[3],
+             'cron': r[4], 'overlap': r[5], 'missed': r[6], 'priority': r[7], 'enabled': bool(r[8]), 'next_run_ms': r[9],
+             'last_run_ms': r[10], 'last_task_id': r[11]} for r in rows]
+
+
+def run_due_schedules(names=None) -> list:
+    """Enqueue the runs of every schedule that is due (optionally only `names`).
+
+    Runs in one write transaction, so concurrent timers never enqueue a run
+    twice: a schedule is re-read and advanced under the lock. Returns one
+    dict per due schedule: {name, task_ids, skipped, next_run_ms}, where
+    `skipped` is 'overlap' or 'missed' when nothing was enqueued.
+    """
+    now, now_ms = _stamp()
+    sql = ('SELECT name, task_type, payload, interval_s, cron, overlap, missed, priority, next_run_ms, last_task_id '
+           'FROM schedules WHERE enabled = 1 AND next_run_ms <= ?')
+    params = [now_ms]
+    if names is not None:
+        names = list(names)
+        if not names:
+            return []
+        sql += f" AND name IN ({', '.join('?' * len(names))})"
+        params += names
+    out = []
+    with _pooled() as conn:
+        cur = conn.cursor()
+        _begin_immediate(cur)
+        for name, task_type, payload, interval_s, cron, overlap, missed, priority, due_ms, last_task_id in cur.execute(sql, params).fetchall():
+            # every run time in [due, now]; the last one is current, earlier ones were missed
+            count, fires, nxt = _due_runs(interval_s, cron, due_ms, now_ms)
+            if count > 1 and missed != 'all':
+                fires = fires[-1:] if missed == 'once' else []
+            skipped = None if fires else 'missed'
+            if fires and overlap == 'skip' and last_task_id is not None:
+                row = cur.execute("SELECT 1 FROM queue WHERE id = ? AND status IN ('pending', 'in_progress', 'blocked')",
+                                  (last_task_id,)).fetchone()
+                if row:
+                    fires, skipped = [], 'overlap'
+            task_ids = []
+            rank_ms = now_ms - int(priority) * PRIORITY_AGING_MS
+            for fire_ms in fires:
+                # the key makes a run idempotent even if the row update were lost
+                row = (now, now_ms, task_type, payload, 'pending', int(priority), None, rank_ms, f'schedule:{name}:{fire_ms}')
+                task_ids.append(_insert_deduped(cur, row, row[-1], now_ms - DEDUP_WINDOW_MS)[0])
+            cur.execute('UPDATE schedules SET next_run_ms = ?, last_run_ms = COALESCE(?, last_run_ms), '
+                        'last_task_id = COALESCE(?, last_task_id) WHERE name = ?',
+                        (nxt, now_ms if task_ids else None, task_ids[-1] if task_ids else None, name))
+            out.append({'name': name, 'task_ids': task_ids, 'skipped': skipped, 'next_run_ms': nxt})
+        conn.commit()
+    if any(r['task_ids'] for r in out):
+        _notify_waiters()
+    return out
+
+
+def reclaim_stale_tasks(ttl_seconds: int = 300, max_attempts: int = 3) -> int:
+    """Reclaim in-progress tasks whose claimer is presumed dead.
+
+    A task with a lease is stale once the lease has expired, however long it
+    has been running; a task without one (claimer does not heartbeat) is stale
+    after `ttl_seconds`. Stale tasks go back to 'pending' with `owner`,
+    `started_at` and the lease cleared so they can be claimed again. Tasks
+    already reclaimed `max_attempts` times are marked failed instead to avoid
+    flapping. Returns the number of reclaimed tasks.
+
+    The work is two set-based UPDATEs over the queue status indexes plus one
+    batched audit insert, so the write lock is held briefly even with
+    thousands of tasks in flight.
+    """
+    ts, ts_ms = _stamp()
+    cutoff_ms = ts_ms - int(ttl_seconds * 1000)
+    # rows with no (or an unparseable) start time count as stale
+    stale = ("status = 'in_progress' AND (lease_expires_ms < ? OR "
+             "(lease_expires_ms IS NULL AND (started_at_ms IS NULL OR started_at_ms < ?)))")
+    failed_result = json.dumps({'error': 'reclaim_max_attempts'})
+    with _pooled() as conn:
+        cur = conn.cursor()
+        _begin_immediate(cur)
+        if _HAS_RETURNING:
+            cur.execute(
+                f"UPDATE queue SET status = 'failed', finished_at = ?, finished_at_ms = ?, result = ? "
+                f"WHERE {stale} AND COALESCE(reclaim_attempts, 0) >= ? RETURNING id",
+                (ts, ts_ms, failed_result, ts_ms, cutoff_ms, max_attempts))
+            failed = [r[0] for r in cur.fetchall()]
+            cur.execute(
+                f"UPDATE queue SET status = 'pending', owner = NULL, started_at = NULL, started_at_ms = NULL, lease_expires_ms = NULL, "
+                f"reclaim_attempts = COALESCE(reclaim_attempts, 0) + 1, last_reclaimed_at = ? "
+                f"WHERE {stale} RETURNING id, reclaim_attempts",
+                (ts, ts_ms, cutoff_ms))
+            reclaimed = cur.fetchall()
         else:
-            # increment attempts and move back to pending
-            attempts += 1
-            cur.execute('UPDATE queue SET status = ?, owner = NULL, started_at = NULL, reclaim_attempts = ?, last_reclaimed_at = ? WHERE id = ?', ('pending', attempts, datetime.utcnow().isoformat() + 'Z', task_id))
-            reclaimed.append(task_id)
+            cur.execute(f"SELECT id, COALESCE(reclaim_attempts, 0) FROM queue WHERE {stale}", (ts_ms, cutoff_ms))
+            rows = cur.fetchall()
+            failed = [r[0] for r in rows if r[1] >= max_attempts]
+            reclaimed = [(r[0], r[1] + 1) for r in rows if r[1] < max_attempts]
+            cur.executemany("UPDATE queue SET status = 'failed', finished_at = ?, finished_at_ms = ?, result = ? WHERE id = ?",
+                            [(ts, ts_ms, failed_result, task_id) for task_id in failed])
+            cur.executemany("UPDATE queue SET status = 'pending', owner = NULL, started_at = NULL, started_at_ms = NULL, "
+                            "lease_expires_ms = NULL, reclaim_attempts = ?, last_reclaimed_at = ? WHERE id = ?",
+                            [(attempts, ts, task_id) for task_id, attempts in reclaimed])
+
+        if failed:
+            _record_dead_letters(cur, [(task_id, 'reclaim_max_attempts') for task_id in failed], ts, ts_ms)
+            if _has_dependents(cur):
+                _fail_dependents(cur, failed, ts, ts_ms)
+
+        audit_rows = [(ts, ts_ms, 'orchestrator', 'reclaim_failed', json.dumps({'task_id': task_id, 'reason': 'reclaim_max_attempts'})) for task_id in failed]
+        audit_rows += [(ts, ts_ms, 'orchestrator', 'reclaim', json.dumps({'task_id': task_id, 'attempts': attempts})) for task_id, attempts in reclaimed]
+        if audit_rows:
             try:
-                cur.execute('INSERT INTO audit (timestamp, actor, action, details) VALUES (?, ?, ?, ?)', (datetime.utcnow().isoformat() + 'Z', 'orchestrator', 'reclaim', json.dumps({'task_id': task_id, 'attempts': attempts})))
+                cur.executemany('INSERT INTO audit (timestamp, timestamp_ms, actor, action, details) VALUES (?, ?, ?, ?, ?)', audit_rows)
             except Exception:
-                logger.exception('failed to write reclaim audit for %s', task_id)
-
-    conn.commit()
-    conn.close()
+                logger.exception('failed to write reclaim audit rows')
+        conn.commit()
+    if reclaimed:
+        _notify_waiters()
     return len(reclaimed)
 
 
@@ -286,23 +1680,22 @@ def reclaim_and_report(ttl_seconds: int = 300, max_attempts: int = 3, status_pat
     pending, in_progress, timestamp.
     Optionally writes the dict as JSON to `status_path`.
     """
-    start = datetime.utcnow()
+    _, start_ms = _stamp()
     reclaimed = reclaim_stale_tasks(ttl_seconds, max_attempts)
 
     # count audit rows written since start
-    conn = _connect()
-    cur = conn.cursor()
-    start_iso = start.isoformat() + 'Z'
-    cur.execute("SELECT COUNT(*) FROM audit WHERE action = 'reclaim' AND timestamp >= ?", (start_iso,))
-    reclaim_audit_reclaim = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM audit WHERE action = 'reclaim_failed' AND timestamp >= ?", (start_iso,))
-    reclaim_audit_failed = cur.fetchone()[0]
-    # count pending/in_progress
-    cur.execute("SELECT COUNT(*) FROM queue WHERE status = 'pending'")
-    pending = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM queue WHERE status = 'in_progress'")
-    inprog = cur.fetchone()[0]
-    conn.close()
+    with _pooled() as conn:
+        cur = conn.cursor()
+        # both counts are range scans on idx_audit_action_ts
+        cur.execute("SELECT COUNT(*) FROM audit WHERE action = 'reclaim' AND timestamp_ms >= ?", (start_ms,))
+        reclaim_audit_reclaim = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM audit WHERE action = 'reclaim_failed' AND timestamp_ms >= ?", (start_ms,))
+        reclaim_audit_failed = cur.fetchone()[0]
+        # count pending/in_progress
+        cur.execute("SELECT COUNT(*) FROM queue WHERE status = 'pending'")
+        pending = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM queue WHERE status = 'in_progress'")
+        inprog = cur.fetchone()[0]
 
     report = {
         'timestamp': datetime.utcnow().isoformat() + 'Z',
@@ -323,6 +1716,33 @@ def reclaim_and_report(ttl_seconds: int = 300, max_attempts: int = 3, status_pat
     return report
 
 
+# Optional queue features the SQLite backend provides; a backend without some
+# of them narrows this set when it installs itself.
+QUEUE_FEATURES = frozenset({'dependencies', 'task_type_limits', 'archive', 'dead_letters', 'schedules'})
+
+
+def require_queue_features(*features):
+    """Raise RuntimeError unless the active queue backend supports every one of `features`.
+
+    Entry points call this before they start work, so a backend that lacks a
+    feature refuses to start instead of failing part way through a run.
+    """
+    missing = sorted(set(features) - QUEUE_FEATURES)
+    if missing:
+        raise RuntimeError(f"the {QUEUE_BACKEND} queue backend does not support {', '.join(missing)}; "
+                           "run with GAIA_QUEUE_BACKEND=sqlite")
+
+
+# Queue backend: the SQLite functions above unless GAIA_QUEUE_BACKEND says
+# otherwise; `orchestrator_pg.install` rebinds the queue names in this module.
+QUEUE_BACKEND = os.environ.get('GAIA_QUEUE_BACKEND', 'sqlite').strip().lower()
+if QUEUE_BACKEND == 'postgres':
+    import orchestrator_pg
+    orchestrator_pg.install(globals())
+elif QUEUE_BACKEND != 'sqlite':
+    raise ValueError(f'unknown GAIA_QUEUE_BACKEND: {QUEUE_BACKEND}')
+
+
 if __name__ == '__main__':
     init_db()
     # Run startup token validation early; fail fast if required tokens are missing
@@ -0,0 +1,955 @@
+"""PostgreSQL queue backend for `orchestrator`.
+
+Selected with GAIA_QUEUE_BACKEND=postgres and a DSN in GAIA_QUEUE_DSN (or
+DATABASE_URL); `orchestrator` then routes its queue functions here while the
+audit/approvals tables stay in SQLite. Unlike SQLite's single writer lock,
+claims take rows with `FOR UPDATE SKIP LOCKED`, so concurrent claimers never
+wait on each other, and idle workers sleep on `LISTEN` until an enqueue
+sends `NOTIFY`.
+
+The whole queue API is covered, with the same tables and semantics as the
+SQLite backend: enqueue (priority, delay, dedup_key, depends_on), batch claim
+with leases, task-type filter and per-type limits, heartbeat, complete/fail
+with dead letters, reclaim, archiving, schedules, listing and counts. Where
+SQLite relies on its single write lock, the statements here take row locks
+instead: a child's link holds its parents `FOR SHARE`, capped claims lock
+the `task_type_limits` rows and due schedules are advanced `FOR UPDATE`.
+
+psycopg2 is optional and only needed for this backend
+(`pip install psycopg2-binary`); selecting it without psycopg2 fails when
+`orchestrator` is imported.
+"""
+import importlib
+import json
+import os
+import re
+import select
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+except Exception:
+    psycopg2 = None
+
+# functions `install` routes to PostgresQueue
+QUEUE_API = (
+    'enqueue_task', 'enqueue_tasks', 'claim_task', 'claim_tasks', 'heartbeat', 'complete_task', 'complete_tasks',
+    'fail_task', 'fail_tasks', 'list_tasks', 'count_tasks', 'get_task', 'reclaim_stale_tasks', 'reclaim_and_report',
+    'TaskWaiter', 'set_task_type_limit', 'list_task_type_limits', 'archive_tasks', 'list_dead_letters',
+    'count_dead_letters', 'replay_dead_letters', 'purge_dead_letters', 'set_schedule', 'delete_schedule',
+    'list_schedules', 'run_due_schedules',
+)
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS queue (
+        id BIGSERIAL PRIMARY KEY,
+        created_at TEXT,
+        created_at_ms BIGINT,
+        task_type TEXT,
+        payload TEXT,
+        status TEXT,
+        owner TEXT,
+        started_at TEXT,
+        started_at_ms BIGINT,
+        finished_at TEXT,
+        finished_at_ms BIGINT,
+        result TEXT,
+        priority INTEGER DEFAULT 0,
+        not_before_ms BIGINT,
+        rank_ms BIGINT,
+        lease_expires_ms BIGINT,
+        reclaim_attempts INTEGER DEFAULT 0,
+        last_reclaimed_at TEXT,
+        dedup_key TEXT,
+        pending_deps INTEGER
+    )''',
+    'ALTER TABLE queue ADD COLUMN IF NOT EXISTS pending_deps INTEGER',
+    'CREATE TABLE IF NOT EXISTS audit (id BIGSERIAL PRIMARY KEY, timestamp TEXT, timestamp_ms BIGINT, actor TEXT, action TEXT, details TEXT)',
+    # the tables below mirror their SQLite counterparts in `orchestrator.init_db`
+    '''CREATE TABLE IF NOT EXISTS task_type_limits (
+        task_type TEXT PRIMARY KEY,
+        max_in_flight INTEGER,
+        rate_per_s DOUBLE PRECISION,
+        tokens DOUBLE PRECISION,
+        refilled_ms BIGINT
+    )''',
+    'CREATE TABLE IF NOT EXISTS task_deps (parent_id BIGINT NOT NULL, child_id BIGINT NOT NULL, PRIMARY KEY (parent_id, child_id))',
+    'CREATE TABLE IF NOT EXISTS dead_letter_deps (parent_id BIGINT NOT NULL, child_id BIGINT NOT NULL, PRIMARY KEY (parent_id, child_id))',
+    '''CREATE TABLE IF NOT EXISTS dead_letters (
+        task_id BIGINT PRIMARY KEY,
+        task_type TEXT,
+        error TEXT,
+        attempts INTEGER,
+        history TEXT,
+        failed_at TEXT,
+        failed_at_ms BIGINT,
+        replayed_at_ms BIGINT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS schedules (
+        name TEXT PRIMARY KEY,
+        task_type TEXT NOT NULL,
+        payload TEXT,
+        interval_s DOUBLE PRECISION,
+        cron TEXT,
+        overlap TEXT DEFAULT 'skip',
+        missed TEXT DEFAULT 'once',
+        priority INTEGER DEFAULT 0,
+        enabled INTEGER DEFAULT 1,
+        next_run_ms BIGINT,
+        last_run_ms BIGINT,
+        last_task_id BIGINT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS queue_archive (
+        id BIGINT PRIMARY KEY,
+        created_at TEXT,
+        created_at_ms BIGINT,
+        task_type TEXT,
+        status TEXT,
+        owner TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        finished_at_ms BIGINT,
+        reclaim_attempts INTEGER,
+        archived_at_ms BIGINT,
+        payload_z BYTEA,
+        result_z BYTEA
+    )''',
+    # partial index: the claim scan only ever sees pending rows, in rank order
+    "CREATE INDEX IF NOT EXISTS idx_queue_claim ON queue (rank_ms) WHERE status = 'pending'",
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_started ON queue (status, started_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_lease ON queue (status, lease_expires_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_status_finished ON queue (status, finished_at_ms)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_queue_dedup ON queue (dedup_key) WHERE dedup_key IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS idx_audit_action_ts ON audit (action, timestamp_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_dead_letters_type ON dead_letters (replayed_at_ms, task_type, failed_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_dead_letter_deps_child ON dead_letter_deps (child_id)',
+    'CREATE INDEX IF NOT EXISTS idx_queue_archive_created ON queue_archive (created_at_ms)',
+    'CREATE INDEX IF NOT EXISTS idx_schedules_due ON schedules (enabled, next_run_ms)',
+)
+
+_TASK_COLS = 'created_at, created_at_ms, task_type, payload, status, priority, not_before_ms, rank_ms, dedup_key'
+
+
+def _o():
+    """The orchestrator module, for shared helpers (imported lazily to avoid a cycle)."""
+    return sys.modules.get('orchestrator') or importlib.import_module('orchestrator')
+
+
+class PgTaskWaiter:
+    """`orchestrator.TaskWaiter` counterpart built on LISTEN/NOTIFY."""
+
+    def __init__(self, queue):
+        self._conn = queue._connect()
+        self._conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cur:
+            cur.execute(f'LISTEN {queue.channel}')
+        # self-pipe so poke() can interrupt select() from another thread
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        os.set_blocking(self._w, False)
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds; True if woken by a notify or poke."""
+        ready, _, _ = select.select([self._conn, self._r], [], [], max(0.0, timeout))
+        woke = False
+        if self._r in ready:
+            try:
+                while os.read(self._r, 512):
+                    pass
+            except BlockingIOError:
+                pass
+            woke = True
+        if self._conn in ready:
+            self._conn.poll()
+            if self._conn.notifies:
+                del self._conn.notifies[:]
+                woke = True
+        return woke
+
+    def poke(self):
+        try:
+            os.write(self._w, b'!')
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        for fd in (self._r, self._w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._conn.close()
+
+
+class PostgresQueue:
+    """The orchestrator queue API on PostgreSQL.
+
+    `schema` puts the tables in their own schema (created on `init_db`),
+    e.g. to isolate tests or benchmark runs.
+    """
+
+    def __init__(self, dsn: str, schema: str = None, pool_size: int = None):
+        if psycopg2 is None:
+            raise RuntimeError('the postgres queue backend needs psycopg2; install with: pip install psycopg2-binary')
+        if schema and not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', schema):
+            raise ValueError(f'invalid schema name: {schema}')
+        self.dsn = dsn
+        self.schema = schema
+        self.channel = f'gaia_queue_{schema}' if schema else 'gaia_queue'
+        self.pool_size = pool_size or _o().POOL_SIZE
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self._ready = False
+
+    # -- connections ------------------------------------------------------
+
+    def _connect(self):
+        if self.schema:
+            return psycopg2.connect(self.dsn, options=f'-c search_path={self.schema}')
+        return psycopg2.connect(self.dsn)
+
+    @contextmanager
+    def _conn(self):
+        """Yield a pooled connection; rolled back on error, reset after fork."""
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # connections inherited across fork are not safe to share
+                kwargs = {'options': f'-c search_path={self.schema}'} if self.schema else {}
+                self._pool = psycopg2.pool.ThreadedConnectionPool(1, self.pool_size, self.dsn, **kwargs)
+                self._pool_pid = os.getpid()
+            pool = self._pool
+        if not self._ready:
+            self.init_db()
+        conn = pool.getconn()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            if not conn.closed:
+                conn.rollback()
+            pool.putconn(conn)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.closeall()
+            self._pool = None
+
+    def init_db(self):
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                # concurrent CREATE ... IF NOT EXISTS can still collide in Postgres
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext('gaia_queue_schema'))")
+                if self.schema:
+                    cur.execute(f'CREATE SCHEMA IF NOT EXISTS {self.schema}')
+                for stmt in _SCHEMA:
+                    cur.execute(stmt)
+            conn.commit()
+        finally:
+            conn.close()
+        self._ready = True
+
+    def drop_schema(self):
+        """Drop this queue's schema (only when one was given)."""
+        if not self.schema:
+            raise ValueError('drop_schema needs an explicit schema')
+        self.close()
+        conn = psycopg2.connect(self.dsn)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f'DROP SCHEMA IF EXISTS {self.schema} CASCADE')
+            conn.commit()
+        finally:
+            conn.close()
+        self._ready = False
+
+    def _notify(self, cur):
+        # delivered to LISTENers when the surrounding transaction commits
+        cur.execute('SELECT pg_notify(%s, %s)', (self.channel, ''))
+
+    # -- enqueue ----------------------------------------------------------
+
+    def _row(self, task_type, payload, priority, delay_seconds, dedup_key, now, now_ms):
+        o = _o()
+        visible_ms = now_ms + int(delay_seconds * 1000) if delay_seconds and delay_seconds > 0 else None
+        rank_ms = (visible_ms or now_ms) - int(priority) * o.PRIORITY_AGING_MS
+        return (now, now_ms, task_type, json.dumps(payload, ensure_ascii=False), 'pending', int(priority), visible_ms, rank_ms, dedup_key)
+
+    def _insert_deduped(self, cur, row, dedup_key, cutoff_ms):
+        cur.execute('UPDATE queue SET dedup_key = NULL WHERE dedup_key = %s AND created_at_ms <= %s', (dedup_key, cutoff_ms))
+        cur.execute(f'INSERT INTO queue ({_TASK_COLS}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) '
+                    'ON CONFLICT (dedup_key) WHERE dedup_key IS NOT NULL DO NOTHING RETURNING id', row)
+        r = cur.fetchone()
+        if r:
+            return r[0], True
+        cur.execute('SELECT id FROM queue WHERE dedup_key = %s', (dedup_key,))
+        return cur.fetchone()[0], False
+
+    def enqueue_task(self, task_type: str, payload: dict, priority: int = 0, delay_seconds: float = 0,
+                     dedup_key: str = None, dedup_window_seconds: float = None, depends_on=None) -> int:
+        parents = sorted({int(p) for p in depends_on}) if depends_on else []
+        o = _o()
+        now, now_ms = o._stamp()
+        window_ms = o.DEDUP_WINDOW_MS if dedup_window_seconds is None else int(dedup_window_seconds * 1000)
+        row = self._row(task_type, payload, priority, delay_seconds, dedup_key, now, now_ms)
+        with self._conn() as conn, conn.cursor() as cur:
+            if dedup_key:
+                task_id, inserted = self._insert_deduped(cur, row, dedup_key, now_ms - window_ms)
+            else:
+                cur.execute(f'INSERT INTO queue ({_TASK_COLS}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id', row)
+                task_id, inserted = cur.fetchone()[0], True
+            status = self._link_parents(cur, task_id, parents, now, now_ms) if inserted and parents else 'pending'
+            if inserted and status == 'pending':
+                self._notify(cur)
+            conn.commit()
+        return task_id
+
+    def enqueue_tasks(self, items, priority: int = 0, delay_seconds: float = 0) -> list:
+        o = _o()
+        now, now_ms = o._stamp()
+        rows, keys = [], []
+        for item in items:
+            key = item[2] if len(item) > 2 else None
+            rows.append(self._row(item[0], item[1], priority, delay_seconds, key, now, now_ms))
+            keys.append(key)
+        if not rows:
+            return []
+        with self._conn() as conn, conn.cursor() as cur:
+            if not any(keys):
+                ids = [r[0] for r in psycopg2.extras.execute_values(
+                    cur, f'INSERT INTO queue ({_TASK_COLS}) VALUES %s RETURNING id', rows, page_size=1000, fetch=True)]
+            else:
+                ids = []
+                for row, key in zip(rows, keys):
+                    if key:
+                        ids.append(self._insert_deduped(cur, row, key, now_ms - o.DEDUP_WINDOW_MS)[0])
+                    else:
+                        cur.execute(f'INSERT INTO queue ({_TASK_COLS}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id', row)
+                        ids.append(cur.fetchone()[0])
+            self._notify(cur)
+            conn.commit()
+        return ids
+
+    # -- dependencies / dead letters -------------------------------------
+
+    def _link_parents(self, cur, task_id, parents, now, now_ms):
+        """`orchestrator._link_parents` on Postgres.
+
+        The parents are read `FOR SHARE`: a parent finishing concurrently
+        either commits first (and is seen as finished) or waits for this
+        transaction, so its completion always sees the new edges.
+        """
+        cur.execute('SELECT id, status FROM queue WHERE id = ANY(%s) FOR SHARE', (parents,))
+        found = dict(cur.fetchall())
+        missing = [p for p in parents if p not in found]
+        if missing:
+            cur.execute('SELECT id, status FROM queue_archive WHERE id = ANY(%s)', (missing,))
+            found.update(cur.fetchall())
+        unknown = [p for p in parents if p not in found]
+        if unknown:
+            raise ValueError(f'unknown parent task ids: {unknown}')
+        if any(found[p] == 'failed' for p in parents):
+            cur.execute("UPDATE queue SET status = 'failed', finished_at = %s, finished_at_ms = %s, result = %s WHERE id = %s",
+                        (now, now_ms, json.dumps({'error': 'dependency_failed'}), task_id))
+            psycopg2.extras.execute_values(cur, 'INSERT INTO dead_letter_deps (parent_id, child_id) VALUES %s ON CONFLICT DO NOTHING',
+                                           [(p, task_id) for p in parents if found[p] != 'completed'])
+            self._record_dead_letters(cur, [(task_id, 'dependency_failed')], now, now_ms)
+            return 'failed'
+        waiting = [p for p in parents if found[p] != 'completed']
+        if not waiting:
+            return 'pending'
+        psycopg2.extras.execute_values(cur, 'INSERT INTO task_deps (parent_id, child_id) VALUES %s', [(p, task_id) for p in waiting])
+        cur.execute("UPDATE queue SET status = 'blocked', pending_deps = %s WHERE id = %s", (len(waiting), task_id))
+        return 'blocked'
+
+    @staticmethod
+    def _has_dependents(cur) -> bool:
+        cur.execute('SELECT EXISTS (SELECT 1 FROM task_deps)')
+        return cur.fetchone()[0]
+
+    @staticmethod
+    def _release_children(cur, parent_ids) -> int:
+        """`orchestrator._release_children`: one UPDATE counts the parents off and unblocks."""
+        cur.execute(
+            "UPDATE queue q SET pending_deps = q.pending_deps - d.n, "
+            "status = CASE WHEN q.pending_deps - d.n <= 0 THEN 'pending' ELSE q.status END "
+            'FROM (SELECT child_id, COUNT(*) AS n FROM task_deps WHERE parent_id = ANY(%s) GROUP BY child_id) d '
+            "WHERE q.id = d.child_id AND q.status = 'blocked' RETURNING q.status", (parent_ids,))
+        released = sum(1 for r in cur.fetchall() if r[0] == 'pending')
+        cur.execute('DELETE FROM task_deps WHERE parent_id = ANY(%s)', (parent_ids,))
+        return released
+
+    @staticmethod
+    def _record_dead_letters(cur, items, now, now_ms):
+        """`orchestrator._record_dead_letters` on Postgres."""
+        errors = dict(items)
+        if not errors:
+            return
+        cur.execute('SELECT q.id, q.task_type, q.owner, COALESCE(q.reclaim_attempts, 0), d.attempts, d.history '
+                    'FROM queue q LEFT JOIN dead_letters d ON d.task_id = q.id WHERE q.id = ANY(%s)', (list(errors),))
+        rows = []
+        for task_id, task_type, owner, reclaims, attempts, history in cur.fetchall():
+            history = json.loads(history) if history else []
+            history.append({'at': now, 'error': errors[task_id], 'owner': owner, 'reclaims': reclaims})
+            rows.append((task_id, task_type, errors[task_id], (attempts or 0) + 1, json.dumps(history, ensure_ascii=False), now, now_ms))
+        psycopg2.extras.execute_values(
+            cur,
+            'INSERT INTO dead_letters (task_id, task_type, error, attempts, history, failed_at, failed_at_ms, replayed_at_ms) VALUES %s '
+            'ON CONFLICT (task_id) DO UPDATE SET task_type = EXCLUDED.task_type, error = EXCLUDED.error, attempts = EXCLUDED.attempts, '
+            'history = EXCLUDED.history, failed_at = EXCLUDED.failed_at, failed_at_ms = EXCLUDED.failed_at_ms, replayed_at_ms = NULL',
+            rows, template='(%s, %s, %s, %s, %s, %s, %s, NULL)', page_size=500)
+
+    def _fail_dependents(self, cur, parent_ids, now, now_ms) -> list:
+        """Fail every blocked descendant of failed `parent_ids`; returns their ids."""
+        parent_ids = list(parent_ids)
+        cur.execute(
+            'WITH RECURSIVE d(id) AS (SELECT child_id FROM task_deps WHERE parent_id = ANY(%s) '
+            'UNION SELECT t.child_id FROM task_deps t JOIN d ON t.parent_id = d.id) '
+            "UPDATE queue SET status = 'failed', finished_at = %s, finished_at_ms = %s, result = %s "
+            "WHERE status = 'blocked' AND id IN (SELECT id FROM d) RETURNING id",
+            (parent_ids, now, now_ms, json.dumps({'error': 'dependency_failed'})))
+        failed = sorted(r[0] for r in cur.fetchall())
+        # parked for a replay of the parent (see `_restore_dependents`)
+        cur.execute('INSERT INTO dead_letter_deps (parent_id, child_id) SELECT parent_id, child_id FROM task_deps '
+                    'WHERE child_id = ANY(%s) ON CONFLICT DO NOTHING', (failed,))
+        cur.execute('DELETE FROM task_deps WHERE parent_id = ANY(%s) OR child_id = ANY(%s)', (parent_ids, failed))
+        self._record_dead_letters(cur, [(task_id, 'dependency_failed') for task_id in failed], now, now_ms)
+        return failed
+
+    # -- claim / heartbeat ------------------------------------------------
+
+    @staticmethod
+    def _claim_budgets(cur, now_ms):
+        """`orchestrator._claim_budgets` on Postgres.
+
+        The limit rows are locked `FOR UPDATE` until the claim commits, which
+        serialises claimers while any limit exists, as SQLite's write lock
+        does; the in-flight count that follows sees every earlier claim.
+        """
+        cur.execute('SELECT task_type, max_in_flight, rate_per_s, tokens, refilled_ms FROM task_type_limits ORDER BY task_type FOR UPDATE')
+        limits = cur.fetchall()
+        if not limits:
+            return {}
+        capped = [r[0] for r in limits if r[1] is not None]
+        in_flight = {}
+        if capped:
+            cur.execute("SELECT task_type, COUNT(*) FROM queue WHERE status = 'in_progress' AND task_type = ANY(%s) GROUP BY task_type",
+                        (capped,))
+            in_flight = dict(cur.fetchall())
+        budgets = {}
+        for task_type, max_in_flight, rate_per_s, tokens, refilled_ms in limits:
+            budget = None
+            if max_in_flight is not None:
+                budget = max(0, max_in_flight - in_flight.get(task_type, 0))
+            if rate_per_s is not None:
+                allowed = int(_o()._refill(tokens, refilled_ms, rate_per_s, now_ms))
+                budget = allowed if budget is None else min(budget, allowed)
+            if budget is not None:
+                budgets[task_type] = budget
+        return budgets
+
+    def set_task_type_limit(self, task_type: str, max_in_flight: int = None, rate_per_s: float = None):
+        with self._conn() as conn, conn.cursor() as cur:
+            if max_in_flight is None and rate_per_s is None:
+                cur.execute('DELETE FROM task_type_limits WHERE task_type = %s', (task_type,))
+            else:
+                cur.execute('INSERT INTO task_type_limits (task_type, max_in_flight, rate_per_s, tokens, refilled_ms) '
+                            'VALUES (%s, %s, %s, NULL, NULL) ON CONFLICT (task_type) DO UPDATE SET max_in_flight = EXCLUDED.max_in_flight, '
+                            'rate_per_s = EXCLUDED.rate_per_s, tokens = NULL, refilled_ms = NULL', (task_type, max_in_flight, rate_per_s))
+            conn.commit()
+
+    def list_task_type_limits(self) -> dict:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute('SELECT task_type, max_in_flight, rate_per_s FROM task_type_limits ORDER BY task_type')
+            return {r[0]: {'max_in_flight': r[1], 'rate_per_s': r[2]} for r in cur.fetchall()}
+
+    def claim_tasks(self, worker_id: str, n: int, lease_seconds: float = None, task_types=None) -> list:
+        if n <= 0:
+            return []
+        now, now_ms = _o()._stamp()
+        lease_ms = now_ms + int(lease_seconds * 1000) if lease_seconds else None
+        where = "status = 'pending' AND (not_before_ms IS NULL OR not_before_ms <= %s)"
+        params = [now_ms]
+        if task_types:
+            where += ' AND task_type = ANY(%s)'
+            params.append(list(task_types))
+        claim = ("UPDATE queue q SET status = 'in_progress', owner = %s, started_at = %s, started_at_ms = %s, lease_expires_ms = %s "
+                 'FROM picked WHERE q.id = picked.id RETURNING q.id, q.created_at, q.task_type, q.payload, q.rank_ms')
+        with self._conn() as conn, conn.cursor() as cur:
+            budgets = self._claim_budgets(cur, now_ms)
+            exhausted = [t for t, b in budgets.items() if b <= 0]
+            if any(b > 0 for b in budgets.values()):
+                # same walk as the sqlite backend: re-run the LIMIT-ed pick
+                # with a type excluded once it runs out of budget
+                left = dict(budgets)
+                ids = []
+                while len(ids) < n:
+                    w, wp = where, list(params)
+                    if exhausted:
+                        w += ' AND task_type <> ALL(%s)'
+                        wp.append(list(exhausted))
+                    if ids:
+                        w += ' AND id <> ALL(%s)'
+                        wp.append(list(ids))
+                    ran_out = False
+                    cur.execute(f'SELECT id, task_type FROM queue WHERE {w} ORDER BY rank_ms LIMIT %s FOR UPDATE SKIP LOCKED', wp + [n - len(ids)])
+                    for task_id, task_type in cur.fetchall():
+                        ids.append(task_id)
+                        if task_type in left:
+                            left[task_type] -= 1
+                            if left[task_type] <= 0:
+                                exhausted.append(task_type)
+                                ran_out = True
+                                break
+                    if not ran_out:
+                        break
+                cur.execute(f'WITH picked AS (SELECT unnest(%s::bigint[]) AS id) {claim}', [ids, worker_id, now, now_ms, lease_ms])
+            else:
+                left = None
+                if exhausted:
+                    where += ' AND task_type <> ALL(%s)'
+                    params.append(exhausted)
+                # rows locked by another claimer are skipped, not waited on
+                cur.execute(f'WITH picked AS (SELECT id FROM queue WHERE {where} ORDER BY rank_ms LIMIT %s FOR UPDATE SKIP LOCKED) {claim}',
+                            params + [n, worker_id, now, now_ms, lease_ms])
+            rows = cur.fetchall()
+            if left is not None:
+                # spend one token per claimed task of a rate-limited type
+                taken = {}
+                for r in rows:
+                    taken[r[2]] = taken.get(r[2], 0) + 1
+                cur.execute('SELECT task_type, rate_per_s, tokens, refilled_ms FROM task_type_limits WHERE rate_per_s IS NOT NULL')
+                for task_type, rate_per_s, tokens, refilled_ms in cur.fetchall():
+                    if task_type in taken:
+                        level = _o()._refill(tokens, refilled_ms, rate_per_s, now_ms) - taken[task_type]
+                        cur.execute('UPDATE task_type_limits SET tokens = %s, refilled_ms = %s WHERE task_type = %s', (level, now_ms, task_type))
+            conn.commit()
+        rows.sort(key=lambda r: (r[4] or 0, r[0]))
+        return [{'id': r[0], 'created_at': r[1], 'task_type': r[2], 'payload': json.loads(r[3])} for r in rows]
+
+    def claim_task(self, worker_id: str, lease_seconds: float = None, task_types=None):
+        tasks = self.claim_tasks(worker_id, 1, lease_seconds=lease_seconds, task_types=task_types)
+        return tasks[0] if tasks else None
+
+    def heartbeat(self, worker_id: str, task_ids, lease_seconds: float) -> int:
+        ids = [int(i) for i in task_ids]
+        if not ids:
+            return 0
+        lease_ms = _o()._stamp()[1] + int(lease_seconds * 1000)
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute("UPDATE queue SET lease_expires_ms = %s WHERE status = 'in_progress' AND owner = %s AND id = ANY(%s)",
+                        (lease_ms, worker_id, ids))
+            renewed = cur.rowcount
+            conn.commit()
+        return renewed
+
+    # -- finish -----------------------------------------------------------
+
+    @staticmethod
+    def _finish(cur, status, rows):
+        psycopg2.extras.execute_values(
+            cur,
+            # execute_values fills only the VALUES list; `status` is one of our own literals
+            f"UPDATE queue AS q SET status = '{status}', finished_at = v.finished_at, finished_at_ms = v.finished_at_ms, result = v.result "
+            'FROM (VALUES %s) AS v(id, result, finished_at, finished_at_ms) WHERE q.id = v.id',
+            rows, template='(%s::bigint, %s, %s, %s::bigint)', page_size=1000)
+
+    def complete_tasks(self, items):
+        o = _o()
+        now, now_ms = o._stamp()
+        rows = [(task_id, o._encode_result(result), now, now_ms) for task_id, result in items]
+        if not rows:
+            return
+        with self._conn() as conn, conn.cursor() as cur:
+            self._finish(cur, 'completed', rows)
+            # dependents whose last parent is among these become claimable on commit
+            if self._has_dependents(cur) and self._release_children(cur, [r[0] for r in rows]):
+                self._notify(cur)
+            conn.commit()
+
+    def complete_task(self, task_id: int, result: dict):
+        self.complete_tasks([(task_id, result)])
+
+    def fail_tasks(self, items):
+        now, now_ms = _o()._stamp()
+        items = [(task_id, str(error)) for task_id, error in items]
+        if not items:
+            return
+        with self._conn() as conn, conn.cursor() as cur:
+            self._finish(cur, 'failed', [(task_id, json.dumps({'error': error}, ensure_ascii=False), now, now_ms) for task_id, error in items])
+            self._record_dead_letters(cur, items, now, now_ms)
+            if self._has_dependents(cur):
+                self._fail_dependents(cur, [task_id for task_id, _ in items], now, now_ms)
+            conn.commit()
+
+    def fail_task(self, task_id: int, error: str):
+        self.fail_tasks([(task_id, error)])
+
+    # -- inspection -------------------------------------------------------
+
+    def list_tasks(self, status: str = None, include_archived: bool = False):
+        cols = 'id, created_at, task_type, status, owner, created_at_ms'
+        where, params = ('WHERE status = %s', (status,)) if status else ('', ())
+        sql = f'SELECT {cols} FROM queue {where}'
+        if include_archived:
+            sql = f'{sql} UNION ALL SELECT {cols} FROM queue_archive {where}'
+            params = params * 2
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(f'{sql} ORDER BY created_at_ms, id', params)
+            rows = cur.fetchall()
+        return [{'id': r[0], 'created_at': r[1], 'task_type': r[2], 'status': r[3], 'owner': r[4]} for r in rows]
+
+    def count_tasks(self) -> dict:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute('SELECT status, COUNT(*) FROM queue GROUP BY status')
+            return {r[0]: r[1] for r in cur.fetchall()}
+
+    def get_task(self, task_id: int):
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute('SELECT id, created_at, task_type, status, owner, started_at, finished_at, payload, result FROM queue WHERE id = %s',
+                        (task_id,))
+            r = cur.fetchone()
+            if r:
+                return {'id': r[0], 'created_at': r[1], 'task_type': r[2], 'status': r[3], 'owner': r[4], 'started_at': r[5],
+                        'finished_at': r[6], 'payload': json.loads(r[7]) if r[7] else None, 'result': json.loads(r[8]) if r[8] else None,
+                        'archived': False}
+            cur.execute('SELECT id, created_at, task_type, status, owner, started_at, finished_at, payload_z, result_z FROM queue_archive '
+                        'WHERE id = %s', (task_id,))
+            r = cur.fetchone()
+        if not r:
+            return None
+        unpack = _o()._unpack
+        return {'id': r[0], 'created_at': r[1], 'task_type': r[2], 'status': r[3], 'owner': r[4], 'started_at': r[5],
+                'finished_at': r[6], 'payload': unpack(r[7]), 'result': unpack(r[8]), 'archived': True}
+
+    # -- archive ----------------------------------------------------------
+
+    def archive_tasks(self, older_than_seconds: float = 7 * 86400, batch_size: int = 500, max_batches: int = None) -> int:
+        o = _o()
+        cutoff_ms = o._stamp()[1] - int(older_than_seconds * 1000)
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self._conn() as conn, conn.cursor() as cur:
+                # ids come from a sequence and are never handed out again, so
+                # unlike SQLite the newest row may be archived too
+                cur.execute(
+                    'SELECT id, created_at, created_at_ms, task_type, status, owner, started_at, finished_at, finished_at_ms, '
+                    "reclaim_attempts, payload, result FROM queue WHERE status IN ('completed', 'failed') AND finished_at_ms <= %s "
+                    'LIMIT %s FOR UPDATE SKIP LOCKED', (cutoff_ms, batch_size))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                archived_ms = o._stamp()[1]
+                psycopg2.extras.execute_values(
+                    cur,
+                    'INSERT INTO queue_archive (id, created_at, created_at_ms, task_type, status, owner, started_at, finished_at, '
+                    'finished_at_ms, reclaim_attempts, archived_at_ms, payload_z, result_z) VALUES %s',
+                    [r[:10] + (archived_ms,
+                               psycopg2.Binary(zlib.compress(r[10].encode('utf-8'))) if r[10] is not None else None,
+                               psycopg2.Binary(zlib.compress(r[11].encode('utf-8'))) if r[11] is not None else None) for r in rows],
+                    page_size=500)
+                cur.execute('DELETE FROM queue WHERE id = ANY(%s)', ([r[0] for r in rows],))
+                conn.commit()
+            total += len(rows)
+            batches += 1
+            if len(rows) < batch_size:
+                break
+        if total:
+            o.logger.info('archived %s finished tasks', total)
+        return total
+
+    # -- dead letters -----------------------------------------------------
+
+    @staticmethod
+    def _dead_letter_filter(task_ids=None, task_type=None, error=None):
+        """WHERE clause and params selecting un-replayed dead letters."""
+        where = 'replayed_at_ms IS NULL'
+        params = []
+        if task_ids is not None:
+            where += ' AND task_id = ANY(%s)'
+            params.append([int(i) for i in task_ids])
+        if task_type:
+            where += ' AND task_type = %s'
+            params.append(task_type)
+        if error:
+            where += " AND error LIKE %s ESCAPE '\\'"
+            params.append('%' + error.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        return where, params
+
+    def list_dead_letters(self, task_type: str = None, error: str = None, limit: int = 100) -> list:
+        where, params = self._dead_letter_filter(task_type=task_type, error=error)
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(f'SELECT task_id, task_type, error, attempts, history, failed_at FROM dead_letters WHERE {where} '
+                        'ORDER BY failed_at_ms DESC, task_id DESC LIMIT %s', params + [int(limit)])
+            rows = cur.fetchall()
+        return [{'task_id': r[0], 'task_type': r[1], 'error': r[2], 'attempts': r[3], 'history': json.loads(r[4]) if r[4] else [],
+                 'failed_at': r[5]} for r in rows]
+
+    def count_dead_letters(self) -> dict:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute('SELECT task_type, COUNT(*) FROM dead_letters WHERE replayed_at_ms IS NULL GROUP BY task_type')
+            return {r[0]: r[1] for r in cur.fetchall()}
+
+    @staticmethod
+    def _task_statuses(cur, ids) -> dict:
+        cur.execute('SELECT id, status FROM queue WHERE id = ANY(%s)', (list(ids),))
+        found = dict(cur.fetchall())
+        missing = [i for i in ids if i not in found]
+        if missing:
+            cur.execute('SELECT id, status FROM queue_archive WHERE id = ANY(%s)', (missing,))
+            found.update(cur.fetchall())
+        return found
+
+    @staticmethod
+    def _unarchive_failed(cur, ids):
+        """Move the failed archived tasks among `ids` back into the hot table."""
+        cur.execute("DELETE FROM queue_archive WHERE status = 'failed' AND id = ANY(%s) "
+                    'RETURNING id, created_at, created_at_ms, task_type, payload_z', (list(ids),))
+        archived = cur.fetchall()
+        if archived:
+            psycopg2.extras.execute_values(
+                cur, 'INSERT INTO queue (id, created_at, created_at_ms, task_type, payload, status, priority) VALUES %s',
+                [r[:4] + (zlib.decompress(r[4]).decode('utf-8') if r[4] is not None else None,) for r in archived],
+                template="(%s, %s, %s, %s, %s, 'failed', 0)")
+
+    def _restore_dependents(self, cur, parent_ids, forced, now_ms) -> list:
+        """`orchestrator._restore_dependents` on Postgres."""
+        restored, force = [], set(forced)
+        frontier, todo = list(parent_ids), list(forced)
+        while frontier or todo:
+            if frontier:
+                cur.execute('SELECT child_id FROM dead_letter_deps WHERE parent_id = ANY(%s) ORDER BY child_id', (frontier,))
+                todo += [r[0] for r in cur.fetchall()]
+            frontier = []
+            for child in dict.fromkeys(todo):
+                self._unarchive_failed(cur, [child])
+                cur.execute("SELECT 1 FROM queue WHERE id = %s AND status = 'failed' FOR UPDATE", (child,))
+                if cur.fetchone() is None:
+                    continue
+                cur.execute('SELECT parent_id FROM dead_letter_deps WHERE child_id = %s', (child,))
+                parents = [r[0] for r in cur.fetchall()]
+                statuses = self._task_statuses(cur, parents)
+                if child not in force and any(statuses.get(p) == 'failed' for p in parents):
+                    continue
+                waiting = [p for p in parents if statuses.get(p) not in (None, 'completed', 'failed')]
+                cur.execute(
+                    "UPDATE queue SET status = %s, pending_deps = %s, owner = NULL, started_at = NULL, started_at_ms = NULL, finished_at = NULL, "
+                    'finished_at_ms = NULL, result = NULL, lease_expires_ms = NULL, reclaim_attempts = 0, not_before_ms = NULL, '
+                    'rank_ms = %s - COALESCE(priority, 0) * %s WHERE id = %s',
+                    ('blocked' if waiting else 'pending', len(waiting) or None, now_ms, _o().PRIORITY_AGING_MS, child))
+                if waiting:
+                    psycopg2.extras.execute_values(cur, 'INSERT INTO task_deps (parent_id, child_id) VALUES %s ON CONFLICT DO NOTHING',
+                                                   [(p, child) for p in waiting])
+                cur.execute('DELETE FROM dead_letter_deps WHERE child_id = %s', (child,))
+                cur.execute('UPDATE dead_letters SET replayed_at_ms = %s WHERE task_id = %s', (now_ms, child))
+                restored.append(child)
+                frontier.append(child)
+            todo = []
+        return restored
+
+    def replay_dead_letters(self, task_ids=None, task_type: str = None, error: str = None,
+                            delay_seconds: float = 0, priority: int = None) -> list:
+        o = _o()
+        where, params = self._dead_letter_filter(task_ids, task_type, error)
+        explicit = task_ids is not None or bool(error)
+        now, now_ms = o._stamp()
+        visible_ms = now_ms + int(delay_seconds * 1000) if delay_seconds and delay_seconds > 0 else None
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(f'SELECT task_id, error FROM dead_letters WHERE {where} ORDER BY task_id FOR UPDATE', params)
+            picked = cur.fetchall()
+            direct = [t for t, e in picked if e != 'dependency_failed']
+            forced = [t for t, e in picked if e == 'dependency_failed'] if explicit else []
+            ids = []
+            if direct:
+                self._unarchive_failed(cur, direct)
+                cur.execute(
+                    "UPDATE queue SET status = 'pending', owner = NULL, started_at = NULL, started_at_ms = NULL, finished_at = NULL, "
+                    'finished_at_ms = NULL, result = NULL, lease_expires_ms = NULL, reclaim_attempts = 0, '
+                    'priority = COALESCE(%s, priority), not_before_ms = %s, rank_ms = %s - COALESCE(%s, priority, 0) * %s '
+                    "WHERE status = 'failed' AND id = ANY(%s) RETURNING id",
+                    (priority, visible_ms, visible_ms or now_ms, priority, o.PRIORITY_AGING_MS, direct))
+                ids = sorted(r[0] for r in cur.fetchall())
+                cur.execute('UPDATE dead_letters SET replayed_at_ms = %s WHERE task_id = ANY(%s)', (now_ms, ids))
+            if ids or forced:
+                ids += self._restore_dependents(cur, ids, forced, now_ms)
+            if ids:
+                cur.execute('INSERT INTO audit (timestamp, timestamp_ms, actor, action, details) VALUES (%s, %s, %s, %s, %s)',
+                            (now, now_ms, 'orchestrator', 'dead_letter_replay',
+                             json.dumps({'count': len(ids), 'task_type': task_type, 'error': error, 'delay_seconds': delay_seconds,
+                                         'priority': priority})))
+                self._notify(cur)
+            conn.commit()
+        return ids
+
+    def purge_dead_letters(self, task_ids=None, task_type: str = None, error: str = None) -> int:
+        where, params = self._dead_letter_filter(task_ids, task_type, error)
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(f'DELETE FROM dead_letter_deps WHERE child_id IN (SELECT task_id FROM dead_letters WHERE {where})', params)
+            cur.execute(f'DELETE FROM dead_letters WHERE {where}', params)
+            purged = cur.rowcount
+            conn.commit()
+        return purged
+
+    # -- schedules --------------------------------------------------------
+
+    def set_schedule(self, name: str, task_type: str, payload: dict = None, interval_seconds: float = None, cron: str = None,
+                     overlap: str = 'skip', missed: str = 'once', priority: int = 0, enabled: bool = True,
+                     first_run_delay_seconds: float = None) -> int:
+        o = _o()
+        next_ms = o._first_run_ms(interval_seconds, cron, overlap, missed, first_run_delay_seconds, o._stamp()[1])
+        with self._conn() as conn, conn.cursor() as cur:
+            # a replaced schedule starts over, like SQLite's INSERT OR REPLACE
+            cur.execute('INSERT INTO schedules (name, task_type, payload, interval_s, cron, overlap, missed, priority, enabled, next_run_ms) '
+                        'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (name) DO UPDATE SET task_type = EXCLUDED.task_type, '
+                        'payload = EXCLUDED.payload, interval_s = EXCLUDED.interval_s, cron = EXCLUDED.cron, overlap = EXCLUDED.overlap, '
+                        'missed = EXCLUDED.missed, priority = EXCLUDED.priority, enabled = EXCLUDED.enabled, '
+                        'next_run_ms = EXCLUDED.next_run_ms, last_run_ms = NULL, last_task_id = NULL',
+                        (name, task_type, json.dumps(payload or {}, ensure_ascii=False), interval_seconds, cron, overlap, missed,
+                         int(priority), 1 if enabled else 0, next_ms))
+            conn.commit()
+        return next_ms
+
+    def delete_schedule(self, name: str) -> bool:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute('DELETE FROM schedules WHERE name = %s', (name,))
+            deleted = cur.rowcount
+            conn.commit()
+        return bool(deleted)
+
+    def list_schedules(self) -> list:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute('SELECT name, task_type, payload, interval_s, cron, overlap, missed, priority, enabled, next_run_ms, '
+                        'last_run_ms, last_task_id FROM schedules ORDER BY next_run_ms, name')
+            rows = cur.fetchall()
+        return [{'name': r[0], 'task_type': r[1], 'payload': json.loads(r[2]) if r[2] else {}, 'interval_seconds': r[3],
+                 'cron': r[4], 'overlap': r[5], 'missed': r[6], 'priority': r[7], 'enabled': bool(r[8]), 'next_run_ms': r[9],
+                 'last_run_ms': r[10], 'last_task_id': r[11]} for r in rows]
+
+    def run_due_schedules(self, names=None) -> list:
+        o = _o()
+        now, now_ms = o._stamp()
+        sql = ('SELECT name, task_type, payload, interval_s, cron, overlap, missed, priority, next_run_ms, last_task_id '
+               'FROM schedules WHERE enabled = 1 AND next_run_ms <= %s')
+        params = [now_ms]
+        if names is not None:
+            names = list(names)
+            if not names:
+                return []
+            sql += ' AND name = ANY(%s)'
+            params.append(names)
+        out = []
+        with self._conn() as conn, conn.cursor() as cur:
+            # a concurrent timer waits on the row lock and then no longer
+            # finds the schedule due, so no run is enqueued twice
+            cur.execute(f'{sql} ORDER BY name FOR UPDATE', params)
+            for name, task_type, payload, interval_s, cron, overlap, missed, priority, due_ms, last_task_id in cur.fetchall():
+                count, fires, nxt = o._due_runs(interval_s, cron, due_ms, now_ms)
+                if count > 1 and missed != 'all':
+                    fires = fires[-1:] if missed == 'once' else []
+                skipped = None if fires else 'missed'
+                if fires and overlap == 'skip' and last_task_id is not None:
+                    cur.execute("SELECT 1 FROM queue WHERE id = %s AND status IN ('pending', 'in_progress', 'blocked')", (last_task_id,))
+                    if cur.fetchone():
+                        fires, skipped = [], 'overlap'
+                task_ids = []
+                rank_ms = now_ms - int(priority) * o.PRIORITY_AGING_MS
+                for fire_ms in fires:
+                    row = (now, now_ms, task_type, payload, 'pending', int(priority), None, rank_ms, f'schedule:{name}:{fire_ms}')
+                    task_ids.append(self._insert_deduped(cur, row, row[-1], now_ms - o.DEDUP_WINDOW_MS)[0])
+                cur.execute('UPDATE schedules SET next_run_ms = %s, last_run_ms = COALESCE(%s, last_run_ms), '
+                            'last_task_id = COALESCE(%s, last_task_id) WHERE name = %s',
+                            (nxt, now_ms if task_ids else None, task_ids[-1] if task_ids else None, name))
+                out.append({'name': name, 'task_ids': task_ids, 'skipped': skipped, 'next_run_ms': nxt})
+            if any(r['task_ids'] for r in out):
+                self._notify(cur)
+            conn.commit()
+        return out
+
+    # -- reclaim ----------------------------------------------------------
+
+    def reclaim_stale_tasks(self, ttl_seconds: int = 300, max_attempts: int = 3) -> int:
+        ts, ts_ms = _o()._stamp()
+        cutoff_ms = ts_ms - int(ttl_seconds * 1000)
+        stale = ("status = 'in_progress' AND (lease_expires_ms < %s OR "
+                 "(lease_expires_ms IS NULL AND (started_at_ms IS NULL OR started_at_ms < %s)))")
+        failed_result = json.dumps({'error': 'reclaim_max_attempts'})
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(f"UPDATE queue SET status = 'failed', finished_at = %s, finished_at_ms = %s, result = %s "
+                        f'WHERE {stale} AND COALESCE(reclaim_attempts, 0) >= %s RETURNING id',
+                        (ts, ts_ms, failed_result, ts_ms, cutoff_ms, max_attempts))
+            failed = [r[0] for r in cur.fetchall()]
+            cur.execute("UPDATE queue SET status = 'pending', owner = NULL, started_at = NULL, started_at_ms = NULL, lease_expires_ms = NULL, "
+                        'reclaim_attempts = COALESCE(reclaim_attempts, 0) + 1, last_reclaimed_at = %s '
+                        f'WHERE {stale} RETURNING id, reclaim_attempts', (ts, ts_ms, cutoff_ms))
+            reclaimed = cur.fetchall()
+            if failed:
+                self._record_dead_letters(cur, [(task_id, 'reclaim_max_attempts') for task_id in failed], ts, ts_ms)
+                if self._has_dependents(cur):
+                    self._fail_dependents(cur, failed, ts, ts_ms)
+            audit_rows = [(ts, ts_ms, 'orchestrator', 'reclaim_failed', json.dumps({'task_id': t, 'reason': 'reclaim_max_attempts'})) for t in failed]
+            audit_rows += [(ts, ts_ms, 'orchestrator', 'reclaim', json.dumps({'task_id': t, 'attempts': a})) for t, a in reclaimed]
+            if audit_rows:
+                psycopg2.extras.execute_values(cur, 'INSERT INTO audit (timestamp, timestamp_ms, actor, action, details) VALUES %s', audit_rows)
+            if reclaimed:
+                self._notify(cur)
+            conn.commit()
+        return len(reclaimed)
+
+    def reclaim_and_report(self, ttl_seconds: int = 300, max_attempts: int = 3, status_path: str = None):
+        o = _o()
+        _, start_ms = o._stamp()
+        reclaimed = self.reclaim_stale_tasks(ttl_seconds, max_attempts)
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT action, COUNT(*) FROM audit WHERE action IN ('reclaim', 'reclaim_failed') AND timestamp_ms >= %s GROUP BY action",
+                        (start_ms,))
+            audit = dict(cur.fetchall())
+            cur.execute("SELECT status, COUNT(*) FROM queue WHERE status IN ('pending', 'in_progress') GROUP BY status")
+            counts = dict(cur.fetchall())
+        report = {
+            'timestamp': o._stamp()[0],
+            'reclaimed': reclaimed,
+            'reclaim_audit_reclaim': audit.get('reclaim', 0),
+            'reclaim_audit_failed': audit.get('reclaim_failed', 0),
+            'pending': counts.get('pending', 0),
+            'in_progress': counts.get('in_progress', 0),
+        }
+        if status_path:
+            try:
+                with open(status_path, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+            except Exception:
+                o.logger.exception('failed to write status file %s', status_path)
+        return report
+
+    def TaskWaiter(self, db_path=None):
+        return PgTaskWaiter(self)
+
+
+def install(namespace: dict, dsn: str = None, schema: str = None):
+    """Route the queue functions of the `orchestrator` module `namespace` to Postgres."""
+    dsn = dsn or os.environ.get('GAIA_QUEUE_DSN') or os.environ.get('DATABASE_URL')
+    if not dsn:
+        raise RuntimeError('GAIA_QUEUE_BACKEND=postgres needs GAIA_QUEUE_DSN (or DATABASE_URL)')
+    queue = PostgresQueue(dsn, schema=schema or os.environ.get('GAIA_QUEUE_PG_SCHEMA') or None)
+    sqlite_init = namespace['init_db']
+
+    def init_db():
+        """Create the SQLite audit tables and the Postgres queue schema."""
+        sqlite_init()
+        queue.init_db()
+
+    namespace['init_db'] = init_db
+    namespace['_pg_queue'] = queue
+    for name in QUEUE_API:
+        namespace[name] = getattr(queue, name)
+    return queue
@@ -12,9 +12,14 @@ import json
 import time
 import uuid
 import os
+import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from gaia import event_log  # noqa: E402
+
 EVENTS = ROOT / 'events.ndjson'
 PENDING = ROOT / '.tmp' / 'pending_commands.json'
 
@@ -23,8 +28,7 @@ def append_event(evt: dict):
     evt['timestamp'] = evt.get('timestamp') or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
     try:
         EVENTS.parent.mkdir(parents=True, exist_ok=True)
-        with open(EVENTS, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, ensure_ascii=False) + '\n')
+        event_log.open_log(str(EVENTS)).append(evt)
     except Exception:
         pass
 
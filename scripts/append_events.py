@@ -2,10 +2,14 @@
 Fetch latest events from the local monitor and append them to events.ndjson
 Usage: python scripts/append_events.py [n]
 """
+import os
 import sys
 import urllib.request
 import json
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gaia import event_log  # noqa: E402
+
 n = 50
 if len(sys.argv) > 1:
     try:
@@ -23,9 +27,5 @@ if not data:
     print('No events returned')
     sys.exit(0)
 
-count = 0
-with open('events.ndjson', 'a', encoding='utf-8') as f:
-    for o in data:
-        f.write(json.dumps(o, separators=(',',':')) + '\n')
-        count += 1
-print('Appended', count, 'events')
+event_log.open_log('events.ndjson').append_many(data)
+print('Appended', len(data), 'events')
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
-"""Standalone approval listener runner that does not import `gaia` package.
-Writes approval events to `events.ndjson` and inserts a trace into `gaia.db`.
+"""Standalone approval listener runner that does not import the `gaia` agent stack.
+Writes approval events to `events.ndjson` (through `gaia.event_log` only) and inserts a trace into `gaia.db`.
 """
 import os
+import sys
 import time
 import json
 import sqlite3
@@ -11,6 +12,10 @@ import requests
 import datetime
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from gaia import event_log  # noqa: E402
+
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
 DB_PATH = os.path.join(ROOT, 'gaia.db')
 APPR_FILE = os.path.join(ROOT, '.tmp', 'approval.json')
@@ -22,8 +27,7 @@ def now():
 
 def append_event(evt):
     try:
-        with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, default=str) + '\n')
+        event_log.open_log(EVENTS_FILE).append(evt)
     except Exception as e:
         print('WARN append_event', e)
 
@@ -23,6 +23,9 @@ import getpass
 
 ROOT = Path(__file__).resolve().parent.parent
 EVENTS_FILE = ROOT / 'events.ndjson'
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from gaia import event_log  # noqa: E402
 
 
 def checkpoint_path(n: int) -> Path:
@@ -51,8 +54,7 @@ def emit_event(n: int, signer: str, message: str) -> None:
         'timestamp': datetime.utcnow().isoformat() + 'Z'
     }
     try:
-        with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(ev, ensure_ascii=False) + '\n')
+        event_log.open_log(str(EVENTS_FILE)).append(ev)
     except Exception:
         pass
     # best-effort audit write
@@ -9,10 +9,15 @@ and append an event to `events.ndjson`.
 """
 import json
 import os
+import sys
 import time
 from datetime import datetime
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
+if os.path.abspath(ROOT) not in sys.path:
+    sys.path.insert(0, os.path.abspath(ROOT))
+from gaia import event_log  # noqa: E402
+
 TMP_DIR = os.path.join(ROOT, '.tmp')
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
 
@@ -21,8 +26,7 @@ os.makedirs(TMP_DIR, exist_ok=True)
 
 def append_event(ev: dict):
     ev['timestamp'] = datetime.utcnow().isoformat() + 'Z'
-    with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+    event_log.open_log(EVENTS_FILE).append(ev)
     # also append to a simple log for quick tailing
     try:
         log_path = os.path.join(TMP_DIR, 'automation.log')
@@ -4,6 +4,7 @@
 Usage:
   python scripts/ascheduler.py --config scripts/ascheduler_config.json
   python scripts/ascheduler.py --run-once telegram
+  python scripts/ascheduler.py --enqueue-schedules
 
 The config file is JSON with an array of tasks. Each task:
   {
@@ -15,6 +16,10 @@ The config file is JSON with an array of tasks. Each task:
 
 This script launches a background thread per task that runs the command
 on the configured interval. It's intentionally small and dependency-free.
+
+With `--enqueue-schedules` the tasks are instead registered as orchestrator
+schedules (`job` tasks named `ascheduler:<name>`) and run by the shared
+worker pool; see `agents/schedule_timer.py`.
 """
 from __future__ import annotations
 
@@ -24,6 +29,7 @@ import logging
 import os
 import shlex
 import subprocess
+import sys
 import threading
 import time
 from typing import Any, Dict
@@ -68,6 +74,36 @@ def run_command(task: Dict[str, Any], once: bool = False) -> None:
     t.start()
 
 
+def enqueue_schedules(tasks) -> int:
+    """Register every interval task as an orchestrator schedule."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    import orchestrator
+    orchestrator.require_queue_features('schedules')
+
+    count = 0
+    for task in tasks:
+        name = task.get("name", "unnamed")
+        cmd = task.get("command")
+        interval = int(task.get("interval_minutes", 0))
+        if not cmd or interval <= 0:
+            LOG.info("Task %s has no command or interval, not scheduled", name)
+            continue
+        argv = shlex.split(cmd) if isinstance(cmd, str) else [str(c) for c in cmd]
+        # the worker's `job` handler runs .py scripts with the right interpreter
+        if len(argv) > 1 and os.path.basename(argv[0]).startswith("python") and argv[1].endswith(".py"):
+            argv = argv[1:]
+        if argv and not os.path.isabs(argv[0]) and os.path.exists(os.path.join(root, argv[0])):
+            argv[0] = os.path.join(root, argv[0])
+        payload = {"cmd": " ".join(argv), "env": task.get("env", {}) or {}, "check": True}
+        orchestrator.set_schedule(f"ascheduler:{name}", "job", payload, interval_seconds=interval * 60,
+                                  first_run_delay_seconds=0)
+        LOG.info("Scheduled %s every %s minutes", name, interval)
+        count += 1
+    return count
+
+
 def load_config(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as fh:
         return json.load(fh)
@@ -77,11 +113,17 @@ def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", default="scripts/ascheduler_config.json")
     parser.add_argument("--run-once", help="Run a single task by name and exit")
+    parser.add_argument("--enqueue-schedules", action="store_true",
+                        help="Register the tasks as orchestrator schedules and exit")
     args = parser.parse_args()
 
     config = load_config(args.config)
     tasks = config.get("tasks", []) if isinstance(config, dict) else list(config)
 
+    if args.enqueue_schedules:
+        enqueue_schedules(tasks)
+        return
+
     if args.run_once:
         task = next((t for t in tasks if t.get("name") == args.run_once), None)
         if not task:
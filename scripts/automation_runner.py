@@ -18,10 +18,16 @@ from pathlib import Path
 import uuid
 import json
 import importlib
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gaia import event_log
 
 SESSION_STATE = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.copilot', 'session_state.json')
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
 TASKS_FILE = os.path.join(ROOT, 'tasks.json')
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
 TMP_DIR = os.path.join(ROOT, '.tmp')
@@ -33,8 +39,7 @@ running = True
 
 def append_event(ev: dict):
     ev['timestamp'] = datetime.utcnow().isoformat() + 'Z'
-    with open(EVENTS_FILE, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+    event_log.open_log(EVENTS_FILE).append(ev)
     # also append to a simple log for quick tailing
     try:
         log_path = os.path.join(TMP_DIR, 'automation.log')
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Measure orchestrator claim throughput with concurrent worker processes.
+
+Pre-fills a temporary `gaia.db` with `noop` tasks, starts N processes that each
+drive `agents.worker.run_once` until the queue is empty, and reports
+claims/sec for every process count.
+
+With `--baseline` every round is also run against the claim path the queue
+had before connection pooling (a fresh `sqlite3.connect` per call, a SELECT
+then an UPDATE under BEGIN IMMEDIATE, rollback journal), and both columns
+are printed side by side. The baseline children skip the worker loop and
+the old per-call `init_db`, so the speedup shown is a lower bound.
+
+Usage:
+  python scripts/bench_claims.py [--workers 1 8 32] [--tasks 2000] [--baseline] [--out bench.json]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ensure repo root is on sys.path so `orchestrator` and `agents` import when
+# running this file directly.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _baseline_claim(db_path: str, worker_id: str):
+    """Claim one task the pre-pooling way; returns its id or None."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        cur = conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        cur.execute("SELECT id, created_at, task_type, payload FROM queue WHERE status = 'pending' ORDER BY created_at LIMIT 1")
+        row = cur.fetchone()
+        if row:
+            now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            cur.execute('UPDATE queue SET status = ?, owner = ?, started_at = ? WHERE id = ?', ('in_progress', worker_id, now, row[0]))
+        conn.commit()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def _baseline_complete(db_path: str, task_id: int):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        conn.execute('UPDATE queue SET status = ?, finished_at = ?, result = ? WHERE id = ?', ('completed', now, '{}', task_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _child(db_path: str, worker_id: str, baseline: bool = False):
+    """Worker process body: wait for the go signal, then drain the queue."""
+    import orchestrator
+    from agents import worker
+
+    orchestrator.DB_PATH = db_path
+    print('ready', flush=True)
+    sys.stdin.readline()
+    claimed = 0
+    if baseline:
+        while True:
+            task_id = _baseline_claim(db_path, worker_id)
+            if task_id is None:
+                break
+            _baseline_complete(db_path, task_id)
+            claimed += 1
+    else:
+        while worker.run_once(worker_id, max_jobs=1) == 0:
+            claimed += 1
+    print(claimed, flush=True)
+    return 0
+
+
+def run_round(n_workers: int, n_tasks: int, baseline: bool = False) -> dict:
+    import orchestrator
+
+    with tempfile.TemporaryDirectory(prefix='bench_claims_') as d:
+        db_path = os.path.join(d, 'gaia.db')
+        orchestrator.DB_PATH = db_path
+        orchestrator.init_db()
+        for i in range(n_tasks):
+            orchestrator.enqueue_task('noop', {'i': i})
+        if baseline:
+            # the pre-pooling queue never switched the database to WAL
+            orchestrator.close_pool()
+            conn = sqlite3.connect(db_path)
+            conn.execute('PRAGMA journal_mode=DELETE')
+            conn.close()
+
+        procs = []
+        for i in range(n_workers):
+            procs.append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--child', db_path, f'bench-w{i}'] + (['baseline'] if baseline else []),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=ROOT))
+        for p in procs:
+            p.stdout.readline()
+
+        start = time.perf_counter()
+        for p in procs:
+            p.stdin.write('go\n')
+            p.stdin.flush()
+        claimed = 0
+        for p in procs:
+            out, _ = p.communicate()
+            try:
+                claimed += int(out.strip() or 0)
+            except ValueError:
+                pass
+        elapsed = time.perf_counter() - start
+
+    return {
+        'workers': n_workers,
+        'tasks': n_tasks,
+        'claimed': claimed,
+        'elapsed_s': round(elapsed, 3),
+        'claims_per_sec': round(claimed / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--child':
+        return _child(sys.argv[2], sys.argv[3], baseline=sys.argv[4:] == ['baseline'])
+
+    p = argparse.ArgumentParser(prog='bench-claims')
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32], help='Worker process counts to measure')
+    p.add_argument('--tasks', type=int, default=2000, help='Tasks to drain per round')
+    p.add_argument('--baseline', action='store_true', help='Also measure the pre-pooling claim path and compare')
+    p.add_argument('--out', default=None, help='Optional path to write the JSON report')
+    args = p.parse_args(argv)
+
+    results = [run_round(n, args.tasks) for n in args.workers]
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'results': results}
+    if args.baseline:
+        report['baseline'] = [run_round(n, args.tasks, baseline=True) for n in args.workers]
+        # the table goes to stderr so stdout stays one JSON document
+        print(f"{'workers':>8} {'baseline/s':>12} {'current/s':>12} {'speedup':>8}", file=sys.stderr)
+        for old, new in zip(report['baseline'], results):
+            speedup = new['claims_per_sec'] / old['claims_per_sec'] if old['claims_per_sec'] and new['claims_per_sec'] else None
+            print(f"{new['workers']:>8} {old['claims_per_sec'] or 0:>12.1f} {new['claims_per_sec'] or 0:>12.1f} "
+                  f"{'%.2fx' % speedup if speedup else '-':>8}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
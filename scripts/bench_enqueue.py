@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Measure bulk enqueue versus per-item enqueue for backlog imports.
+
+Each case runs against a fresh temporary `gaia.db`:
+- `enqueue_task_loop`: one `orchestrator.enqueue_task` call per item
+- `enqueue_tasks_bulk`: a single `orchestrator.enqueue_tasks` call
+- `scrum_backlog_import`: `agents.scrum_backlog import-file --enqueue` end to end
+
+Usage:
+  python scripts/bench_enqueue.py [--items 10000] [--out bench.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Ensure repo root is on sys.path so `orchestrator` and `agents` import when
+# running this file directly.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import orchestrator
+from agents import scrum_backlog
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - start, 3)
+
+
+def run(n_items: int) -> dict:
+    stories = [{'id': f's{i}', 'title': f'story {i}'} for i in range(n_items)]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench_enqueue_') as d:
+        orchestrator.DB_PATH = os.path.join(d, 'loop.db')
+        orchestrator.init_db()
+        results['enqueue_task_loop_s'] = _timed(
+            lambda: [orchestrator.enqueue_task('create-ticket', {'story': s}) for s in stories])
+
+        orchestrator.DB_PATH = os.path.join(d, 'bulk.db')
+        orchestrator.init_db()
+        results['enqueue_tasks_bulk_s'] = _timed(
+            lambda: orchestrator.enqueue_tasks([('create-ticket', {'story': s}) for s in stories]))
+
+        orchestrator.DB_PATH = os.path.join(d, 'import.db')
+        orchestrator.init_db()
+        backlog = os.path.join(d, 'backlog.json')
+        with open(backlog, 'w', encoding='utf-8') as f:
+            json.dump(stories, f)
+        scrum_backlog.EVENTS_PATH = os.path.join(d, 'events.ndjson')
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['scrum_backlog_import_s'] = _timed(
+                lambda: scrum_backlog.main(['import-file', '--file', backlog, '--enqueue']))
+        results['queued'] = len(orchestrator.list_tasks('pending'))
+    results['items'] = n_items
+    return results
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='bench-enqueue')
+    p.add_argument('--items', type=int, default=10000)
+    p.add_argument('--out', default=None, help='Optional path to write the JSON report')
+    args = p.parse_args(argv)
+
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'results': run(args.items)}
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Queue throughput and latency benchmark for the orchestrator.
+
+Starts N worker processes against a temporary `gaia.db`. Each claims tasks
+and runs them through `agents.worker._process_task` with the `noop` handler,
+while this process enqueues `noop` tasks at a fixed rate. When every task is
+finished it reports:
+
+- throughput (tasks completed per second, first enqueue to last completion)
+- p50/p95/p99 of enqueue->claim and claim->complete latency (ms, from the
+  epoch columns stored on each row)
+- write-lock wait summed over all processes (`orchestrator.LOCK_WAIT_STATS`,
+  SQLite only)
+
+`--backend postgres --dsn ...` runs the same load against the PostgreSQL
+queue (`orchestrator_pg`) in a throwaway schema, so the two backends can be
+compared on one host.
+
+The report is printed and, with `--out`, written as JSON so runs can be
+compared over time.
+
+Usage:
+  python scripts/bench_queue.py [--workers 8] [--tasks 2000] [--rate 500] [--batch 1] [--out bench.json]
+                                [--backend sqlite|postgres] [--dsn postgresql://...]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ensure repo root is on sys.path so `orchestrator` and `agents` import when
+# running this file directly.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def _summary(values):
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else None,
+    }
+
+
+def _child(db_path: str, worker_id: str, stop_path: str, batch: int):
+    """Worker process body: claim and run tasks until the stop file appears."""
+    import orchestrator
+    from agents import worker
+
+    orchestrator.DB_PATH = db_path
+    waiter = orchestrator.TaskWaiter()
+    print('ready', flush=True)
+    processed = 0
+    while True:
+        tasks = orchestrator.claim_tasks(worker_id, batch)
+        for t in tasks:
+            worker._process_task(t, worker_id)
+        processed += len(tasks)
+        if not tasks:
+            if os.path.exists(stop_path):
+                break
+            waiter.wait(0.05)
+    waiter.close()
+    print(json.dumps({'processed': processed, 'lock_wait': orchestrator.LOCK_WAIT_STATS}), flush=True)
+    return 0
+
+
+def _finished_rows(orchestrator) -> list:
+    sql = "SELECT created_at_ms, started_at_ms, finished_at_ms FROM queue WHERE status = 'completed'"
+    if orchestrator.QUEUE_BACKEND == 'postgres':
+        with orchestrator._pg_queue._conn() as conn, conn.cursor() as cur:
+            cur.execute(sql)
+            return cur.fetchall()
+    conn = orchestrator._connect()
+    rows = conn.execute(sql).fetchall()
+    conn.close()
+    return rows
+
+
+def run(n_workers: int, n_tasks: int, rate: float, batch: int, timeout: float,
+        backend: str = 'sqlite', dsn: str = None) -> dict:
+    if backend == 'postgres':
+        # set before orchestrator is imported; the worker processes inherit it
+        os.environ.update({'GAIA_QUEUE_BACKEND': 'postgres', 'GAIA_QUEUE_DSN': dsn,
+                           'GAIA_QUEUE_PG_SCHEMA': f'bench_queue_{os.getpid()}'})
+    import orchestrator
+
+    with tempfile.TemporaryDirectory(prefix='bench_queue_') as d:
+        db_path = os.path.join(d, 'gaia.db')
+        stop_path = os.path.join(d, 'stop')
+        orchestrator.DB_PATH = db_path
+        orchestrator.init_db()
+
+        procs = [subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--child', db_path, f'bench-w{i}', stop_path, str(batch)],
+            stdout=subprocess.PIPE, text=True, cwd=ROOT) for i in range(n_workers)]
+        for p in procs:
+            p.stdout.readline()
+
+        # drive the enqueue rate; rate <= 0 means as fast as possible
+        start = time.perf_counter()
+        for i in range(n_tasks):
+            if rate > 0:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            orchestrator.enqueue_task('noop', {'i': i})
+        enqueue_s = time.perf_counter() - start
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            counts = orchestrator.count_tasks()
+            if counts.get('completed', 0) + counts.get('failed', 0) >= n_tasks:
+                break
+            time.sleep(0.05)
+        open(stop_path, 'w').close()
+
+        lock_wait = {'count': 0, 'total_s': 0.0, 'max_s': 0.0}
+        processed = 0
+        for p in procs:
+            out, _ = p.communicate(timeout=30)
+            try:
+                res = json.loads(out.strip().splitlines()[-1])
+            except (ValueError, IndexError):
+                continue
+            processed += res['processed']
+            lw = res['lock_wait']
+            lock_wait['count'] += lw['count']
+            lock_wait['total_s'] += lw['total_s']
+            lock_wait['max_s'] = max(lock_wait['max_s'], lw['max_s'])
+
+        rows = _finished_rows(orchestrator)
+        if backend == 'postgres':
+            orchestrator._pg_queue.drop_schema()
+        orchestrator.close_pool()
+
+    to_claim = [r[1] - r[0] for r in rows if r[0] is not None and r[1] is not None]
+    to_complete = [r[2] - r[1] for r in rows if r[1] is not None and r[2] is not None]
+    span_s = (max(r[2] for r in rows) - min(r[0] for r in rows)) / 1000.0 if rows else 0
+    lock_wait['total_s'] = round(lock_wait['total_s'], 4)
+    lock_wait['max_s'] = round(lock_wait['max_s'], 4)
+    lock_wait['mean_ms'] = round(lock_wait['total_s'] * 1000 / lock_wait['count'], 3) if lock_wait['count'] else None
+    return {
+        'completed': len(rows),
+        'processed_by_workers': processed,
+        'enqueue_s': round(enqueue_s, 3),
+        'throughput_per_s': round(len(rows) / span_s, 1) if span_s > 0 else None,
+        'enqueue_to_claim_ms': _summary(to_claim),
+        'claim_to_complete_ms': _summary(to_complete),
+        'lock_wait': lock_wait,
+    }
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == '--child':
+        return _child(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]))
+
+    p = argparse.ArgumentParser(prog='bench-queue')
+    p.add_argument('--workers', type=int, default=8, help='Worker processes')
+    p.add_argument('--tasks', type=int, default=2000, help='Tasks to enqueue')
+    p.add_argument('--rate', type=float, default=500, help='Enqueue rate in tasks/sec (0 = unthrottled)')
+    p.add_argument('--batch', type=int, default=1, help='Tasks claimed per claim_tasks call')
+    p.add_argument('--timeout', type=float, default=120, help='Seconds to wait for the queue to drain')
+    p.add_argument('--out', default=None, help='Optional path to write the JSON report')
+    p.add_argument('--backend', choices=('sqlite', 'postgres'), default='sqlite', help='Queue backend to measure')
+    p.add_argument('--dsn', default=os.environ.get('GAIA_QUEUE_DSN'), help='PostgreSQL DSN for --backend postgres')
+    args = p.parse_args(argv)
+    if args.backend == 'postgres' and not args.dsn:
+        p.error('--backend postgres needs --dsn (or GAIA_QUEUE_DSN)')
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'config': {'workers': args.workers, 'tasks': args.tasks, 'rate': args.rate, 'batch': args.batch,
+                   'backend': args.backend},
+        'results': run(args.workers, args.tasks, args.rate, args.batch, args.timeout, args.backend, args.dsn),
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
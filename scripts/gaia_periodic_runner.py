@@ -6,6 +6,8 @@ Environment:
 
 Usage:
   python scripts/gaia_periodic_runner.py --interval 3600
+  python scripts/gaia_periodic_runner.py --once
+  python scripts/gaia_periodic_runner.py --schedule --interval 3600   # run --once from the worker pool
 """
 import subprocess
 import time
@@ -50,6 +52,19 @@ def notify(report):
         pass
 
 
+def schedule(interval=3600):
+    """Register the run as an orchestrator schedule instead of sleeping here."""
+    import sys
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import orchestrator
+    orchestrator.require_queue_features('schedules')
+    # overlap='skip': a slow test run never stacks up behind itself
+    orchestrator.set_schedule('gaia_periodic_runner', 'job', {'cmd': f'{Path(__file__).resolve()} --once', 'timeout': 1900},
+                              interval_seconds=interval, overlap='skip', first_run_delay_seconds=0)
+    print('Scheduled periodic runner, interval', interval)
+
+
 def main(interval=3600):
     print('Starting periodic runner, interval', interval)
     while True:
@@ -62,5 +77,12 @@ if __name__ == '__main__':
     import argparse
     p = argparse.ArgumentParser()
     p.add_argument('--interval', type=int, default=3600)
+    p.add_argument('--once', action='store_true', help='Run the tests once, notify and exit')
+    p.add_argument('--schedule', action='store_true', help='Register an orchestrator schedule and exit')
     args = p.parse_args()
-    main(interval=args.interval)
+    if args.schedule:
+        schedule(interval=args.interval)
+    elif args.once:
+        notify(run_tests()[0])
+    else:
+        main(interval=args.interval)
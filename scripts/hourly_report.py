@@ -3,8 +3,13 @@ import time
 import json
 import glob
 import datetime
+import sys
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from gaia import event_log  # noqa: E402
+
 TMP = os.path.join(ROOT, '.tmp')
 EVENTS = os.path.join(ROOT, 'events.ndjson')
 RUN_META = os.path.join(TMP, 'run_20h.json')
@@ -69,8 +74,7 @@ def tail_service_logs(lines=5):
 
 def append_event(evt: dict):
     try:
-        with open(EVENTS, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, ensure_ascii=False) + '\n')
+        event_log.open_log(EVENTS).append(evt)
     except Exception:
         pass
 
@@ -3,21 +3,36 @@
 Usage:
   python scripts/maintenance_scheduler.py --interval 3600    # run every hour
   python scripts/maintenance_scheduler.py --once             # run once and exit
+  python scripts/maintenance_scheduler.py --schedule         # hand the interval to the orchestrator
 
 This script is simple and intended to be run under the existing supervisor or as a scheduled task.
+With `--schedule` it registers a `maintenance` schedule instead of sleeping,
+so the shared worker pool runs `--once` on the interval.
 """
+import os
 import time
 import argparse
 import sys
-sys.path.insert(0, '.')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
 from importlib import import_module
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--interval', '-i', type=int, default=3600, help='Seconds between runs')
 parser.add_argument('--once', action='store_true', help='Run once and exit')
+parser.add_argument('--schedule', action='store_true', help='Register an orchestrator schedule and exit')
 args = parser.parse_args()
 
+if args.schedule:
+    import orchestrator
+    orchestrator.require_queue_features('schedules')
+    orchestrator.set_schedule('maintenance', 'job', {'cmd': f'{os.path.abspath(__file__)} --once', 'check': True},
+                              interval_seconds=args.interval, first_run_delay_seconds=0)
+    print('maintenance: scheduled every', args.interval, 'seconds')
+    sys.exit(0)
+
 # attempt to import tasks
 try:
     tcm = import_module('scripts.tg_command_manager')
@@ -18,6 +18,11 @@ from typing import Any, Dict, Optional
 
 import requests
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from gaia import event_log  # noqa: E402
+
 # Structured logger
 logger = logging.getLogger("online_agent")
 handler = logging.StreamHandler()
@@ -32,9 +37,7 @@ def now_iso() -> str:
 
 
 def append_event(event: Dict[str, Any]) -> None:
-    path = os.path.join(os.getcwd(), "events.ndjson")
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    event_log.open_log(os.path.join(os.getcwd(), "events.ndjson")).append(event)
 
 
 def write_audit(trace_id: str, action: str, payload: Dict[str, Any]) -> None:
@@ -6,9 +6,11 @@ writes an event to `events.ndjson` and a gaia.db trace (if db available).
 """
 from pathlib import Path
 import requests
-import json
 import sys
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from gaia import event_log  # noqa: E402
 
 def validate_token(token: str) -> dict:
     url = f'https://api.telegram.org/bot{token}/getMe'
@@ -20,10 +22,8 @@ def validate_token(token: str) -> dict:
         return {'ok': False, 'error': str(e)}
 
 def append_event(evt: dict):
-    fn = ROOT / 'events.ndjson'
     try:
-        with open(fn, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt) + "\n")
+        event_log.open_log(str(ROOT / 'events.ndjson')).append(evt)
     except Exception:
         pass
 
@@ -61,7 +61,6 @@ if __name__ == '__main__':
 
 Safe scaffold to rotate an admin token. It supports `--dry-run` to preview actions.
 """
-from __future__ import annotations
 import argparse
 from pathlib import Path
 import json
@@ -22,6 +22,8 @@ def load_agent(path, name):
 
 REPO_ROOT = os.path.abspath(os.path.dirname(__file__) + os.sep + '..')
 sys.path.insert(0, REPO_ROOT)
+from gaia import event_log  # noqa: E402
+
 EVENTS_PATH = os.environ.get('GAIA_EVENTS_PATH', os.path.join(REPO_ROOT, 'events.ndjson'))
 EXAMPLE = os.path.join(REPO_ROOT, 'examples', 'sample_backlog.json')
 STORIES_FILE = os.path.join(REPO_ROOT, 'examples', 'stories.json')
@@ -40,21 +42,8 @@ ASSIGNEES = ['alice', 'bob', 'carol']
 
 
 def read_events_of_type(ev_type):
-    if not os.path.exists(EVENTS_PATH):
-        return []
-    outs = []
-    with open(EVENTS_PATH, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                ev = json.loads(line)
-            except Exception:
-                continue
-            if ev.get('type') == ev_type:
-                outs.append(ev)
-    return outs
+    # sealed segments included; a plain (unsegmented) file reads the same way
+    return [ev for ev in event_log.open_log(EVENTS_PATH).read_range() if isinstance(ev, dict) and ev.get('type') == ev_type]
 
 
 def main():
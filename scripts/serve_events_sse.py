@@ -5,11 +5,14 @@ Usage: python scripts/serve_events_sse.py --host 0.0.0.0 --port 8001
 Open http://localhost:8001/ in a browser.
 """
 import argparse
-import time
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gaia import tail
 
 ROOT = os.getcwd()
 EVENTS = os.path.join(ROOT, 'events.ndjson')
@@ -32,25 +35,17 @@ class Handler(BaseHTTPRequestHandler):
             self.send_header('Connection', 'keep-alive')
             self.end_headers()
             try:
-                # tail the file
-                if not os.path.exists(EVENTS):
-                    open(EVENTS, 'a').close()
-                with open(EVENTS, 'r', encoding='utf-8') as fh:
-                    fh.seek(0, os.SEEK_END)
-                    while True:
-                        line = fh.readline()
-                        if not line:
-                            time.sleep(0.5)
-                            continue
-                        data = line.strip()
-                        if not data:
-                            continue
-                        msg = f"data: {data}\n\n"
-                        try:
-                            self.wfile.write(msg.encode('utf-8'))
-                            self.wfile.flush()
-                        except BrokenPipeError:
-                            break
+                # follow the file (across event-log rolls), waking only when it changes
+                for line in tail.follow(EVENTS):
+                    data = line.decode('utf-8', errors='replace').strip()
+                    if not data:
+                        continue
+                    msg = f"data: {data}\n\n"
+                    try:
+                        self.wfile.write(msg.encode('utf-8'))
+                        self.wfile.flush()
+                    except BrokenPipeError:
+                        break
             except Exception:
                 pass
             return
@@ -19,6 +19,7 @@ except Exception:
 
 ROOT = Path(__file__).resolve().parents[1]
 from scripts.env_utils import preferred_env_path
+from gaia import event_log
 ENV_FILE = preferred_env_path(ROOT)
 HEALTH_FILE = ROOT / '.tmp' / 'telegram_health.json'
 QUEUE_FILE = ROOT / '.tmp' / 'telegram_queue.json'
@@ -50,30 +51,10 @@ def read_queue_len():
         return None
 
 def recent_event_counts(seconds=3600):
+    # the event log's index skips straight to the window; older segments are not read
     try:
-        if not EVENTS_FILE.exists():
-            return 0
-        lines = EVENTS_FILE.read_text(encoding='utf-8').splitlines()
-        now = datetime.utcnow()
-        cnt = 0
-        for l in lines[::-1]:
-            try:
-                e = json.loads(l)
-                ts = e.get('timestamp') or e.get('time')
-                if not ts:
-                    continue
-                if isinstance(ts, str) and ts.endswith('Z'):
-                    t = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                else:
-                    t = datetime.fromisoformat(ts)
-                delta = (now - t).total_seconds()
-                if delta <= seconds:
-                    cnt += 1
-                else:
-                    break
-            except Exception:
-                continue
-        return cnt
+        start_ms = int((time.time() - seconds) * 1000)
+        return sum(1 for _ in event_log.open_log(str(EVENTS_FILE)).read_range(start_ms=start_ms))
     except Exception:
         return 0
 
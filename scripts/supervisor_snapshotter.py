@@ -5,6 +5,7 @@ import glob
 import datetime
 import requests
 from . import backlog_source
+from gaia import event_log
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TMP = os.path.join(ROOT, '.tmp')
@@ -73,8 +74,7 @@ def tail_service_logs():
 
 def append_event(evt: dict):
     try:
-        with open(EVENTS, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(evt, ensure_ascii=False) + '\n')
+        event_log.open_log(EVENTS).append(evt)
     except Exception:
         pass
 
@@ -131,12 +131,8 @@ def main():
             tasks = set()
             completed_tasks = set()
             try:
-                with open(EVENTS, 'r', encoding='utf-8') as ef:
-                    for line in ef:
-                        try:
-                            j = json.loads(line)
-                        except Exception:
-                            continue
+                for j in event_log.open_log(EVENTS).read_range():
+                    if isinstance(j, dict):
                         t = j.get('type', '')
                         tid = j.get('task_id') or j.get('task') or (j.get('payload') if isinstance(j.get('payload'), dict) else {}).get('task_id')
                         if not tid and isinstance(j.get('payload'), dict):
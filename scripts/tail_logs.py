@@ -1,11 +1,15 @@
 import os
-import time
+import sys
 import glob
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gaia import filewatch
+
 TMP = os.path.join(ROOT, '.tmp')
 WATCH_GLOB = os.path.join(TMP, '*.out')
-POLL_INTERVAL = float(os.environ.get('TAIL_POLL_SECONDS', '0.5'))
 
 
 def open_files():
@@ -42,12 +46,20 @@ def scan_new_files(current):
 
 
 def tail_loop():
+    # watch first so nothing written while the files are opened is missed
+    watcher = filewatch.Watcher()
+    watcher.watch_dir(TMP, '*.out')
     files = open_files()
     print('[tail] starting tail of .tmp/*.out; Ctrl-C to stop')
+    changed = set(files)
     try:
         while True:
-            scan_new_files(files)
-            for path, meta in list(files.items()):
+            if changed - set(files) or any(not os.path.exists(p) for p in changed):
+                scan_new_files(files)
+            for path in changed:
+                meta = files.get(path)
+                if meta is None:
+                    continue
                 f = meta['f']
                 f.seek(meta['pos'])
                 data = f.read()
@@ -59,10 +71,12 @@ def tail_loop():
                     for line in text.splitlines():
                         print(f"[{os.path.basename(path)}] {line}")
                     meta['pos'] = f.tell()
-            time.sleep(POLL_INTERVAL)
+            # blocks until a watched file is created, written or removed
+            changed = watcher.wait()
     except KeyboardInterrupt:
         print('\n[tail] stopped by user')
     finally:
+        watcher.close()
         for meta in files.values():
             try:
                 meta['f'].close()
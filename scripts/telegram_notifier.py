@@ -7,12 +7,17 @@ an initial heartbeat and periodic summaries every `interval` seconds.
 Usage: python scripts/telegram_notifier.py [interval_seconds]
 """
 import os
+import sys
 import time
 import json
 import requests
 from datetime import datetime
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
+if os.path.abspath(ROOT) not in sys.path:
+    sys.path.insert(0, os.path.abspath(ROOT))
+from gaia import event_log  # noqa: E402
+
 PRIVATE_ENV = os.path.join(ROOT, '.private', '.env')
 EVENTS_FILE = os.path.join(ROOT, 'events.ndjson')
 
@@ -42,27 +47,16 @@ def send_telegram(token, chat_id, text):
 
 
 def summarize_events(n=20):
-    if not os.path.exists(EVENTS_FILE):
-        return 'No events yet.'
-    lines = []
-    with open(EVENTS_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                lines.append(line)
-    if not lines:
+    # the last n events across sealed segments too, reading backwards from the end
+    tail = event_log.open_log(EVENTS_FILE).tail(n)
+    if not tail:
         return 'No events yet.'
-    tail = lines[-n:]
     summary = []
-    for l in tail:
-        try:
-            j = json.loads(l)
-            t = j.get('type', 'event')
-            ts = j.get('timestamp', '')
-            tid = j.get('task_id') or j.get('task') or ''
-            summary.append(f"{ts} {t} {tid}")
-        except Exception:
-            summary.append(l[:140])
+    for j in tail:
+        t = j.get('type', 'event')
+        ts = j.get('timestamp', '')
+        tid = j.get('task_id') or j.get('task') or ''
+        summary.append(f"{ts} {t} {tid}")
     return '\n'.join(summary)
 
 
@@ -10,12 +10,16 @@ to Telegram (requires `.private/.env` with TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_
 import argparse
 import json
 import os
+import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 
 ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from gaia import event_log  # noqa: E402
 
 
 def load_private_env():
@@ -65,18 +69,12 @@ def tail_events_and_report(interval, do_send):
     # simple snapshot: count events in last interval and pending approvals from .tmp
     while True:
         now = time.time()
-        # count last N lines of events file (best-effort)
+        # count the events appended during the last interval (best-effort);
+        # the index skips everything older, sealed segments included
         events_count = 0
         try:
-            with open(events_file, 'rb') as f:
-                f.seek(0, 2)
-                size = f.tell()
-                # read last 16KB
-                read_size = min(size, 16 * 1024)
-                f.seek(size - read_size)
-                data = f.read().decode('utf-8', errors='ignore')
-                lines = [l for l in data.splitlines() if l.strip()]
-                events_count = len(lines)
+            since_ms = int((now - interval) * 1000)
+            events_count = sum(1 for _ in event_log.open_log(str(events_file)).read_range(start_ms=since_ms))
         except Exception:
             events_count = 0
 
@@ -25,6 +25,7 @@ ROOT = Path(__file__).resolve().parents[1]
 TMP = ROOT / '.tmp'
 PENDING = TMP / 'pending_commands.json'
 from scripts.env_utils import preferred_env_path
+from gaia import event_log
 ENV_FILE = preferred_env_path(ROOT)
 EVENTS = ROOT / 'events.ndjson'
 DB_PATH = ROOT / 'gaia.db'
@@ -425,8 +426,7 @@ def expire_old(retention_days=7):
 def append_event(obj):
     try:
         EVENTS.parent.mkdir(parents=True, exist_ok=True)
-        with open(EVENTS, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(obj, ensure_ascii=False) + '\n')
+        event_log.open_log(str(EVENTS)).append(obj)
     except Exception:
         pass
 
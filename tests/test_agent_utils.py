@@ -35,3 +35,16 @@ def test_retry_with_backoff_fail(monkeypatch):
         assert 'boom' in str(e)
     else:
         raise AssertionError('should have raised')
+
+
+def test_append_event_atomic_segments_only_the_events_file(tmp_path):
+    other = tmp_path / 'out' / 'package_events.ndjson'
+    agent_utils.append_event_atomic(other, {'type': 'a'})
+    agent_utils.append_event_atomic(other, {'type': 'b'})
+    assert [json.loads(l)['type'] for l in other.read_text().splitlines()] == ['a', 'b']
+    assert sorted(p.name for p in other.parent.iterdir()) == ['package_events.ndjson']
+
+    events = tmp_path / 'events.ndjson'
+    agent_utils.append_event_atomic(events, {'type': 'c'})
+    assert (tmp_path / 'events.ndjson.idx').exists()
+    assert json.loads(events.read_text())['type'] == 'c'
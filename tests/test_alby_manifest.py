@@ -28,3 +28,26 @@ def test_manifest_dry_run(tmp_path, monkeypatch):
     assert all(o['type'] == 'alby.job.complete' for o in objs)
     assert objs[0]['payload']['step_id'] == 's1'
     assert objs[1]['payload']['step_id'] == 's2'
+
+
+def test_manifest_enqueue_builds_dependency_graph(tmp_path):
+    import orchestrator
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_manifest.db')
+    orchestrator.init_db()
+
+    m = {
+        'name': 'dag',
+        'steps': [
+            {'id': 'build', 'cmd': 'echo build'},
+            {'id': 'lint', 'cmd': 'echo lint'},
+            {'id': 'test', 'cmd': 'echo test', 'depends_on': ['build']},
+            {'id': 'ship', 'cmd': 'echo ship', 'depends_on': ['lint', 'test']},
+        ]
+    }
+    ids = alby_agent.enqueue_manifest(m)
+    assert {t['id'] for t in orchestrator.list_tasks('pending')} == {ids['build'], ids['lint']}
+    assert {t['id'] for t in orchestrator.list_tasks('blocked')} == {ids['test'], ids['ship']}
+
+    # without declared dependencies the steps stay sequential
+    seq = alby_agent.enqueue_manifest({'name': 'seq', 'steps': [{'id': 'a', 'cmd': 'true'}, {'id': 'b', 'cmd': 'true'}]})
+    assert orchestrator.get_task(seq['b'])['status'] == 'blocked'
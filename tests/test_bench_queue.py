@@ -0,0 +1,18 @@
+from scripts import bench_queue
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert bench_queue.percentile(values, 50) == 50
+    assert bench_queue.percentile(values, 95) == 95
+    assert bench_queue.percentile(values, 99) == 99
+    assert bench_queue.percentile([], 50) is None
+
+
+def test_small_run_reports_latencies():
+    res = bench_queue.run(n_workers=2, n_tasks=20, rate=0, batch=2, timeout=30)
+    assert res['completed'] == 20
+    assert res['processed_by_workers'] == 20
+    assert res['enqueue_to_claim_ms']['count'] == 20
+    assert res['claim_to_complete_ms']['p99'] is not None
+    assert res['lock_wait']['count'] > 0
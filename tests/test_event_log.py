@@ -0,0 +1,131 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+from gaia import event_log
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_append_tail_and_rollover(tmp_path):
+    log = event_log.EventLog(str(tmp_path / 'events.ndjson'), segment_bytes=2048)
+    for i in range(200):
+        log.append({'type': 'tick' if i % 10 else 'mark', 'i': i, 'pad': 'x' * 40})
+
+    segs = log.segments()
+    assert len(segs) > 3 and segs[-1][0] == log.path
+    assert all(os.path.exists(idx) for _, idx in segs[:-1])
+    assert [e['i'] for e in log.tail(5)] == [195, 196, 197, 198, 199]
+    assert [e['i'] for e in log.tail(3, types=['mark'])] == [170, 180, 190]
+    # every event survives the rolls exactly once
+    assert [e['i'] for e in log.read_range()] == list(range(200))
+
+
+def test_read_range_uses_index_to_skip_old_segments(tmp_path, monkeypatch):
+    clock = [1_000_000]
+    monkeypatch.setattr(event_log, '_now_ms', lambda: clock[0])
+    log = event_log.EventLog(str(tmp_path / 'events.ndjson'), segment_bytes=1024)
+    for i in range(100):
+        log.append({'type': 'audit' if i % 7 == 0 else 'tick', 'i': i})
+        clock[0] += 1000
+
+    # scribble over the first sealed segment: a range after it must not read it
+    first_data, _ = log.segments()[0]
+    with open(first_data, 'w') as f:
+        f.write('not json\n' * 10)
+
+    got = [e['i'] for e in log.read_range(start_ms=1_000_000 + 60_000, end_ms=1_000_000 + 70_000)]
+    assert got == list(range(60, 71))
+    assert [e['i'] for e in log.read_range(start_ms=1_000_000 + 50_000, types=['audit'])] == [56, 63, 70, 77, 84, 91, 98]
+
+
+def test_legacy_file_without_index_is_still_readable(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    path.write_text('{"type": "old", "i": 1}\nbroken\n', encoding='utf-8')
+    log = event_log.EventLog(str(path))
+    log.append({'type': 'new', 'i': 2})
+    assert log.tail(10) == [{'type': 'old', 'i': 1}, {'raw': 'broken'}, {'type': 'new', 'i': 2}]
+
+
+def test_concurrent_processes_keep_lines_whole(tmp_path):
+    path = str(tmp_path / 'events.ndjson')
+    code = ('import sys; from gaia import event_log\n'
+            'log = event_log.EventLog(sys.argv[1], segment_bytes=20000)\n'
+            'for i in range(300): log.append({"type": "p", "w": sys.argv[2], "i": i, "pad": "x" * 50})\n')
+    procs = [subprocess.Popen([sys.executable, '-c', code, path, str(w)], cwd=ROOT) for w in range(4)]
+    assert all(p.wait(timeout=60) == 0 for p in procs)
+
+    log = event_log.EventLog(path)
+    lines = []
+    for data, _ in log.segments():
+        with open(data, encoding='utf-8') as f:
+            lines += [json.loads(line) for line in f]
+    assert len(lines) == 1200
+    for w in range(4):
+        assert [e['i'] for e in lines if e['w'] == str(w)] == list(range(300))
+
+
+_SKIP_DIRS = {'tests', 'external', 'archives', 'repo-mirror.git', 'node_modules'}
+
+
+def _events_writers(source):
+    """Lines of `source` that open events.ndjson for appending directly."""
+    tree = ast.parse(source)
+
+    def mentions_events(node, names):
+        for n in ast.walk(node):
+            if isinstance(n, ast.Constant) and isinstance(n.value, str) and os.path.basename(n.value) == event_log.EVENTS_NAME:
+                return True
+            if isinstance(n, ast.Name) and n.id in names or isinstance(n, ast.Attribute) and n.attr in names:
+                return True
+        return False
+
+    # names assigned (anywhere) from an expression naming the file, to a fixed point
+    names = set()
+    while True:
+        found = {t.id if isinstance(t, ast.Name) else t.attr
+                 for n in ast.walk(tree) if isinstance(n, ast.Assign) and mentions_events(n.value, names)
+                 for t in n.targets if isinstance(t, (ast.Name, ast.Attribute))}
+        if found <= names:
+            break
+        names |= found
+
+    hits = []
+    for n in ast.walk(tree):
+        if not isinstance(n, ast.Call):
+            continue
+        func = n.func
+        if isinstance(func, ast.Name) and func.id == 'open' and n.args:
+            target, mode = n.args[0], n.args[1] if len(n.args) > 1 else None
+        elif isinstance(func, ast.Attribute) and func.attr == 'open':
+            target, mode = func.value, n.args[0] if n.args else None
+        else:
+            continue
+        mode = next((k.value for k in n.keywords if k.arg == 'mode'), mode)
+        if isinstance(mode, ast.Constant) and isinstance(mode.value, str) and 'a' in mode.value and mentions_events(target, names):
+            hits.append(n.lineno)
+    return hits
+
+
+def test_only_event_log_appends_to_events_file():
+    own = os.path.join(ROOT, 'gaia', 'event_log.py')
+    offenders = []
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in _SKIP_DIRS]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not name.endswith('.py') or path == own:
+                continue
+            with open(path, encoding='utf-8', errors='replace') as f:
+                source = f.read()
+            if event_log.EVENTS_NAME not in source:
+                continue
+            try:
+                lines = _events_writers(source)
+            except SyntaxError:
+                continue
+            offenders += [f'{os.path.relpath(path, ROOT)}:{line}' for line in lines]
+    # route writes through gaia.event_log (or agent_utils.append_event_atomic)
+    assert offenders == []
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from gaia import event_log, events
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _lines(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_burst_is_one_write_per_batch(tmp_path, monkeypatch):
+    writes = []
+    real = event_log.EventLog.append_encoded
+    monkeypatch.setattr(event_log.EventLog, 'append_encoded', lambda self, items: writes.append(len(items)) or real(self, items))
+    w = events._BatchWriter(str(tmp_path / 'events.ndjson'), str(tmp_path / 'short.log'), delay_s=60, max_events=1000)
+    for i in range(300):
+        w.put({'type': 'burst', 'i': i, 'timestamp': 't'})
+    assert w.flush() == 300
+    assert writes == [300]
+    assert [json.loads(x)['i'] for x in _lines(tmp_path / 'events.ndjson')] == list(range(300))
+    short = _lines(tmp_path / 'short.log')
+    assert len(short) == 300 and short[0].startswith('[t] burst: {"type": "burst", "i": 0')
+    assert w.flush() == 0
+
+
+def test_background_flush_on_delay_and_size(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    w = events._BatchWriter(str(path), str(tmp_path / 'short.log'), delay_s=0.01, max_events=50)
+    w.put({'type': 'one', 'payload': {'x': 'a\nb'}, 'timestamp': 't'})
+    deadline = time.time() + 5
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    assert [json.loads(x)['type'] for x in _lines(path)] == ['one']
+    assert _lines(tmp_path / 'short.log') == ['[t] one: {"x": "a\\nb"}']
+
+    w.delay_s = 60  # only the size trigger can flush now
+    for i in range(50):
+        w.put({'type': 'many', 'i': i})
+    while len(_lines(path)) < 51 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(_lines(path)) == 51
+
+
+def test_concurrent_processes_keep_lines_whole(tmp_path):
+    path, short = str(tmp_path / 'events.ndjson'), str(tmp_path / 'short.log')
+    code = ('import sys; from gaia import events\n'
+            'w = events._BatchWriter(sys.argv[1], sys.argv[2], delay_s=0.001, max_events=7)\n'
+            'for i in range(400): w.put({"type": "p", "w": sys.argv[3], "i": i, "pad": "x" * 300})\n'
+            'w.flush()\n')
+    procs = [subprocess.Popen([sys.executable, '-c', code, path, short, str(n)], cwd=ROOT) for n in range(4)]
+    assert all(p.wait(timeout=60) == 0 for p in procs)
+
+    got = [json.loads(x) for x in _lines(path)]
+    for n in range(4):
+        assert [e['i'] for e in got if e['w'] == str(n)] == list(range(400))
+    assert all(x.startswith('[None] p: {"type": "p"') for x in _lines(short))
+    assert len(_lines(short)) == 1600
+
+
+def test_module_paths_are_read_when_events_are_queued(tmp_path, monkeypatch):
+    events.flush()
+    monkeypatch.setattr(events, 'EVENTS_FILE', tmp_path / 'events.ndjson')
+    monkeypatch.setattr(events, 'SHORT_LOG', str(tmp_path / 'short.log'))
+    events.make_event('redirected', {'n': 1})
+    assert events.flush() == 1
+    assert [json.loads(x)['type'] for x in _lines(tmp_path / 'events.ndjson')] == ['redirected']
+    assert _lines(tmp_path / 'short.log')[0].endswith('redirected: {"n": 1}')
+
+
+def test_sync_events_are_written_before_append_returns(tmp_path, monkeypatch):
+    events.flush()
+    monkeypatch.setattr(events, 'EVENTS_FILE', tmp_path / 'events.ndjson')
+    monkeypatch.setattr(events, 'SHORT_LOG', str(tmp_path / 'short.log'))
+    monkeypatch.setattr(events, 'SYNC_PREFIXES', ('approval.',))
+    events.make_event('approval.received', {'ok': True})
+    assert [json.loads(x)['type'] for x in _lines(tmp_path / 'events.ndjson')] == ['approval.received']
+    events.make_event('note', {'n': 1}, sync=True)
+    assert len(_lines(tmp_path / 'events.ndjson')) == 2
+    monkeypatch.setattr(events, 'SYNC_ALL', True)
+    events.append_event({'type': 'anything'})
+    assert len(_lines(tmp_path / 'events.ndjson')) == 3
+
+
+def test_queued_events_survive_a_fork_and_os_exit(tmp_path):
+    if not hasattr(os, 'fork'):
+        return
+    path = str(tmp_path / 'events.ndjson')
+    code = ('import os, sys; from gaia import events\n'
+            'events.EVENTS_FILE, events.SHORT_LOG = sys.argv[1], sys.argv[2]\n'
+            'events.make_event("before.fork", {})\n'
+            'pid = os.fork()\n'
+            'if pid == 0:\n'
+            '    os._exit(0)\n'
+            'os.waitpid(pid, 0)\n'
+            'os._exit(0)\n')
+    env = dict(os.environ, GAIA_EVENTS_FLUSH_MS='60000', GAIA_EVENTS_SYNC='')
+    subprocess.run([sys.executable, '-c', code, path, str(tmp_path / 'short.log')], cwd=ROOT, env=env, timeout=60, check=True)
+    assert [json.loads(x)['type'] for x in _lines(path)] == ['before.fork']
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+
+import pytest
+
+from gaia import filewatch
+
+
+@pytest.fixture(params=['native', 'poll'])
+def mode(request, monkeypatch):
+    if request.param == 'native':
+        if filewatch._libc is None:
+            pytest.skip('inotify is not available here')
+    else:
+        monkeypatch.setattr(filewatch, '_libc', None)
+    return request.param
+
+
+def _later(fn, delay=0.1):
+    t = threading.Timer(delay, fn)
+    t.start()
+    return t
+
+
+def test_wakes_on_write_replace_and_remove(tmp_path, mode):
+    path = tmp_path / 'approval.json'
+    with filewatch.Watcher([str(path)]) as w:
+        assert w.native == (mode == 'native')
+        assert w.wait(0.1) == set()
+
+        _later(lambda: path.write_text('{}'))
+        start = time.monotonic()
+        assert w.wait(5) == {str(path)}
+        assert time.monotonic() - start < 1.0
+
+        (tmp_path / 'other.json').write_text('x')
+        tmp = tmp_path / 'approval.json.tmp'
+        tmp.write_text('{"ok": 1}')
+        _later(lambda: os.replace(tmp, path))
+        assert str(path) in w.wait(5)
+
+        path.unlink()
+        assert w.wait(5) == {str(path)}
+
+
+def test_directory_patterns_and_late_directories(tmp_path, mode):
+    logs = tmp_path / 'logs'
+    with filewatch.Watcher() as w:
+        w.watch_dir(str(logs), '*.out')
+        assert w.wait(0.1) == set()
+        logs.mkdir()
+        (logs / 'a.out').write_text('1')
+        (logs / 'a.err').write_text('1')
+        assert w.wait(5) == {str(logs / 'a.out')}
+
+        _later(lambda: (logs / 'b.out').write_text('2'))
+        got = w.wait(5)
+        assert str(logs / 'b.out') in got and str(logs / 'a.err') not in got
+
+
+class _CountingPoller:
+    def __init__(self, inner):
+        self.inner, self.wakeups = inner, 0
+
+    def poll(self, timeout_ms):
+        ready = self.inner.poll(timeout_ms)
+        self.wakeups += bool(ready)
+        return ready
+
+
+def test_sibling_writes_do_not_wake_the_waiter(tmp_path):
+    if filewatch._libc is None:
+        pytest.skip('inotify is not available here')
+    from gaia import event_log
+    path = tmp_path / 'events.ndjson'
+    log = event_log.EventLog(str(path))
+    log.append({'type': 'first'})
+    sibling = tmp_path / 'other.log'
+    sibling.write_text('')
+    with filewatch.Watcher([str(path)]) as w:
+        w._poller = _CountingPoller(w._poller)
+
+        def scribble():
+            for i in range(5):
+                with open(sibling, 'a') as f:
+                    f.write(f'{i}\n')
+                with open(log.index_path, 'a') as f:
+                    f.write('{}\n')
+        _later(scribble, 0.05)
+        assert w.wait(0.4) == set()
+        assert w._poller.wakeups == 0
+
+        _later(lambda: log.append({'type': 'second'}))
+        assert w.wait(5) == {str(path)}
+        assert w._poller.wakeups == 1
+
+        # a roll seals the live file into a segment and starts a new one
+        _later(log._roll)
+        assert w.wait(5) == {str(path)}
+        _later(lambda: log.append({'type': 'third'}))
+        assert w.wait(5) == {str(path)}
+    log.close()
@@ -44,3 +44,108 @@ def test_enqueue_claim_complete(tmp_path, monkeypatch):
     failed = orchestrator.list_tasks('failed')
     assert any(t['id'] == task['id'] for t in completed)
     assert any(t['id'] == task2['id'] for t in failed)
+
+
+def test_batch_claim_complete_fail(tmp_path):
+    db = tmp_path / 'gaia_batch.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    ids = [orchestrator.enqueue_task('noop', {'i': i}) for i in range(5)]
+
+    batch = orchestrator.claim_tasks('workerA', 3)
+    assert [t['id'] for t in batch] == ids[:3]
+    assert all(t['payload'] == {'i': i} for i, t in enumerate(batch))
+
+    rest = orchestrator.claim_tasks('workerB', 10)
+    assert [t['id'] for t in rest] == ids[3:]
+    assert orchestrator.claim_tasks('workerC', 4) == []
+
+    orchestrator.complete_tasks([(t['id'], {'ok': True}) for t in batch])
+    orchestrator.fail_tasks([(t['id'], 'boom') for t in rest])
+    assert {t['id'] for t in orchestrator.list_tasks('completed')} == set(ids[:3])
+    assert {t['id'] for t in orchestrator.list_tasks('failed')} == set(ids[3:])
+
+
+def test_priority_lanes_and_delayed_visibility(tmp_path):
+    db = tmp_path / 'gaia_prio.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    low = orchestrator.enqueue_task('sprint-task', {'n': 1})
+    urgent = orchestrator.enqueue_task('job', {'n': 2}, priority=5)
+    later = orchestrator.enqueue_task('job', {'n': 3}, priority=9, delay_seconds=60)
+
+    assert orchestrator.claim_task('w1')['id'] == urgent
+    assert orchestrator.claim_task('w1')['id'] == low
+    # the delayed task stays invisible despite its priority
+    assert orchestrator.claim_task('w1') is None
+    assert any(t['id'] == later for t in orchestrator.list_tasks('pending'))
+
+
+def test_priority_aging_prevents_starvation(tmp_path, monkeypatch):
+    db = tmp_path / 'gaia_aging.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+    monkeypatch.setattr(orchestrator, 'PRIORITY_AGING_MS', 1000)
+
+    old_low = orchestrator.enqueue_task('sprint-task', {})
+    # age the low-priority row by 10s: it now outranks a fresh priority-5 task
+    conn = orchestrator._connect()
+    conn.execute('UPDATE queue SET rank_ms = rank_ms - 10000 WHERE id = ?', (old_low,))
+    conn.commit()
+    conn.close()
+    orchestrator.enqueue_task('job', {}, priority=5)
+
+    assert orchestrator.claim_task('w1')['id'] == old_low
+
+
+def test_claim_uses_rank_index(tmp_path):
+    db = tmp_path / 'gaia_rank_idx.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+    conn = orchestrator._connect()
+    plan = ' '.join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM queue WHERE status = 'pending' AND (not_before_ms IS NULL OR not_before_ms <= 0) "
+        "ORDER BY rank_ms LIMIT 5"))
+    conn.close()
+    assert 'idx_queue_claim' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_enqueue_tasks_bulk_returns_ids_in_order(tmp_path):
+    db = tmp_path / 'gaia_bulk.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    first = orchestrator.enqueue_task('noop', {'i': -1})
+    ids = orchestrator.enqueue_tasks([('noop', {'i': i}) for i in range(50)])
+    assert ids == list(range(first + 1, first + 51))
+    assert orchestrator.enqueue_tasks([]) == []
+
+    claimed = orchestrator.claim_tasks('w', 51)
+    assert [t['payload']['i'] for t in claimed] == list(range(-1, 50))
+
+
+def test_enqueue_dedup_key_is_idempotent_within_window(tmp_path, monkeypatch):
+    db = tmp_path / 'gaia_dedup.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    first = orchestrator.enqueue_task('execute-task', {'n': 1}, dedup_key='k1')
+    assert orchestrator.enqueue_task('execute-task', {'n': 2}, dedup_key='k1') == first
+    other = orchestrator.enqueue_task('execute-task', {'n': 3}, dedup_key='k2')
+    assert other != first
+    # the key still dedups after the task has finished
+    orchestrator.complete_task(orchestrator.claim_task('w1')['id'], {})
+    assert orchestrator.enqueue_task('execute-task', {}, dedup_key='k1') == first
+
+    ids = orchestrator.enqueue_tasks([('noop', {}, 'k1'), ('noop', {}), ('noop', {}, 'k3'), ('noop', {}, 'k3')])
+    assert ids[0] == first and ids[2] == ids[3] and len(set(ids)) == 3
+    assert len(orchestrator.list_tasks()) == 4
+
+    # past the window the key may be enqueued again
+    monkeypatch.setattr(orchestrator, 'DEDUP_WINDOW_MS', 0)
+    again = orchestrator.enqueue_task('execute-task', {}, dedup_key='k1', dedup_window_seconds=0)
+    assert again not in (first, other)
+    assert orchestrator.enqueue_task('execute-task', {}, dedup_key='k1') != again
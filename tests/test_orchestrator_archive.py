@@ -0,0 +1,50 @@
+import orchestrator
+from agents import archiver
+
+
+def _finish_all(n_done, n_failed):
+    ids = orchestrator.enqueue_tasks([('noop', {'i': i}) for i in range(n_done + n_failed)])
+    claimed = orchestrator.claim_tasks('wa', len(ids))
+    orchestrator.complete_tasks([(t['id'], {'out': 'x' * 200}) for t in claimed[:n_done]])
+    orchestrator.fail_tasks([(t['id'], 'boom') for t in claimed[n_done:]])
+    return ids
+
+
+def test_archive_moves_finished_rows_in_batches(tmp_path):
+    db = tmp_path / 'gaia_archive.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    ids = _finish_all(8, 2)
+    pending = orchestrator.enqueue_task('noop', {'keep': True})
+
+    moved = orchestrator.archive_tasks(0, batch_size=3)
+    # everything finished is archived; pending work stays hot
+    assert moved == 10
+    assert [t['id'] for t in orchestrator.list_tasks()] == [pending]
+    assert orchestrator.count_tasks() == {'pending': 1}
+
+    archived = orchestrator.get_task(ids[0])
+    assert archived['archived'] is True
+    assert archived['payload'] == {'i': 0}
+    assert archived['result'] == {'out': 'x' * 200}
+    assert orchestrator.get_task(ids[-1])['result'] == {'error': 'boom'}
+    assert orchestrator.get_task(pending)['archived'] is False
+
+    everything = orchestrator.list_tasks(include_archived=True)
+    assert [t['id'] for t in everything] == ids + [pending]
+    assert len(orchestrator.list_tasks('failed', include_archived=True)) == 2
+
+
+def test_archive_respects_age_and_keeps_newest_id(tmp_path):
+    db = tmp_path / 'gaia_archive2.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    ids = _finish_all(3, 0)
+    assert orchestrator.archive_tasks(3600) == 0
+
+    # the newest row stays hot so ids are never reused
+    assert archiver.main(['--older-than', '0', '--once']) == 0
+    assert [t['id'] for t in orchestrator.list_tasks()] == [ids[-1]]
+    assert orchestrator.enqueue_task('noop', {}) == ids[-1] + 1
@@ -0,0 +1,135 @@
+import json
+from datetime import datetime, timedelta
+
+import orchestrator
+from agents import dead_letters
+
+
+def _setup(tmp_path, name):
+    orchestrator.DB_PATH = str(tmp_path / name)
+    orchestrator.init_db()
+
+
+def test_failures_are_dead_lettered_with_history(tmp_path):
+    _setup(tmp_path, 'gaia_dlq.db')
+    tid = orchestrator.enqueue_task('job', {'cmd': 'x'})
+    orchestrator.claim_task('w1')
+    orchestrator.fail_task(tid, 'boom')
+
+    rows = orchestrator.list_dead_letters()
+    assert [(r['task_id'], r['error'], r['attempts']) for r in rows] == [(tid, 'boom', 1)]
+    assert rows[0]['history'][0]['owner'] == 'w1'
+
+    # a replayed task that fails again keeps its history
+    assert orchestrator.replay_dead_letters([tid]) == [tid]
+    assert orchestrator.list_dead_letters() == []
+    orchestrator.claim_task('w2')
+    orchestrator.fail_task(tid, 'boom again')
+    row = orchestrator.list_dead_letters()[0]
+    assert row['attempts'] == 2
+    assert [h['error'] for h in row['history']] == ['boom', 'boom again']
+
+
+def test_reclaim_exhaustion_is_dead_lettered(tmp_path):
+    _setup(tmp_path, 'gaia_dlq_reclaim.db')
+    tid = orchestrator.enqueue_task('job', {})
+    orchestrator.claim_task('w1')
+    old = (datetime.utcnow() - timedelta(seconds=3600)).isoformat() + 'Z'
+    conn = orchestrator._connect()
+    conn.execute('UPDATE queue SET started_at = ?, reclaim_attempts = 3 WHERE id = ?', (old, tid))
+    conn.commit()
+    conn.close()
+    orchestrator.reclaim_stale_tasks(60)
+    assert orchestrator.list_dead_letters(error='reclaim_max')[0]['task_id'] == tid
+
+
+def test_bulk_replay_filters_delay_and_priority(tmp_path):
+    _setup(tmp_path, 'gaia_dlq_replay.db')
+    ids = orchestrator.enqueue_tasks([('job', {'i': i}) for i in range(6)] + [('noop', {})])
+    orchestrator.claim_tasks('w1', 10)
+    orchestrator.fail_tasks([(i, 'timeout 100%' if i % 2 else 'rate limited') for i in ids[:6]] + [(ids[6], 'timeout 100%')])
+    assert orchestrator.count_dead_letters() == {'job': 6, 'noop': 1}
+    # the LIKE wildcards in the filter are matched literally
+    assert len(orchestrator.list_dead_letters(error='100%')) == 4
+    assert orchestrator.list_dead_letters(error='1_0') == []
+
+    replayed = orchestrator.replay_dead_letters(task_type='job', error='timeout', priority=7, delay_seconds=60)
+    assert sorted(replayed) == [i for i in ids[:6] if i % 2]
+    task = orchestrator.get_task(replayed[0])
+    assert task['status'] == 'pending' and task['result'] is None
+    # delayed: not claimable yet
+    assert orchestrator.claim_task('w2') is None
+    conn = orchestrator._connect()
+    assert {r[0] for r in conn.execute('SELECT priority FROM queue WHERE id IN (%s)' % ','.join(map(str, replayed)))} == {7}
+    conn.close()
+
+    assert orchestrator.purge_dead_letters(task_type='noop') == 1
+    assert orchestrator.count_dead_letters() == {'job': 3}
+
+
+def test_dead_letters_cli(tmp_path, capsys):
+    _setup(tmp_path, 'gaia_dlq_cli.db')
+    tid = orchestrator.enqueue_task('job', {})
+    orchestrator.claim_task('w1')
+    orchestrator.fail_task(tid, 'boom')
+
+    assert dead_letters.main(['list', '--json']) == 0
+    assert json.loads(capsys.readouterr().out)[0]['task_id'] == tid
+    assert dead_letters.main(['replay']) == 2
+    assert dead_letters.main(['replay', '--type', 'job']) == 0
+    assert 'replayed 1' in capsys.readouterr().out
+    assert orchestrator.get_task(tid)['status'] == 'pending'
+
+
+def test_replay_restores_archived_failures(tmp_path):
+    _setup(tmp_path, 'gaia_dlq_archive.db')
+    tid = orchestrator.enqueue_task('job', {'cmd': 'x'})
+    orchestrator.enqueue_task('noop', {})
+    orchestrator.claim_tasks('w1', 1)
+    orchestrator.fail_task(tid, 'boom')
+    assert orchestrator.archive_tasks(0) == 1
+    assert orchestrator.get_task(tid)['archived'] is True
+
+    assert orchestrator.replay_dead_letters(error='boom') == [tid]
+    task = orchestrator.get_task(tid)
+    assert task['archived'] is False and task['status'] == 'pending' and task['payload'] == {'cmd': 'x'}
+
+
+def test_replayed_parent_blocks_its_failed_dependents_again(tmp_path):
+    _setup(tmp_path, 'gaia_dlq_deps.db')
+    parent = orchestrator.enqueue_task('job', {})
+    other = orchestrator.enqueue_task('job', {})
+    child = orchestrator.enqueue_task('job', {}, depends_on=[parent, other])
+    grandchild = orchestrator.enqueue_task('job', {}, depends_on=[child])
+    late = orchestrator.enqueue_task('job', {}, depends_on=[parent])
+    orchestrator.claim_tasks('w1', 2)
+    orchestrator.fail_task(parent, 'boom')
+    assert orchestrator.get_task(late)['status'] == 'failed'
+
+    # an unfiltered replay re-drives only the parent; the dependents follow it
+    assert sorted(orchestrator.replay_dead_letters()) == [parent, child, grandchild, late]
+    assert [orchestrator.get_task(t)['status'] for t in (child, grandchild, late)] == ['blocked'] * 3
+    assert orchestrator.list_dead_letters() == []
+    assert [t['id'] for t in orchestrator.claim_tasks('w2', 10)] == [parent]
+
+    orchestrator.complete_task(parent, {})
+    assert orchestrator.get_task(late)['status'] == 'pending'
+    # the child still waits for the parent that never failed
+    assert orchestrator.get_task(child)['status'] == 'blocked'
+    orchestrator.complete_task(other, {})
+    assert [t['id'] for t in orchestrator.claim_tasks('w2', 10)] == [child, late]
+    assert orchestrator.get_task(grandchild)['status'] == 'blocked'
+
+
+def test_dependents_of_a_still_failed_parent_are_not_replayed(tmp_path):
+    _setup(tmp_path, 'gaia_dlq_deps2.db')
+    parent = orchestrator.enqueue_task('job', {})
+    child = orchestrator.enqueue_task('noop', {}, depends_on=[parent])
+    orchestrator.claim_task('w1')
+    orchestrator.fail_task(parent, 'boom')
+
+    assert orchestrator.replay_dead_letters(task_type='noop') == []
+    assert orchestrator.get_task(child)['status'] == 'failed'
+    # naming the dependent is an explicit override
+    assert orchestrator.replay_dead_letters([child]) == [child]
+    assert orchestrator.get_task(child)['status'] == 'pending'
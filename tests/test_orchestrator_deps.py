@@ -0,0 +1,58 @@
+import pytest
+
+import orchestrator
+
+
+def _status(tid):
+    return orchestrator.get_task(tid)['status']
+
+
+def test_child_waits_for_all_parents(tmp_path):
+    db = tmp_path / 'gaia_dag.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    a = orchestrator.enqueue_task('noop', {'step': 'a'})
+    b = orchestrator.enqueue_task('noop', {'step': 'b'})
+    c = orchestrator.enqueue_task('noop', {'step': 'c'}, depends_on=[a, b])
+    assert _status(c) == 'blocked'
+
+    # independent branches run in parallel; the join stays blocked
+    claimed = orchestrator.claim_tasks('w1', 10)
+    assert sorted(t['id'] for t in claimed) == [a, b]
+    orchestrator.complete_task(a, {})
+    assert _status(c) == 'blocked'
+    assert orchestrator.claim_task('w2') is None
+
+    orchestrator.complete_task(b, {})
+    assert _status(c) == 'pending'
+    assert orchestrator.claim_task('w2')['id'] == c
+
+    # a completed parent is already satisfied
+    d = orchestrator.enqueue_task('noop', {}, depends_on=[a])
+    assert _status(d) == 'pending'
+
+
+def test_parent_failure_cascades(tmp_path):
+    db = tmp_path / 'gaia_dag_fail.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    a = orchestrator.enqueue_task('noop', {})
+    b = orchestrator.enqueue_task('noop', {}, depends_on=[a])
+    c = orchestrator.enqueue_task('noop', {}, depends_on=[b])
+    other = orchestrator.enqueue_task('noop', {})
+
+    orchestrator.claim_task('w1')
+    orchestrator.fail_task(a, 'boom')
+    assert _status(b) == 'failed' and _status(c) == 'failed'
+    assert orchestrator.get_task(c)['result'] == {'error': 'dependency_failed'}
+    assert _status(other) == 'pending'
+
+    late = orchestrator.enqueue_task('noop', {}, depends_on=[a])
+    assert _status(late) == 'failed'
+    before = len(orchestrator.list_tasks())
+    with pytest.raises(ValueError):
+        orchestrator.enqueue_task('noop', {}, depends_on=[9999])
+    # the insert is rolled back with the failed link
+    assert len(orchestrator.list_tasks()) == before
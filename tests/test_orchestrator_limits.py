@@ -0,0 +1,76 @@
+import orchestrator
+
+
+def test_task_types_filter(tmp_path):
+    db = tmp_path / 'gaia_types.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    orchestrator.enqueue_task('job', {'n': 1})
+    noop = orchestrator.enqueue_task('noop', {'n': 2})
+    assert orchestrator.claim_task('w1', task_types=['noop'])['id'] == noop
+    assert orchestrator.claim_task('w1', task_types=['noop']) is None
+    assert orchestrator.claim_task('w1')['task_type'] == 'job'
+
+
+def test_max_in_flight_cap_is_cluster_wide(tmp_path):
+    db = tmp_path / 'gaia_cap.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+    orchestrator.set_task_type_limit('job', max_in_flight=2)
+    assert orchestrator.list_task_type_limits() == {'job': {'max_in_flight': 2, 'rate_per_s': None}}
+
+    orchestrator.enqueue_tasks([('job', {'i': i}) for i in range(4)] + [('noop', {'i': i}) for i in range(3)])
+    first = orchestrator.claim_tasks('w1', 10)
+    assert sorted(t['task_type'] for t in first) == ['job', 'job', 'noop', 'noop', 'noop']
+    # another worker cannot exceed the cap either
+    assert orchestrator.claim_tasks('w2', 10) == []
+
+    job = next(t for t in first if t['task_type'] == 'job')
+    orchestrator.complete_task(job['id'], {})
+    assert [t['task_type'] for t in orchestrator.claim_tasks('w2', 10)] == ['job']
+
+    orchestrator.set_task_type_limit('job')
+    assert orchestrator.list_task_type_limits() == {}
+    assert len(orchestrator.claim_tasks('w2', 10)) == 1
+
+
+def test_rate_limit_token_bucket(tmp_path, monkeypatch):
+    db = tmp_path / 'gaia_rate.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+    orchestrator.set_task_type_limit('execute-task', rate_per_s=2)
+    orchestrator.enqueue_tasks([('execute-task', {'i': i}) for i in range(5)])
+
+    clock = [1_000_000]
+    monkeypatch.setattr(orchestrator, '_stamp', lambda: ('2026-01-01T00:00:00Z', clock[0]))
+    # a full bucket allows a burst of `rate` claims
+    assert len(orchestrator.claim_tasks('w1', 5)) == 2
+    assert orchestrator.claim_tasks('w1', 5) == []
+    clock[0] += 500
+    assert len(orchestrator.claim_tasks('w1', 5)) == 1
+    clock[0] += 10_000
+    assert len(orchestrator.claim_tasks('w1', 5)) == 2
+
+
+def test_throttled_backlog_is_not_walked_row_by_row(tmp_path, monkeypatch):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_walk.db')
+    orchestrator.init_db()
+    orchestrator.set_task_type_limit('slow', max_in_flight=1)
+    orchestrator.enqueue_tasks([('slow', {'i': i}) for i in range(2000)])
+    orchestrator.enqueue_tasks([('job', {'i': i}) for i in range(3)])
+
+    fetched, conns = [], []
+    real = orchestrator._begin_immediate
+
+    def tracing(cur):
+        real(cur)
+        conns.append(cur.connection)
+        cur.connection.set_trace_callback(fetched.append)
+    monkeypatch.setattr(orchestrator, '_begin_immediate', tracing)
+    claimed = orchestrator.claim_tasks('w1', 10)
+    conns[0].set_trace_callback(None)
+    assert sorted(t['task_type'] for t in claimed) == ['job', 'job', 'job', 'slow']
+    picks = [q for q in fetched if q.startswith('SELECT id, task_type FROM queue')]
+    # one pick until 'slow' ran out, one more with it excluded
+    assert len(picks) == 2 and all('LIMIT' in q for q in picks)
@@ -0,0 +1,65 @@
+import sqlite3
+
+import orchestrator
+
+
+def _legacy_db(path):
+    """Create a DB with the pre-epoch schema and a few rows."""
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE audit (id INTEGER PRIMARY KEY, timestamp TEXT, actor TEXT, action TEXT, details TEXT)')
+    conn.execute('CREATE TABLE queue (id INTEGER PRIMARY KEY, created_at TEXT, task_type TEXT, payload TEXT, status TEXT, owner TEXT, started_at TEXT, finished_at TEXT, result TEXT)')
+    conn.execute("INSERT INTO queue (created_at, task_type, payload, status) VALUES ('2026-01-02T03:04:05.500000Z', 'noop', '{}', 'pending')")
+    conn.execute("INSERT INTO audit (timestamp, actor, action, details) VALUES ('2026-01-02 03:04:05', 'a', 'x', '')")
+    conn.commit()
+    conn.close()
+
+
+def test_migration_backfills_epoch_columns(tmp_path):
+    db = tmp_path / 'gaia_legacy.db'
+    _legacy_db(str(db))
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    conn = orchestrator._connect()
+    assert conn.execute('SELECT created_at_ms FROM queue').fetchone()[0] == 1767323045500
+    assert conn.execute('SELECT timestamp_ms FROM audit').fetchone()[0] == 1767323045000
+    conn.close()
+
+    # the legacy row is still claimable through the new ordering
+    task = orchestrator.claim_task('w1')
+    assert task and task['task_type'] == 'noop'
+
+
+def test_external_writes_keep_epoch_in_sync(tmp_path):
+    db = tmp_path / 'gaia_sync.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+    tid = orchestrator.enqueue_task('noop', {})
+    orchestrator.claim_task('w1')
+
+    conn = orchestrator._connect()
+    conn.execute("INSERT INTO audit (timestamp, actor, action, details) VALUES (datetime('now'), 'agent', 'ext', '')")
+    conn.execute("UPDATE queue SET started_at = '2026-01-02T03:04:05Z' WHERE id = ?", (tid,))
+    conn.commit()
+    assert conn.execute("SELECT timestamp_ms FROM audit WHERE action = 'ext'").fetchone()[0] is not None
+    assert conn.execute('SELECT started_at_ms FROM queue WHERE id = ?', (tid,)).fetchone()[0] == 1767323045000
+    conn.close()
+
+
+def test_hot_queries_use_indexes(tmp_path):
+    db = tmp_path / 'gaia_idx.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    conn = orchestrator._connect()
+    plan = ' '.join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM queue WHERE status = 'pending' ORDER BY created_at_ms LIMIT 5"))
+    assert 'idx_queue_status_created' in plan
+    assert 'TEMP B-TREE' not in plan
+    plan = ' '.join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM audit WHERE action = 'reclaim' AND timestamp_ms >= 0"))
+    assert 'idx_audit_action_ts' in plan
+    plan = ' '.join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM approvals WHERE request_id = 'r1'"))
+    assert 'idx_approvals_request' in plan
+    conn.close()
@@ -0,0 +1,53 @@
+import threading
+
+import orchestrator
+
+
+def test_pool_uses_wal_and_runs_schema_once(tmp_path, monkeypatch):
+    db = tmp_path / 'gaia_pool.db'
+    orchestrator.DB_PATH = str(db)
+
+    calls = []
+    real_init = orchestrator.init_db
+
+    def counting_init():
+        calls.append(1)
+        real_init()
+
+    monkeypatch.setattr(orchestrator, 'init_db', counting_init)
+    for i in range(5):
+        orchestrator.enqueue_task('noop', {'i': i})
+    orchestrator.list_tasks('pending')
+    assert len(calls) == 1
+
+    conn = orchestrator._connect()
+    mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.close()
+    assert mode.lower() == 'wal'
+
+
+def test_pool_concurrent_claims_are_unique(tmp_path):
+    db = tmp_path / 'gaia_pool2.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    ids = {orchestrator.enqueue_task('noop', {'i': i}) for i in range(40)}
+    claimed = []
+    lock = threading.Lock()
+
+    def claimer(wid):
+        while True:
+            t = orchestrator.claim_task(wid)
+            if not t:
+                return
+            with lock:
+                claimed.append(t['id'])
+
+    threads = [threading.Thread(target=claimer, args=(f'w{i}',)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert sorted(claimed) == sorted(ids)
+    assert len(orchestrator.list_tasks('in_progress')) == 40
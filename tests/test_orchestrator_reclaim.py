@@ -67,3 +67,63 @@ def test_reclaim_backoff_exceeds(tmp_path, monkeypatch):
     rows = cur.fetchall()
     conn.close()
     assert any(r[0] == 'reclaim_failed' for r in rows)
+
+
+def test_reclaim_is_set_based_over_many_rows(tmp_path, monkeypatch):
+    db = tmp_path / 'gaia_reclaim3.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    for i in range(30):
+        orchestrator.enqueue_task('noop', {'i': i})
+    claimed = orchestrator.claim_tasks('workerS', 30)
+    stale_ids = [t['id'] for t in claimed[:20]]
+    exhausted_ids = stale_ids[:5]
+
+    old = (datetime.utcnow() - timedelta(seconds=3600)).isoformat() + 'Z'
+    conn = orchestrator._connect()
+    conn.executemany('UPDATE queue SET started_at = ? WHERE id = ?', [(old, tid) for tid in stale_ids])
+    conn.executemany('UPDATE queue SET reclaim_attempts = 3 WHERE id = ?', [(tid,) for tid in exhausted_ids])
+    conn.commit()
+    conn.close()
+
+    report = orchestrator.reclaim_and_report(60)
+    assert report['reclaimed'] == 15
+    assert report['reclaim_audit_reclaim'] == 15
+    assert report['reclaim_audit_failed'] == 5
+    assert report['pending'] == 15
+    assert report['in_progress'] == 10
+    assert {t['id'] for t in orchestrator.list_tasks('failed')} == set(exhausted_ids)
+
+    # a second pass finds nothing stale
+    assert orchestrator.reclaim_stale_tasks(60) == 0
+
+
+def test_leased_task_survives_ttl_until_lease_expires(tmp_path):
+    db = tmp_path / 'gaia_lease.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    long_id = orchestrator.enqueue_task('noop', {'n': 1})
+    dead_id = orchestrator.enqueue_task('noop', {'n': 2})
+    orchestrator.claim_tasks('workerL', 2, lease_seconds=60)
+
+    # both started an hour ago; only the long task keeps heartbeating
+    old = (datetime.utcnow() - timedelta(seconds=3600)).isoformat() + 'Z'
+    conn = orchestrator._connect()
+    conn.execute('UPDATE queue SET started_at = ?', (old,))
+    conn.execute('UPDATE queue SET lease_expires_ms = 0 WHERE id = ?', (dead_id,))
+    conn.commit()
+    conn.close()
+    assert orchestrator.heartbeat('workerL', [long_id], 60) == 1
+    # heartbeats from another owner are ignored
+    assert orchestrator.heartbeat('other', [long_id], 60) == 0
+
+    assert orchestrator.reclaim_stale_tasks(60) == 1
+    assert [t['id'] for t in orchestrator.list_tasks('in_progress')] == [long_id]
+    pending = orchestrator.list_tasks('pending')
+    assert [t['id'] for t in pending] == [dead_id]
+
+    conn = orchestrator._connect()
+    assert conn.execute('SELECT lease_expires_ms FROM queue WHERE id = ?', (dead_id,)).fetchone()[0] is None
+    conn.close()
@@ -0,0 +1,52 @@
+import os
+
+import orchestrator
+
+
+def test_large_results_stored_out_of_row(tmp_path, monkeypatch):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_results.db')
+    orchestrator.init_db()
+    monkeypatch.setattr(orchestrator, 'RESULTS_DIR', str(tmp_path / 'results'))
+    monkeypatch.setattr(orchestrator, 'RESULT_INLINE_MAX_BYTES', 1024)
+
+    small, big, twin = orchestrator.enqueue_tasks([('job', {}), ('job', {}), ('job', {})])
+    orchestrator.claim_tasks('w1', 3)
+    stdout = ''.join(f'line {i}\n' for i in range(20000))
+    orchestrator.complete_tasks([(small, {'rc': 0}), (big, {'rc': 0, 'stdout': stdout}), (twin, {'rc': 0, 'stdout': stdout})])
+
+    assert orchestrator.get_task(small)['result'] == {'rc': 0}
+    ref = orchestrator.get_task(big)['result']['$blob']
+    assert ref['size'] > 100000
+    # the row holds only the reference; identical results share one file
+    conn = orchestrator._connect()
+    assert len(conn.execute('SELECT result FROM queue WHERE id = ?', (big,)).fetchone()[0]) < 200
+    conn.close()
+    assert orchestrator.get_task(twin)['result']['$blob'] == ref
+    blob = os.path.join(str(tmp_path / 'results'), *ref['ref'].split('/'))
+    assert os.path.getsize(blob) < ref['size']
+
+    assert orchestrator.read_result(big) == {'rc': 0, 'stdout': stdout}
+    assert orchestrator.read_result(small) == {'rc': 0}
+    assert orchestrator.result_head(big, 20) == '{"rc": 0, "stdout": '
+    assert orchestrator.result_tail(big, 12) == 'line 19999\\n"}'[-12:]
+    assert orchestrator.result_tail(small, 100) == '{"rc": 0}'
+
+
+def test_iter_result_chunks_stay_bounded(tmp_path, monkeypatch):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_bomb.db')
+    orchestrator.init_db()
+    monkeypatch.setattr(orchestrator, 'RESULTS_DIR', str(tmp_path / 'results'))
+    monkeypatch.setattr(orchestrator, 'RESULT_INLINE_MAX_BYTES', 1024)
+
+    tid = orchestrator.enqueue_task('job', {})
+    orchestrator.claim_task('w1')
+    orchestrator.complete_task(tid, {'stdout': 'a' * (8 * 1024 * 1024)})
+    ref = orchestrator.get_task(tid)['result']['$blob']
+    blob = os.path.join(str(tmp_path / 'results'), *ref['ref'].split('/'))
+    # the whole 8 MiB inflates from well under one read
+    assert os.path.getsize(blob) < 64 * 1024
+
+    sizes = [len(c) for c in orchestrator.iter_result(tid, chunk_size=4096)]
+    assert max(sizes) <= 4096
+    assert sum(sizes) == ref['size']
+    assert orchestrator.read_result(tid) == {'stdout': 'a' * (8 * 1024 * 1024)}
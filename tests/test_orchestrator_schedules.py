@@ -0,0 +1,75 @@
+import calendar
+
+import pytest
+
+import orchestrator
+from agents import schedule_timer
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_sched.db')
+    orchestrator.init_db()
+    now = [1_000_000_000]
+    monkeypatch.setattr(orchestrator, '_stamp', lambda: ('2026-01-01T00:00:00Z', now[0]))
+    return now
+
+
+def test_interval_schedule_fires_on_its_grid(clock):
+    first = orchestrator.set_schedule('tick', 'noop', {'x': 1}, interval_seconds=60, overlap='allow')
+    assert first == clock[0] + 60_000
+    assert orchestrator.run_due_schedules() == []
+
+    clock[0] += 61_000
+    [run] = orchestrator.run_due_schedules()
+    assert run['name'] == 'tick' and run['skipped'] is None and run['next_run_ms'] == first + 60_000
+    task = orchestrator.get_task(run['task_ids'][0])
+    assert (task['task_type'], task['payload']) == ('noop', {'x': 1})
+    # already advanced: a second timer finds nothing due
+    assert orchestrator.run_due_schedules() == []
+
+
+@pytest.mark.parametrize('missed,expected', [('once', 1), ('all', 4), ('skip', 0)])
+def test_missed_run_policies(clock, missed, expected):
+    orchestrator.set_schedule('m', 'noop', interval_seconds=10, overlap='allow', missed=missed)
+    clock[0] += 45_000  # runs at +10s, +20s, +30s and +40s are due
+    [run] = orchestrator.run_due_schedules()
+    assert len(run['task_ids']) == expected
+    assert run['skipped'] == (None if expected else 'missed')
+    assert run['next_run_ms'] == clock[0] + 5_000
+
+
+def test_overlap_skip_waits_for_previous_run(clock):
+    orchestrator.set_schedule('o', 'noop', interval_seconds=10, first_run_delay_seconds=0)
+    [run] = orchestrator.run_due_schedules()
+    tid = run['task_ids'][0]
+
+    clock[0] += 10_000
+    assert orchestrator.run_due_schedules()[0]['skipped'] == 'overlap'
+    orchestrator.claim_task('w1')
+    orchestrator.complete_task(tid, {})
+    clock[0] += 10_000
+    assert len(orchestrator.run_due_schedules()[0]['task_ids']) == 1
+
+
+def test_cron_schedule_and_validation(clock):
+    friday_1750 = calendar.timegm((2026, 10, 16, 17, 50, 0)) * 1000
+    clock[0] = friday_1750
+    # weekdays, every 15 minutes from 09:00 to 17:45 -> next is Monday 09:00
+    assert orchestrator.set_schedule('c', 'noop', cron='*/15 9-17 * * 1-5') == calendar.timegm((2026, 10, 19, 9, 0, 0)) * 1000
+    with pytest.raises(ValueError):
+        orchestrator.set_schedule('bad', 'noop', cron='61 * * * *')
+    with pytest.raises(ValueError):
+        orchestrator.set_schedule('both', 'noop', interval_seconds=5, cron='* * * * *')
+
+
+def test_timer_heap_only_runs_due_schedules(clock):
+    orchestrator.set_schedule('soon', 'noop', interval_seconds=5)
+    orchestrator.set_schedule('later', 'noop', interval_seconds=3600)
+    timer = schedule_timer.ScheduleTimer(refresh_seconds=3600)
+    assert timer.tick() == []
+
+    clock[0] += 5_000
+    assert [r['name'] for r in timer.tick()] == ['soon']
+    assert timer._heap[0] == (clock[0] + 5_000, 'soon')
+    assert orchestrator.count_tasks() == {'pending': 1}
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from gaia import pubsub
+
+
+def test_publish_fans_out_once_per_subscriber():
+    bus = pubsub.Bus()
+    subs = [bus.subscribe('t') for _ in range(50)]
+    other = bus.subscribe('other')
+    f = pubsub.frame('approval', {'ok': True})
+    assert f == 'event: approval\ndata: {"ok": true}\n\n'
+    assert bus.publish('t', f) == 50
+    assert all(s.get(0) == f for s in subs)
+    assert other.get(0) is None
+    subs[0].close()
+    assert bus.subscribers('t') == 49
+
+
+def test_retained_frames_replay_to_late_subscribers():
+    bus = pubsub.Bus()
+    bus.publish('state', pubsub.frame('agent-state', {'id': 'a', 'v': 1}), key='a')
+    bus.publish('state', pubsub.frame('agent-state', {'id': 'a', 'v': 2}), key='a')
+    bus.publish('state', pubsub.frame('agent-state', {'id': 'b', 'v': 1}), key='b')
+    bus.publish('state', pubsub.frame(None, 'not retained'))
+    sub = bus.subscribe('state')
+    assert [sub.get(0), sub.get(0), sub.get(0)] == [
+        'event: agent-state\ndata: {"id": "a", "v": 2}\n\n',
+        'event: agent-state\ndata: {"id": "b", "v": 1}\n\n',
+        None,
+    ]
+
+
+def test_slow_subscriber_is_dropped_not_buffered():
+    bus = pubsub.Bus(queue_size=3)
+    fast, slow = bus.subscribe('t'), bus.subscribe('t')
+    for i in range(3):
+        bus.publish('t', pubsub.frame(None, str(i)))
+        fast.get(0)
+    assert bus.publish('t', pubsub.frame(None, '3')) == 1
+    assert slow.dropped and not fast.dropped
+    assert bus.subscribers('t') == 1
+    assert slow.get(0) is None
+
+
+def test_producer_starts_once_and_stream_drains():
+    bus = pubsub.Bus()
+    started = []
+    ready = threading.Event()
+
+    def producer(stop):
+        started.append(1)
+        ready.wait(5)
+        bus.publish('events', pubsub.frame('tick', {'n': 1}))
+
+    bus.register('events', producer)
+    gen = bus.stream('events', heartbeat=0.01)
+    assert next(gen) == ':\n\n'
+    bus.subscribe('events').close()
+    ready.set()
+    frames = [next(gen) for _ in range(50)]
+    assert 'event: tick\ndata: {"n": 1}\n\n' in frames
+    assert started == [1]
+    gen.close()
+    assert bus.subscribers('events') == 0
+
+
+def test_retained_replay_is_capped_at_the_queue_size():
+    bus = pubsub.Bus(queue_size=3)
+    for k in range(5):
+        bus.publish('state', pubsub.frame(None, str(k)), key=k)
+    bus.publish('state', pubsub.frame(None, '0 again'), key=0)
+    sub = bus.subscribe('state')
+    assert not sub.dropped
+    assert [sub.get(0) for _ in range(4)] == [pubsub.frame(None, s) for s in ('3', '4', '0 again')] + [None]
+
+
+def test_exited_producer_is_restarted():
+    bus = pubsub.Bus(restart_delay=0.01)
+    runs = []
+
+    def producer(stop):
+        runs.append(1)
+        bus.publish('events', pubsub.frame('run', {'n': len(runs)}))
+        if len(runs) == 1:
+            raise RuntimeError('watcher died')
+
+    bus.register('events', producer)
+    sub = bus.subscribe('events')
+    got = [sub.get(5), sub.get(5), sub.get(5)]
+    assert got == [pubsub.frame('run', {'n': n}) for n in (1, 2, 3)]
+    sub.close()
+    deadline = time.time() + 5
+    while 'events' in bus._stops and time.time() < deadline:
+        time.sleep(0.01)
+    # with nobody listening it stops, and the next subscriber starts it again
+    assert 'events' not in bus._stops
+    n = len(runs)
+    sub = bus.subscribe('events')
+    assert sub.get(5) == pubsub.frame('run', {'n': n + 1})
+    sub.close()
+
+
+def test_producer_is_stopped_when_the_last_subscriber_leaves():
+    bus = pubsub.Bus(restart_delay=0.01)
+    runs, stopped = [], []
+
+    def producer(stop):
+        runs.append(1)
+        bus.publish('events', pubsub.frame('run', {'n': len(runs)}))
+        stop.wait(5)
+        stopped.append(stop.is_set())
+
+    bus.register('events', producer)
+    a, b = bus.subscribe('events'), bus.subscribe('events')
+    assert a.get(5) == pubsub.frame('run', {'n': 1})
+    a.close()
+    time.sleep(0.05)
+    assert stopped == [] and 'events' in bus._stops
+    b.close()
+    deadline = time.time() + 5
+    while 'events' in bus._stops and time.time() < deadline:
+        time.sleep(0.01)
+    # it returned because it was told to, not after the 5 s wait
+    assert stopped == [True] and 'events' not in bus._stops
+    sub = bus.subscribe('events')
+    assert sub.get(5) == pubsub.frame('run', {'n': 2})
+    assert runs == [1, 1]
+    sub.close()
@@ -0,0 +1,157 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import orchestrator
+from agents import queue_server
+from agents.queue_client import QueueClient, QueueError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def server(tmp_path):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_qs.db')
+    orchestrator.init_db()
+    srv = queue_server.make_server('127.0.0.1', 0)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield 'http://127.0.0.1:%s' % srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_client_round_trip(server):
+    client = QueueClient(server)
+    ids = client.enqueue_tasks([('noop', {'i': i}) for i in range(5)])
+    assert ids == list(range(1, 6))
+    assert client.count_tasks() == {'pending': 5}
+
+    tasks = client.claim_tasks('r1', 3, lease_seconds=30)
+    assert [t['payload']['i'] for t in tasks] == [0, 1, 2]
+    assert client.heartbeat('r1', [t['id'] for t in tasks], 30) == 3
+    client.complete_tasks([(tasks[0]['id'], {'ok': True}), (tasks[1]['id'], {'ok': True})])
+    client.fail_tasks([(tasks[2]['id'], 'boom')])
+    assert client.count_tasks() == {'pending': 2, 'completed': 2, 'failed': 1}
+    assert orchestrator.get_task(tasks[0]['id'])['result'] == {'ok': True}
+
+    with pytest.raises(QueueError):
+        client.heartbeat('r1', [1], None)
+
+
+def test_token_is_required_off_loopback(tmp_path, monkeypatch):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_qs_token.db')
+    orchestrator.init_db()
+    with pytest.raises(ValueError):
+        queue_server.make_server('0.0.0.0', 0)
+    monkeypatch.delenv('GAIA_QUEUE_TOKEN', raising=False)
+    with pytest.raises(SystemExit):
+        queue_server.main(['--host', '0.0.0.0', '--port', '0'])
+
+    srv = queue_server.make_server('0.0.0.0', 0, token='s3cret')
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        url = 'http://127.0.0.1:%s' % srv.server_address[1]
+        assert QueueClient(url, token='s3cret').count_tasks() == {}
+        for bad in ('s3cre', 's3cret!', 'sécret'):
+            with pytest.raises(QueueError):
+                QueueClient(url, token=bad).count_tasks()
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+@pytest.mark.skipif(not orchestrator._HAS_UNIX_DGRAM, reason='needs AF_UNIX datagram sockets')
+def test_long_poll_claim_wakes_on_enqueue(server):
+    client = QueueClient(server)
+    threading.Timer(0.3, orchestrator.enqueue_task, args=('noop', {'late': True})).start()
+    start = time.time()
+    tasks = client.claim_tasks('r1', 4, wait=10)
+    assert [t['payload'] for t in tasks] == [{'late': True}]
+    assert time.time() - start < 5
+    # nothing left: the poll times out empty
+    assert client.claim_tasks('r1', 4, wait=0.2) == []
+
+
+def test_remote_worker_processes_drain_queue(server):
+    client = QueueClient(server)
+    ids = client.enqueue_tasks([('noop', {'i': i}) for i in range(40)])
+    procs = [subprocess.Popen([sys.executable, '-m', 'agents.worker', '--worker-id', f'remote{i}', '--queue-url', server,
+                               '--max-jobs', '4', '--poll-interval', '0.5', '--run-duration', '20'],
+                              cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for i in range(2)]
+    try:
+        deadline = time.time() + 20
+        while time.time() < deadline and client.count_tasks().get('completed', 0) < len(ids):
+            time.sleep(0.1)
+        assert client.count_tasks() == {'completed': len(ids)}
+        owners = {orchestrator.get_task(i)['owner'] for i in ids}
+        assert owners <= {'remote0', 'remote1'}
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait(timeout=10)
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    seen = []
+    delay = 0.0
+    close_after = False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        type(self).seen.append(self.path)
+        time.sleep(type(self).delay)
+        body = b'{"tasks": [], "id": 1}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # drop the keep-alive connection without telling the client
+        self.close_connection = type(self).close_after
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def counting_server():
+    _CountingHandler.seen, _CountingHandler.delay, _CountingHandler.close_after = [], 0.0, False
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _CountingHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:%s' % srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_timed_out_post_is_never_resent(counting_server):
+    _CountingHandler.delay = 0.5
+    client = QueueClient(counting_server, timeout=0.2)
+    with pytest.raises(OSError):
+        client.claim_tasks('r1', 4)
+    with pytest.raises(OSError):
+        client.enqueue_task('noop', {})
+    time.sleep(0.7)
+    assert _CountingHandler.seen == ['/claim', '/enqueue']
+
+
+def test_server_closed_keepalive_reconnects_without_duplicates(counting_server):
+    _CountingHandler.close_after = True
+    client = QueueClient(counting_server)
+    for _ in range(3):
+        assert client.enqueue_task('noop', {}) == 1
+        time.sleep(0.05)
+    assert _CountingHandler.seen == ['/enqueue'] * 3
+
+
+def test_long_poll_read_outlasts_server_wait():
+    client = QueueClient('http://127.0.0.1:1', timeout=5)
+    seen = {}
+    client._request = lambda method, path, body=None, timeout=None: seen.update(timeout=timeout) or {'tasks': []}
+    client.claim_tasks('r1', 1, wait=queue_server.MAX_WAIT_SECONDS)
+    assert seen['timeout'] >= queue_server.MAX_WAIT_SECONDS + QueueClient.LONG_POLL_MARGIN
@@ -51,17 +51,17 @@ def test_import_with_enqueue_calls_orchestrator(tmp_path, monkeypatch):
     mod = types.ModuleType('orchestrator')
     mod.calls = []
 
-    def enqueue_task(task_type, payload):
-        mod.calls.append((task_type, payload))
-        return 999
+    def enqueue_tasks(items):
+        mod.calls.append(list(items))
+        return [999 + i for i in range(len(mod.calls[-1]))]
 
-    mod.enqueue_task = enqueue_task
+    mod.enqueue_tasks = enqueue_tasks
     monkeypatch.setitem(sys.modules, 'orchestrator', mod)
 
     args = SimpleNamespace(file=str(f), enqueue=True)
     rc = scrum_backlog.cmd_import_file(args)
     assert rc == 0
     assert len(mod.calls) == 1
-    task_type, payload = mod.calls[0]
+    task_type, payload = mod.calls[0][0]
     assert task_type == 'create-ticket'
     assert 'story' in payload
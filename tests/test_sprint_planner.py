@@ -19,26 +19,28 @@ def test_plan_sprint_emits_and_enqueue(tmp_path, monkeypatch):
     events = tmp_path / 'events.ndjson'
     monkeypatch.setattr(sprint_planner, 'EVENTS_PATH', str(events))
 
-    stories = [{'id': 's2', 'title': 'Do other'}]
+    stories = [{'id': 's2', 'title': 'Do other'}, {'id': 's3', 'title': 'Do more'}]
     sf = tmp_path / 'stories.json'
     sf.write_text(json.dumps(stories), encoding='utf-8')
 
     mod = types.ModuleType('orchestrator')
     mod.calls = []
 
-    def enqueue_task(task_type, payload):
-        mod.calls.append((task_type, payload))
-        return 123
+    def enqueue_tasks(items):
+        mod.calls.append(list(items))
+        return [123, 124]
 
-    mod.enqueue_task = enqueue_task
+    mod.enqueue_tasks = enqueue_tasks
     monkeypatch.setitem(sys.modules, 'orchestrator', mod)
 
     args = SimpleNamespace(name='Sprint1', start='2026-02-02', end='2026-02-16', stories_file=str(sf), enqueue=True)
     rc = sprint_planner.cmd_plan_sprint(args)
     assert rc == 0
+    # both stories go through a single bulk enqueue
     assert len(mod.calls) == 1
+    assert [t for t, _ in mod.calls[0]] == ['sprint-task', 'sprint-task']
     text = events.read_text(encoding='utf-8').strip()
     lines = text.splitlines() if text else []
-    assert len(lines) == 1
+    assert len(lines) == 2
     ev = json.loads(lines[0])
     assert ev['type'] == 'sprint.task.created'
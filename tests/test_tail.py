@@ -0,0 +1,78 @@
+import io
+
+import pytest
+
+from gaia import tail
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 7, 64 * 1024])
+def test_reverse_lines_matches_splitlines(tmp_path, block_size):
+    text = 'first\r\n\nnaïve ünïcode ✓\n\nlast'
+    path = tmp_path / 'a.log'
+    path.write_bytes(text.encode('utf-8'))
+
+    got = [l.decode('utf-8') for l in tail.reverse_lines(str(path), block_size, skip_blank=False)]
+    assert got[::-1] == text.replace('\r\n', '\n').splitlines()
+    assert [l.decode('utf-8') for l in tail.reverse_lines(str(path), block_size)] == ['last', 'naïve ünïcode ✓', 'first']
+    # an unterminated last line is a write in progress
+    assert next(tail.reverse_lines(str(path), block_size, partial=False)) == 'naïve ünïcode ✓'.encode('utf-8')
+
+
+def test_tail_helpers(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    path.write_text('{"i": 1}\nnot json\n{"i": 2}\n{"i": 3}\n{"i": ', encoding='utf-8')
+    assert tail.tail_json(str(path), 2) == [{'i': 2}, {'i': 3}]
+    assert tail.tail_json(str(path), 10) == [{'i': 1}, {'i': 2}, {'i': 3}]
+    assert tail.tail_lines(str(path), 2) == ['{"i": 3}', '{"i": ']
+    assert tail.tail_text(str(path), 0) == ''
+    assert tail.tail_lines(str(tmp_path / 'missing.log'), 5) == []
+
+
+def test_tail_reads_only_the_end(tmp_path, monkeypatch):
+    path = tmp_path / 'big.log'
+    path.write_text(''.join(f'line {i}\n' for i in range(200_000)), encoding='utf-8')
+    read = []
+
+    class Counting(io.FileIO):
+        def read(self, size=-1):
+            data = super().read(size)
+            read.append(len(data))
+            return data
+
+    monkeypatch.setattr(tail, 'open', lambda p, mode: Counting(p, 'r'), raising=False)
+    assert tail.tail_lines(str(path), 3) == ['line 199997', 'line 199998', 'line 199999']
+    assert sum(read) <= tail.BLOCK_SIZE + 1
+
+
+def test_follow_survives_rolls_and_partial_lines(tmp_path):
+    import os
+    import threading
+
+    path = tmp_path / 'events.ndjson'
+    path.write_text('old\n', encoding='utf-8')
+    stop = threading.Event()
+    gen = tail.follow(str(path), stop=stop, interval=0.01, from_start=True)
+    got = []
+
+    def write(data):
+        with open(path, 'ab') as f:
+            f.write(data)
+
+    def take(n):
+        want = len(got) + n
+        while len(got) < want:
+            got.append(next(gen))
+        return got[-n:]
+
+    assert take(1) == [b'old']
+    write(b'one\ntw')
+    assert take(1) == [b'one']
+    write(b'o\n')
+    assert take(1) == [b'two']
+    # roll: the old file gets one last line, then a new file takes the path
+    write(b'three\n')
+    os.replace(path, tmp_path / 'sealed.ndjson')
+    path.write_bytes(b'four\n')
+    assert take(2) == [b'three', b'four']
+    stop.set()
+    assert list(gen) == []
@@ -22,8 +22,8 @@ def test_assign_task_emits_and_enqueue(tmp_path, monkeypatch):
     mod = types.ModuleType('orchestrator')
     mod.calls = []
 
-    def enqueue_task(task_type, payload):
-        mod.calls.append((task_type, payload))
+    def enqueue_task(task_type, payload, dedup_key=None):
+        mod.calls.append((task_type, payload, dedup_key))
         return 555
 
     mod.enqueue_task = enqueue_task
@@ -33,8 +33,33 @@ def test_assign_task_emits_and_enqueue(tmp_path, monkeypatch):
     rc = task_assigner.cmd_assign_task(args)
     assert rc == 0
     assert len(mod.calls) == 1
+    assert mod.calls[0][2]
     text = events.read_text(encoding='utf-8').strip()
     lines = text.splitlines() if text else []
     assert len(lines) == 1
     ev = json.loads(lines[0])
     assert ev['type'] == 'task.assigned'
+
+
+def test_assign_from_file_enqueues_in_bulk(tmp_path, monkeypatch):
+    events = tmp_path / 'events.ndjson'
+    monkeypatch.setattr(task_assigner, 'EVENTS_PATH', str(events))
+
+    mod = types.ModuleType('orchestrator')
+    mod.calls = []
+
+    def enqueue_tasks(items):
+        mod.calls.append(list(items))
+        return [1, 2, 3]
+
+    mod.enqueue_tasks = enqueue_tasks
+    monkeypatch.setitem(sys.modules, 'orchestrator', mod)
+
+    f = tmp_path / 'tasks.json'
+    f.write_text(json.dumps([{'task_id': f't{i}', 'assignee': 'bob'} for i in range(3)]), encoding='utf-8')
+    rc = task_assigner.cmd_assign_from_file(SimpleNamespace(file=str(f), enqueue=True))
+    assert rc == 0
+    assert len(mod.calls) == 1
+    assert [p['assignment']['task_id'] for _, p, _ in mod.calls[0]] == ['t0', 't1', 't2']
+    assert len({key for _, _, key in mod.calls[0]}) == 3
+    assert len(events.read_text(encoding='utf-8').splitlines()) == 3
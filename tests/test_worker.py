@@ -22,3 +22,145 @@ def test_worker_claims_and_runs_job(tmp_path, monkeypatch):
     # ensure task is completed
     completed = orchestrator.list_tasks('completed')
     assert any(t['id'] == tid for t in completed)
+
+
+def test_run_once_claims_and_finalizes_in_batches(tmp_path, monkeypatch):
+    db = tmp_path / 'gaia_worker_batch.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    for i in range(4):
+        orchestrator.enqueue_task('noop', {'i': i})
+    orchestrator.enqueue_task('unknown-type', {})
+
+    calls = []
+    real_complete = orchestrator.complete_tasks
+
+    def counting_complete(items):
+        calls.append(len(items))
+        real_complete(items)
+
+    monkeypatch.setattr(orchestrator, 'complete_tasks', counting_complete)
+
+    rc = worker.run_once('wb', max_jobs=8)
+    assert rc == 0
+    assert calls == [4]
+    assert len(orchestrator.list_tasks('completed')) == 4
+    assert len(orchestrator.list_tasks('failed')) == 1
+
+
+def test_async_mode_runs_coroutine_handlers_concurrently(tmp_path):
+    import asyncio
+    import time
+
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_worker_async.db')
+    orchestrator.init_db()
+
+    @worker.register_handler('sleepy')
+    async def sleepy(payload):
+        await asyncio.sleep(0.3)
+        return {'i': payload['i']}
+
+    try:
+        orchestrator.enqueue_tasks([('sleepy', {'i': i}) for i in range(200)] + [('noop', {})])
+        start = time.time()
+        rc = asyncio.run(worker.run_async('wa', max_jobs=300, once=True))
+        assert rc == 0
+        # 200 x 0.3s of waiting overlaps on one loop
+        assert time.time() - start < 5
+        assert orchestrator.count_tasks() == {'completed': 201}
+    finally:
+        worker.HANDLERS.pop('sleepy', None)
+
+
+def test_async_mode_runs_job_subprocess(tmp_path):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_worker_async_job.db')
+    orchestrator.init_db()
+    ok = orchestrator.enqueue_task('job', {'cmd': 'echo async_worker', 'check': True})
+    bad = orchestrator.enqueue_task('job', {'cmd': 'exit 3', 'check': True})
+
+    assert worker.main(['--worker-id', 'wa', '--once', '--async', '--max-jobs', '4']) == 0
+    assert 'async_worker' in orchestrator.get_task(ok)['result']['stdout']
+    assert orchestrator.get_task(bad)['status'] == 'failed'
+
+
+def _crunch(payload):
+    if payload.get('boom'):
+        raise ValueError('bad report')
+    return {'pid': os.getpid(), 'total': sum(i * i for i in range(payload['n']))}
+
+
+def _crash(payload):
+    if payload.get('die'):
+        os._exit(1)
+    return {'pid': os.getpid()}
+
+
+def test_crashed_pool_process_fails_only_its_task(tmp_path):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_worker_crash.db')
+    orchestrator.init_db()
+    worker.register_handler('crash', executor='process')(_crash)
+    try:
+        worker.start_process_pool(1)
+        broken = worker._PROCESS_POOL
+        dead = orchestrator.enqueue_task('crash', {'die': True})
+        assert worker.run_once('wc', max_jobs=1) == 0
+        assert orchestrator.get_task(dead)['status'] == 'failed'
+
+        # the broken pool is replaced on the next submit and keeps serving
+        ok = orchestrator.enqueue_task('crash', {})
+        assert worker.run_once('wc', max_jobs=1) == 0
+        assert orchestrator.get_task(ok)['status'] == 'completed'
+        assert worker._PROCESS_POOL is not broken
+        assert orchestrator.count_tasks().get('in_progress', 0) == 0
+    finally:
+        worker.stop_process_pool()
+        worker.HANDLERS.pop('crash', None)
+        worker.PROCESS_TYPES.discard('crash')
+
+
+def test_process_lane_runs_cpu_handlers_in_pool(tmp_path):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_worker_proc.db')
+    orchestrator.init_db()
+    worker.register_handler('crunch', executor='process')(_crunch)
+    try:
+        ok = orchestrator.enqueue_task('crunch', {'n': 1000})
+        bad = orchestrator.enqueue_task('crunch', {'n': 1, 'boom': True})
+        noop = orchestrator.enqueue_task('noop', {})
+        worker.start_process_pool(2)
+        assert worker.run_once('wp', max_jobs=4) == 0
+
+        result = orchestrator.get_task(ok)['result']
+        assert result['total'] == sum(i * i for i in range(1000))
+        assert result['pid'] != os.getpid()
+        assert orchestrator.get_task(bad)['result'] == {'error': 'bad report'}
+        assert orchestrator.get_task(noop)['status'] == 'completed'
+    finally:
+        worker.stop_process_pool()
+        worker.HANDLERS.pop('crunch', None)
+        worker.PROCESS_TYPES.discard('crunch')
+
+
+def _emit(payload):
+    from gaia import events
+    events.EVENTS_FILE, events.SHORT_LOG = payload['events'], payload['short']
+    events._writer.delay_s = 60  # only an explicit flush writes it
+    events.make_event('pool.note', {'pid': os.getpid()})
+    return {}
+
+
+def test_pool_process_events_are_flushed_before_it_exits(tmp_path):
+    orchestrator.DB_PATH = str(tmp_path / 'gaia_worker_emit.db')
+    orchestrator.init_db()
+    worker.register_handler('emit', executor='process')(_emit)
+    path = tmp_path / 'events.ndjson'
+    try:
+        worker.start_process_pool(1)
+        tid = orchestrator.enqueue_task('emit', {'events': str(path), 'short': str(tmp_path / 'short.log')})
+        assert worker.run_once('we', max_jobs=1) == 0
+        assert orchestrator.get_task(tid)['status'] == 'completed'
+    finally:
+        worker.stop_process_pool()
+        worker.HANDLERS.pop('emit', None)
+        worker.PROCESS_TYPES.discard('emit')
+    assert [json.loads(x)['type'] for x in path.read_text().splitlines()] == ['pool.note']
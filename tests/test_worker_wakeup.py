@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+import orchestrator
+from agents import worker
+
+
+pytestmark = pytest.mark.skipif(not orchestrator._HAS_UNIX_DGRAM, reason='needs AF_UNIX datagram sockets')
+
+
+def test_waiter_wakes_on_enqueue(tmp_path):
+    db = tmp_path / 'gaia_wake.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    waiter = orchestrator.TaskWaiter()
+    try:
+        assert waiter.wait(0.05) is False
+        threading.Timer(0.1, orchestrator.enqueue_task, args=('noop', {})).start()
+        start = time.time()
+        assert waiter.wait(5) is True
+        assert time.time() - start < 2
+    finally:
+        waiter.close()
+
+
+def test_idle_worker_picks_up_without_polling(tmp_path):
+    db = tmp_path / 'gaia_wake2.db'
+    orchestrator.DB_PATH = str(db)
+    orchestrator.init_db()
+
+    # poll interval far longer than the test: only a push wakeup can start the task
+    t = threading.Thread(target=worker.main, args=(['--worker-id', 'ww', '--poll-interval', '30', '--run-duration', '3'],))
+    t.start()
+    time.sleep(0.3)
+    tid = orchestrator.enqueue_task('noop', {})
+
+    deadline = time.time() + 2
+    while time.time() < deadline and not any(x['id'] == tid for x in orchestrator.list_tasks('completed')):
+        time.sleep(0.02)
+    assert any(x['id'] == tid for x in orchestrator.list_tasks('completed'))
+    t.join(timeout=10)